@@ -0,0 +1,115 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+"""
+Micro-benchmark: `json.loads(model.to_json_string())` vs `tencentcloud.models.model_to_dict` on the
+InstanceSet / DiskSet of large Tencent Cloud responses.
+
+    python benchmarks/bench_models.py [--rows 10000] [--repeat 5]
+
+The models are built like the ones of the SDK (tencentcloud-sdk-python 3.0): one class per model, every field
+declared in `__init__` as `_Field`, serialized by `AbstractModel._serialize`.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes  # noqa: E402
+import loader  # noqa: E402
+
+
+class SdkModel(fakes.AbstractModel):
+    """
+    `tencentcloud.common.abstract_model.AbstractModel` of the SDK
+    """
+    FIELDS = ()
+    NESTED = {}
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, "_" + field, None)
+
+    def _deserialize(self, params):
+        for field in self.FIELDS:
+            value = params.get(field)
+            model_class = self.NESTED.get(field)
+            if model_class is not None and isinstance(value, dict):
+                value = model_class.from_params(value)
+            elif model_class is not None and isinstance(value, list):
+                value = [model_class.from_params(item) for item in value]
+            setattr(self, "_" + field, value)
+
+    @classmethod
+    def from_params(cls, params):
+        model = cls()
+        model._deserialize(params)
+        return model
+
+    def _serialize(self, allow_none=False):
+        ret = {}
+        for key, value in list(vars(self).items()):
+            if isinstance(value, fakes.AbstractModel):
+                value = value._serialize(allow_none)
+            elif isinstance(value, list):
+                value = [item._serialize(allow_none) if isinstance(item, fakes.AbstractModel) else item
+                         for item in value]
+            if allow_none or value is not None:
+                ret[key[1:] if key[0] == "_" else key] = value
+        return ret
+
+    def to_json_string(self, *args, **kwargs):
+        return json.dumps(self._serialize(allow_none=False), *args, **kwargs)
+
+
+def model_class(name, record):
+    """
+    SDK-like model class of `record`, with a class per nested dict / list of dicts
+    """
+    nested = {}
+    for key, value in list(record.items()):
+        if isinstance(value, dict):
+            nested[key] = model_class(key, value)
+        elif isinstance(value, list) and value and isinstance(value[0], dict):
+            nested[key] = model_class(key, value[0])
+    return type(name, (SdkModel,), {"FIELDS": tuple(record), "NESTED": nested})
+
+
+def sdk_models(action, rows):
+    set_name, record = fakes.TENCENT_RECORDS[action][:2]
+    cls = model_class(set_name, record)
+    return [cls.from_params(row) for row in fakes.rows(action, record, rows)]
+
+
+def bench(name, round_trip, converter, repeat):
+    round_trip_time = min(timeit.repeat(round_trip, repeat=repeat, number=1))
+    converter_time = min(timeit.repeat(converter, repeat=repeat, number=1))
+    print("{:<28} json {:>9.2f} ms   model_to_dict {:>9.2f} ms   x{:.2f}".format(
+        name, round_trip_time * 1000, converter_time * 1000, round_trip_time / converter_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    fakes.install(inventory=args.rows)
+    loader.install()
+    model_to_dict = importlib.import_module(loader.CLOUD_RESOURCES + ".tencentcloud.models").model_to_dict
+
+    for action in ("DescribeInstances", "DescribeDisks"):
+        models = sdk_models(action, args.rows)
+        assert [json.loads(model.to_json_string()) for model in models] == model_to_dict(models)
+        bench("{} x{}".format(fakes.TENCENT_RECORDS[action][0], args.rows),
+              lambda: [json.loads(model.to_json_string()) for model in models],
+              lambda: model_to_dict(models),
+              args.repeat)
+
+
+if __name__ == "__main__":
+    main()
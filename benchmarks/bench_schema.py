@@ -0,0 +1,114 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+"""
+Micro-benchmark: legacy schema walking vs the compiled schema engine of commoncloud.
+
+    python benchmarks/bench_schema.py [--rows 10000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cloudentries", "commoncloud"))
+
+from query import params as Params  # noqa: E402
+from query import response as Resp  # noqa: E402
+from query.utils import CommonValidate  # noqa: E402
+from query.schema import compile_schema  # noqa: E402
+
+
+def legacy_response(raw_resp, resp_format):
+    """
+    `CommonCloudResponse.response` before the schema compiler
+    """
+    _resp = []
+    for resp in raw_resp:
+        each_resp = {}
+        for param_key, param_schema in list(resp_format[0].items()):
+            param_value = resp.get(param_key) if resp.get(param_key) else ""
+            CommonValidate.validate_required(param_schema, param_key, param_value, "Response")
+            CommonValidate.validate_type(param_schema, param_key, param_value, "Response")
+            if param_value:
+                each_resp.update({
+                    param_key: param_value
+                })
+        _resp.append(each_resp)
+    return _resp
+
+
+def legacy_params(raw_params, param_format):
+    """
+    `CommonCloudParams.params` before the schema compiler
+    """
+    validated_params = {}
+    for param_key, param_schema in list(param_format.items()):
+        param_value = raw_params.get(param_key, "")
+        CommonValidate.validate_required(param_schema, param_key, param_value)
+        CommonValidate.validate_type(param_schema, param_key, param_value)
+        CommonValidate.validate_allow_values(param_schema, param_key, param_value)
+        validated_params.update({param_key: param_value})
+    return validated_params
+
+
+def synthetic_instances(rows):
+    instances = []
+    for index in range(rows):
+        instances.append({
+            "Id": "i-{:08d}".format(index),
+            "Name": "vm-{}".format(index),
+            "Status": "started",
+            "PowerState": "POWERED_ON",
+            "Zone": "zone-{}".format(index % 4),
+            "ImageId": "img-{}".format(index % 32),
+            "OperatingSystem": "centos",
+            "CPU": 2,
+            "Memory": 4,
+            "Storage": 60,
+            "CreateTime": "2021-01-01T00:00:00Z",
+            "NetworkAddress": {"private_ip": "10.0.{}.{}".format(index // 250 % 250, index % 250)},
+            "PrivateIpAddresses": ["10.0.0.1"],
+            "DataDisks": [],
+            "InstanceType": "S5.LARGE8",
+            "Tags": [],
+            "ChargeType": "",
+            "SystemDisk": None,
+            "NotInSchema": "dropped"
+        })
+    return instances
+
+
+def bench(name, legacy, compiled, repeat, number=1):
+    legacy_time = min(timeit.repeat(legacy, repeat=repeat, number=number))
+    compiled_time = min(timeit.repeat(compiled, repeat=repeat, number=number))
+    print("{:<28} legacy {:>9.2f} ms   compiled {:>9.2f} ms   x{:.2f}".format(
+        name, legacy_time * 1000, compiled_time * 1000, legacy_time / compiled_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_instances(args.rows)
+    compiled_instance = compile_schema(Resp.Instance.Schema)
+    assert legacy_response(rows, Resp.Instance.Schema) == compiled_instance.project(rows)
+    bench("response Instance x{}".format(args.rows),
+          lambda: legacy_response(rows, Resp.Instance.Schema),
+          lambda: compiled_instance.project(rows),
+          args.repeat)
+
+    query_params = {"region": "cn-beijing-6", "zone": "cn-beijing-6a", "ImageType": "", "osType": "linux",
+                    "resource_id": "i-1,i-2", "patternImageName": "centos"}
+    compiled_image = compile_schema(Params.Image.Schema)
+    assert legacy_params(query_params, Params.Image.Schema) == compiled_image.validate_params(query_params)
+    bench("params Image x{}".format(args.rows),
+          lambda: legacy_params(query_params, Params.Image.Schema),
+          lambda: compiled_image.validate_params(query_params),
+          args.repeat, number=args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,588 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+"""
+Recorded-response fakes of the cloud SDKs used by the query code (kscore, tencentcloud, googleapiclient),
+and a fake vCenter for the property collector of pyVmomi.
+`install(inventory)` registers them in `sys.modules`; each API replies the recorded row of its set
+scaled to `inventory` rows ("{i}" in the recorded strings is replaced by the row index).
+Responses go through a JSON round trip like the SDKs do, the bytes of the round trip are counted.
+Filters are not applied, paging parameters are honoured with the defaults of the real APIs.
+"""
+
+import json
+import re
+import sys
+import time
+import types
+
+from measure import api_counter
+
+LATENCY = {"seconds": 0.0}
+INVENTORY = {"rows": 100}
+
+
+def scale(record, count):
+    template = json.dumps(record)
+    return [json.loads(template.replace("{i}", str(index))) for index in range(count)]
+
+
+_scaled = {}
+
+
+def rows(name, record, count=None):
+    count = INVENTORY["rows"] if count is None else count
+    key = (name, count)
+    if key not in _scaled:
+        _scaled[key] = scale(record, count)
+    return _scaled[key]
+
+
+def reply(payload):
+    """
+    Serialize / deserialize the response like the SDKs do, count the call
+    """
+    if LATENCY["seconds"]:
+        time.sleep(LATENCY["seconds"])
+    data = json.dumps(payload)
+    api_counter.count(received=len(data))
+    return json.loads(data)
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    if parent in sys.modules:
+        setattr(sys.modules[parent], child, module)
+    return module
+
+
+def _package(name):
+    module = _module(name)
+    module.__path__ = []
+    return module
+
+
+# ---------------------------------------------------------------- kscore (ksyun)
+
+KSYUN_RECORDS = {
+    "describe_regions": ("RegionSet", {"Region": "cn-region-{i}", "RegionName": "Region {i}"}, 8),
+    "describe_availability_zones": ("AvailabilityZoneSet", {"AvailabilityZone": "cn-region-1{i}",
+                                                            "Region": "cn-region-1"}, 4),
+    "describe_images": ("ImagesSet", {"ImageId": "img-{i}", "Name": "centos-7.{i}", "Platform": "centos",
+                                      "ImageState": "active", "CreationDate": "2021-01-01 00:00:00",
+                                      "SysDisk": 20, "SnapshotSet": []}, None),
+    "describe_instances": ("InstancesSet", {
+        "InstanceId": "ins-{i}", "InstanceName": "vm-{i}", "InstanceType": "S6.2B", "ImageId": "img-{i}",
+        "InstanceConfigure": {"VCPU": 2, "GPU": 0, "MemoryGb": 4},
+        "InstanceState": {"Name": "active"}, "SubnetId": "subnet-{i}", "CreationDate": "2021-01-01 00:00:00",
+        "AvailabilityZone": "cn-region-1a", "ChargeType": "Daily", "HostName": "vm-{i}",
+        "SystemDisk": {"DiskType": "SSD3.0", "DiskSize": 20}, "DataDisks": [{"DiskId": "disk-{i}", "DiskSize": 50}],
+        "NetworkInterfaceSet": [{"PrivateIpAddress": "10.0.0.{i}", "VpcId": "vpc-{i}"}]}, None),
+    "describe_instance_type_configs": ("InstanceTypeConfigSet", {
+        "InstanceType": "S6.{i}B", "InstanceFamily": "S6", "CPU": 2, "Memory": 4,
+        "SystemDiskQuotaSet": [{"SystemDiskType": "SSD3.0"}], "DataDiskQuotaSet": [{"DataDiskType": "EHDD"}],
+        "AvailabilityZoneSet": [{"AvailabilityZone": "cn-region-1a"}]}, None),
+    "describe_local_volumes": ("LocalVolumeSet", {
+        "LocalVolumeId": "local-{i}", "LocalVolumeName": "local-{i}", "LocalVolumeState": "in-use",
+        "InstanceId": "ins-{i}", "InstanceName": "vm-{i}", "InstanceState": "active", "LocalVolumeType": "SSD",
+        "LocalVolumeCategory": "system", "LocalVolumeSize": 20, "CreationDate": "2021-01-01 00:00:00"}, None),
+    "describe_local_volume_snapshots": ("LocalVolumeSnapshotSet", {
+        "LocalVolumeSnapshotId": "snap-{i}", "LocalVolumeSnapshotName": "snap-{i}", "State": "ACTIVE",
+        "SourceLocalVolumeId": "local-{i}", "DiskSize": 20, "CreationDate": "2021-01-01 00:00:00"}, 1),
+    "describe_instance_familys": ("InstanceFamilySet", {"InstanceFamily": "S{i}", "InstanceFamilyName": "S{i}",
+                                                        "AvailabilityZoneSet": []}, 16),
+    "describe_vpcs": ("VpcSet", {"VpcId": "vpc-{i}", "VpcName": "vpc-{i}", "CidrBlock": "10.0.0.0/16",
+                                 "CreateTime": "2021-01-01 00:00:00"}, None),
+    "describe_subnets": ("SubnetSet", {
+        "SubnetId": "subnet-{i}", "SubnetName": "subnet-{i}", "VpcId": "vpc-{i}", "CidrBlock": "10.0.0.0/24",
+        "SubnetType": "Normal", "CreateTime": "2021-01-01 00:00:00", "Dns1": "198.18.254.40",
+        "GatewayIp": "10.0.0.1", "AvailabilityZoneName": "cn-region-1a"}, None),
+    "describe_security_groups": ("SecurityGroupSet", {
+        "SecurityGroupId": "sg-{i}", "SecurityGroupName": "sg-{i}", "VpcId": "vpc-{i}",
+        "CreateTime": "2021-01-01 00:00:00", "SecurityGroupType": "other", "SecurityGroupEntrySet": []}, None),
+    "describe_addresses": ("AddressesSet", {
+        "AllocationId": "eip-{i}", "PublicIp": "120.92.0.{i}", "LineId": "line-1", "BandWidth": 1,
+        "State": "associate", "InstanceType": "Ipfwd", "InstanceId": "ins-{i}",
+        "CreateTime": "2021-01-01 00:00:00"}, None),
+    "get_lines": ("LineSet", {"LineId": "line-{i}", "LineName": "BGP", "IpVersion": "ipv4",
+                              "LineType": "BGP"}, 2),
+    "describe_volumes": ("Volumes", {
+        "VolumeId": "vol-{i}", "VolumeName": "vol-{i}", "VolumeStatus": "in-use", "VolumeType": "SSD3.0",
+        "VolumeCategory": "data", "Size": 50, "CreateTime": "2021-01-01 00:00:00", "Attachment": []}, None),
+    "describe_instance_volumes": ("Attachments", {
+        "InstanceId": "ins-{i}", "VolumeId": "vol-{i}", "VolumeName": "vol-{i}", "VolumeStatus": "in-use",
+        "VolumeCategory": "data", "VolumeType": "SSD3.0", "Size": 50}, 2),
+    "describe_snapshots": ("Snapshots", {
+        "SnapshotId": "snap-{i}", "Name": "snap-{i}", "Status": "available", "UDiskId": "vol-{i}",
+        "CreateTime": "2021-01-01T00:00:00Z", "ExpiredTime": "2031-01-01T00:00:00Z", "Size": 50}, None),
+}
+
+
+# operations paged by `Marker` (offset) which reply a total count instead of a NextToken
+KSYUN_MARKER_COUNTS = {"describe_instances": "InstanceCount", "describe_volumes": "TotalCount"}
+
+
+class KsyunFakeClient(object):
+    """
+    `MaxResults`/`NextToken` page the sets (NextToken is the offset of the next page), `MaxResults`/`Marker`
+    those of KSYUN_MARKER_COUNTS. Without `MaxResults` the whole set is replied
+    """
+
+    def __init__(self, service_name, **kwargs):
+        self.service_name = service_name
+
+    def __getattr__(self, operation):
+        if operation not in KSYUN_RECORDS:
+            raise AttributeError(operation)
+        set_name, record, count = KSYUN_RECORDS[operation]
+
+        def call(**params):
+            all_rows = rows(operation, record, count)
+            count_name = KSYUN_MARKER_COUNTS.get(operation)
+            offset = int(params.get("Marker" if count_name else "NextToken") or 0)
+            limit = int(params.get("MaxResults") or len(all_rows) or 1)
+            payload = {"RequestId": "fake", set_name: all_rows[offset:offset + limit]}
+            if count_name:
+                payload[count_name] = len(all_rows)
+            elif offset + limit < len(all_rows):
+                payload["NextToken"] = str(offset + limit)
+            return reply(payload)
+
+        return call
+
+
+class KsyunFakeSession(object):
+    def set_domain(self, domain):
+        self.domain = domain
+
+    def create_client(self, service_name=None, **kwargs):
+        return KsyunFakeClient(service_name, **kwargs)
+
+
+def install_kscore():
+    _package("kscore")
+    _module("kscore.session", get_session=KsyunFakeSession)
+
+
+# ---------------------------------------------------------------- tencentcloud
+
+TENCENT_RECORDS = {
+    "DescribeRegions": ("RegionSet", {"Region": "ap-region-{i}", "RegionName": "Region {i}",
+                                      "RegionState": "AVAILABLE"}, 20, False),
+    "DescribeZones": ("ZoneSet", {"Zone": "ap-region-1-{i}", "ZoneName": "Zone {i}", "ZoneId": "1000{i}",
+                                  "ZoneState": "AVAILABLE"}, 6, False),
+    "DescribeInstances": ("InstanceSet", {
+        "InstanceId": "ins-{i}", "Uuid": "uuid-{i}", "InstanceName": "vm-{i}", "InstanceType": "S5.MEDIUM4",
+        "InstanceState": "RUNNING", "InstanceChargeType": "POSTPAID_BY_HOUR", "CPU": 2, "Memory": 4,
+        "ImageId": "img-{i}", "OsName": "CentOS 7.9 64bit", "CreatedTime": "2021-01-01T00:00:00Z",
+        "ExpiredTime": None, "Placement": {"Zone": "ap-region-1-1", "ProjectId": 0},
+        "SystemDisk": {"DiskType": "CLOUD_PREMIUM", "DiskId": "disk-{i}", "DiskSize": 50},
+        "DataDisks": [{"DiskType": "CLOUD_PREMIUM", "DiskId": "disk-data-{i}", "DiskSize": 100}],
+        "PrivateIpAddresses": ["10.0.0.{i}"], "PublicIpAddresses": None,
+        "VirtualPrivateCloud": {"VpcId": "vpc-{i}", "SubnetId": "subnet-{i}"},
+        "SecurityGroupIds": ["sg-{i}"], "Tags": [{"Key": "owner", "Value": "bench"}]}, None, True),
+    "DescribeImages": ("ImageSet", {
+        "ImageId": "img-{i}", "OsName": "CentOS 7.{i} 64bit", "ImageType": "PUBLIC_IMAGE",
+        "ImageDescription": "", "CreatedTime": "2021-01-01T00:00:00Z", "ImageSize": 50, "Platform": "CentOS",
+        "ImageState": "NORMAL"}, None, True),
+    "DescribeInstanceTypeConfigs": ("InstanceTypeConfigSet", {
+        "InstanceType": "S5.{i}", "InstanceFamily": "S5", "Zone": "ap-region-1-1", "GPU": 0, "CPU": 2,
+        "Memory": 4}, None, False),
+    "DescribeInstanceVncUrl": ("InstanceVncUrl", "wss://vnc.example/{i}", None, False),
+    "DescribeSecurityGroups": ("SecurityGroupSet", {"SecurityGroupId": "sg-{i}", "SecurityGroupName": "sg-{i}",
+                                                    "SecurityGroupDesc": ""}, None, True),
+    "DescribeVpcs": ("VpcSet", {"VpcId": "vpc-{i}", "VpcName": "vpc-{i}", "CidrBlock": "10.0.0.0/16",
+                                "CreatedTime": "2021-01-01 00:00:00", "TagSet": [], "DnsServerSet": [],
+                                "Ipv6CidrBlock": ""}, None, True),
+    "DescribeSubnets": ("SubnetSet", {"SubnetId": "subnet-{i}", "SubnetName": "subnet-{i}", "VpcId": "vpc-{i}",
+                                      "CidrBlock": "10.0.0.0/24", "Zone": "ap-region-1-1",
+                                      "CreatedTime": "2021-01-01 00:00:00"}, None, True),
+    "DescribeDisks": ("DiskSet", {"DiskId": "disk-{i}", "DiskName": "disk-{i}", "DiskSize": 100,
+                                  "DiskState": "ATTACHED", "DiskType": "CLOUD_PREMIUM", "InstanceId": "ins-{i}",
+                                  "DiskUsage": "DATA_DISK", "CreateTime": "2021-01-01 00:00:00", "Attached": True,
+                                  "DiskChargeType": "POSTPAID_BY_HOUR"}, None, True),
+    "DescribeSnapshots": ("SnapshotSet", {"SnapshotId": "snap-{i}", "SnapshotName": "snap-{i}",
+                                          "SnapshotState": "NORMAL", "DiskId": "disk-{i}", "DiskSize": 100,
+                                          "DiskType": "CLOUD_PREMIUM", "CreateTime": "2021-01-01 00:00:00",
+                                          "DeadlineTime": None}, None, True),
+    "DescribeDiskConfigQuota": ("DiskConfigSet", {"DiskType": "CLOUD_{i}"}, 3, False),
+    "DescribeAccountBalance": ("Balance", 100000, None, False),
+}
+
+
+class TencentCloudSDKException(Exception):
+    def __init__(self, code=None, message=None, requestId=None):
+        super(TencentCloudSDKException, self).__init__(message)
+        self.code = code
+        self.message = message
+        self.requestId = requestId
+
+
+class AbstractModel(object):
+    """
+    Attribute bag like the models of the SDK: responses are built from the decoded JSON
+    """
+
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+    @classmethod
+    def from_json(cls, value):
+        if isinstance(value, dict):
+            return cls(**dict((key, cls.from_json(item)) for key, item in list(value.items())))
+        if isinstance(value, list):
+            return [cls.from_json(item) for item in value]
+        return value
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return None
+
+    def _serialize(self):
+        def serialize(value):
+            if isinstance(value, AbstractModel):
+                return value._serialize()
+            if isinstance(value, list):
+                return [serialize(item) for item in value]
+            return value
+        return dict((key, serialize(value)) for key, value in list(self.__dict__.items()) if value is not None)
+
+    def to_json_string(self, *args, **kwargs):
+        return json.dumps(self._serialize(), *args, **kwargs)
+
+
+class HttpProfile(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class ClientProfile(object):
+    def __init__(self, httpProfile=None, **kwargs):
+        self.httpProfile = httpProfile
+        self.__dict__.update(kwargs)
+
+
+class TencentFakeClient(object):
+    """
+    `Offset`/`Limit` page the sets that page in the real API (default Limit 20, at most 100)
+    """
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+
+    def __init__(self, credential, region, profile=None):
+        self.credential = credential
+        self.region = region
+
+    def __getattr__(self, action):
+        if action not in TENCENT_RECORDS:
+            raise AttributeError(action)
+        set_name, record, count, paged = TENCENT_RECORDS[action]
+
+        def call(request):
+            if not isinstance(record, dict):
+                return AbstractModel.from_json(reply({set_name: record, "RequestId": "fake"}))
+            all_rows = rows(action, record, count)
+            page = all_rows
+            if paged:
+                offset = int(getattr(request, "Offset", None) or 0)
+                limit = min(int(getattr(request, "Limit", None) or self.DEFAULT_LIMIT), self.MAX_LIMIT)
+                page = all_rows[offset:offset + limit]
+            return AbstractModel.from_json(reply({set_name: page, "TotalCount": len(all_rows), "RequestId": "fake"}))
+
+        return call
+
+
+def _models_module(name):
+    """
+    `from <name> import XxxRequest` gets an attribute bag class
+    """
+    module = _module(name)
+    classes = {}
+
+    def __getattr__(attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        if attr not in classes:
+            classes[attr] = type(attr, (AbstractModel,), {})
+        return classes[attr]
+
+    module.__getattr__ = __getattr__
+    module.AbstractModel = AbstractModel
+    return module
+
+
+def install_tencentcloud():
+    class Credential(object):
+        def __init__(self, secret_id, secret_key, token=None):
+            self.secretId = secret_id
+            self.secretKey = secret_key
+
+    _package("tencentcloud")
+    _package("tencentcloud.common")
+    _module("tencentcloud.common.credential", Credential=Credential)
+    _module("tencentcloud.common.abstract_model", AbstractModel=AbstractModel)
+    _package("tencentcloud.common.profile")
+    _module("tencentcloud.common.profile.http_profile", HttpProfile=HttpProfile)
+    _module("tencentcloud.common.profile.client_profile", ClientProfile=ClientProfile)
+    _package("tencentcloud.common.exception")
+    _module("tencentcloud.common.exception.tencent_cloud_sdk_exception",
+            TencentCloudSDKException=TencentCloudSDKException)
+    for service, version, client_class in (("cvm", "v20170312", "CvmClient"), ("vpc", "v20170312", "VpcClient"),
+                                           ("cbs", "v20170312", "CbsClient"),
+                                           ("billing", "v20180709", "BillingClient")):
+        _package("tencentcloud.{}".format(service))
+        _package("tencentcloud.{}.{}".format(service, version))
+        _module("tencentcloud.{}.{}.{}_client".format(service, version, service),
+                **{client_class: type(client_class, (TencentFakeClient,), {})})
+        _models_module("tencentcloud.{}.{}.models".format(service, version))
+
+
+# ---------------------------------------------------------------- googleapiclient (gcp)
+
+GCP_PREFIX = "https://www.googleapis.com/compute/v1/projects/bench"
+GCP_ZONES = ("region-0-a", "region-0-b", "region-1-a")
+GCP_RECORDS = {
+    "regions": ({"id": "{i}", "name": "region-{i}", "status": "UP",
+                 "zones": [GCP_PREFIX + "/zones/region-{i}-a", GCP_PREFIX + "/zones/region-{i}-b"]}, 4),
+    "zones": ({"id": "{i}", "name": "region-1-{i}", "status": "UP", "region": GCP_PREFIX + "/regions/region-1"}, 2),
+    "networks": ({"id": "{i}", "name": "network-{i}", "subnetworks": [GCP_PREFIX + "/subnetworks/subnet-{i}"]},
+                 None),
+    "subnetworks": ({"id": "{i}", "name": "subnet-{i}", "network": GCP_PREFIX + "/networks/network-{i}",
+                     "region": GCP_PREFIX + "/regions/region-1", "ipCidrRange": "10.0.0.0/24"}, None),
+    "machineTypes": ({"id": "{i}", "name": "n1-standard-{i}", "description": "{i} vCPUs, 3.75 GB RAM",
+                      "guestCpus": 1, "memoryMb": 3840}, None),
+    "images": ({"id": "{i}", "name": "centos-7-{i}", "family": "centos-7"}, None),
+    "disks": ({"id": "{i}", "name": "disk-{i}", "sizeGb": "10", "status": "READY"}, None),
+    "diskTypes": ({"id": "{i}", "name": "pd-{i}", "validDiskSize": "10GB-65536GB"}, 4),
+    "instances": ({"id": "{i}", "name": "vm-{i}", "status": "RUNNING", "machineType": "n1-standard-1",
+                   "disks": [{"deviceName": "disk-{i}", "boot": True}]}, None),
+    "firewalls": ({"id": "{i}", "name": "firewall-{i}", "network": GCP_PREFIX + "/networks/network-{i}"}, None),
+}
+
+
+class GCPFakeRequest(object):
+    def __init__(self, func):
+        self.func = func
+
+    def execute(self, *args, **kwargs):
+        return reply(self.func())
+
+
+class GCPFakeCollection(object):
+    """
+    `maxResults`/`pageToken` page `list` (default 500 like the compute API), `get` replies the first row
+    """
+    DEFAULT_MAX_RESULTS = 500
+
+    def __init__(self, name):
+        self.name = name
+        self.record, self.count = GCP_RECORDS[name]
+
+    def _rows(self):
+        return rows("gcp." + self.name, self.record, self.count)
+
+    def list(self, **kwargs):
+        def page():
+            all_rows = self._rows()
+            offset = int(kwargs.get("pageToken") or 0)
+            limit = int(kwargs.get("maxResults") or self.DEFAULT_MAX_RESULTS)
+            payload = {"kind": "compute#list", "items": all_rows[offset:offset + limit]}
+            if offset + limit < len(all_rows):
+                payload["nextPageToken"] = str(offset + limit)
+            return payload
+        return GCPFakeRequest(page)
+
+    def aggregatedList(self, **kwargs):
+        """
+        The rows are spread over the zones of region-0 and region-1, `filter` supports the parenthesized
+        `(field eq "regular expression")` expressions
+        """
+        def page():
+            all_rows = self._rows()
+            for index, row in enumerate(all_rows):
+                row["zone"] = GCP_PREFIX + "/zones/" + GCP_ZONES[index % len(GCP_ZONES)]
+            for field, pattern in re.findall(r'\((\w+) eq "(.*?)"\)', kwargs.get("filter") or ""):
+                all_rows = [row for row in all_rows if re.fullmatch(pattern, str(row.get(field)))]
+            offset = int(kwargs.get("pageToken") or 0)
+            limit = int(kwargs.get("maxResults") or self.DEFAULT_MAX_RESULTS)
+            items = dict(("zones/" + zone, {"warning": {"code": "NO_RESULTS_ON_PAGE"}}) for zone in GCP_ZONES)
+            for row in all_rows[offset:offset + limit]:
+                scoped = items["zones/" + row["zone"].rsplit("/", 1)[-1]]
+                scoped.pop("warning", None)
+                scoped.setdefault(self.name, []).append(row)
+            payload = {"kind": "compute#aggregatedList", "items": items}
+            if offset + limit < len(all_rows):
+                payload["nextPageToken"] = str(offset + limit)
+            return payload
+        return GCPFakeRequest(page)
+
+    def get(self, **kwargs):
+        return GCPFakeRequest(lambda: self._rows()[0])
+
+    getFromFamily = get
+
+
+class GCPFakeService(object):
+    def __getattr__(self, name):
+        if name not in GCP_RECORDS:
+            raise AttributeError(name)
+        return lambda: GCPFakeCollection(name)
+
+
+def install_googleapiclient():
+    class ServiceAccountCredentials(object):
+        @classmethod
+        def from_json_keyfile_dict(cls, keyfile_dict, scopes=None):
+            return cls()
+
+        def authorize(self, http):
+            return http
+
+    class Http(object):
+        def __init__(self, *args, **kwargs):
+            pass
+
+    _package("googleapiclient")
+    _module("googleapiclient.discovery", build=lambda *args, **kwargs: GCPFakeService(),
+            build_from_document=lambda *args, **kwargs: GCPFakeService())
+    # google-api-python-client >= 2.0 ships the discovery documents
+    _module("googleapiclient.discovery_cache",
+            get_static_doc=lambda api, version: json.dumps({"name": api, "version": version, "resources": {},
+                                                            "rootUrl": "https://{}.googleapis.com/".format(api)}))
+    _package("oauth2client")
+    _module("oauth2client.service_account", ServiceAccountCredentials=ServiceAccountCredentials)
+    _module("httplib2", Http=Http)
+
+
+# ---------------------------------------------------------------- pyVmomi (vsphere)
+
+class VSphereFakeVCenter(object):
+    """
+    The VMs of a vCenter and the log of their changes: version N is the state after the first N changes.
+    `fail` property collector calls raise (e.g. the session expired), the sessions opened / closed are counted
+    """
+
+    def __init__(self):
+        self.vms = {}
+        self.changes = []
+        self.fail = 0
+        self.sessions = 0
+        self.disconnects = 0
+
+    def enter(self, mo_id, **properties):
+        self.vms[mo_id] = dict(properties)
+        self.changes.append(("enter", mo_id, dict(properties)))
+
+    def modify(self, mo_id, **properties):
+        self.vms[mo_id].update(properties)
+        self.changes.append(("modify", mo_id, dict(properties)))
+
+    def leave(self, mo_id):
+        del self.vms[mo_id]
+        self.changes.append(("leave", mo_id, {}))
+
+    @staticmethod
+    def _object_update(kind, mo_id, properties):
+        return types.SimpleNamespace(
+            obj=types.SimpleNamespace(_moId=mo_id), kind=kind,
+            changeSet=[types.SimpleNamespace(name=name, op="assign", val=value)
+                       for name, value in list(properties.items())])
+
+    def update_set(self, version, max_updates):
+        """
+        `WaitForUpdatesEx` without waiting: every VM for the empty version, else the changes since `version`
+        """
+        if version == "":
+            updates, end = [("enter", mo_id, properties) for mo_id, properties in list(self.vms.items())], None
+        else:
+            start = int(version)
+            updates = self.changes[start:start + max_updates]
+            end = start + len(updates)
+        if not updates:
+            return None
+        return types.SimpleNamespace(
+            version=str(len(self.changes) if end is None else end),
+            truncated=end is not None and end < len(self.changes),
+            filterSet=[types.SimpleNamespace(objectSet=[self._object_update(*update) for update in updates])])
+
+
+class VSphereFakeCollector(object):
+    def __init__(self, vcenter):
+        self.vcenter = vcenter
+
+    def CreateFilter(self, spec, partial_updates):
+        return types.SimpleNamespace(spec=spec)
+
+    def WaitForUpdatesEx(self, version, options):
+        if self.vcenter.fail:
+            self.vcenter.fail -= 1
+            raise Exception("The session is not authenticated.")
+        return self.vcenter.update_set(version, options.maxObjectUpdates)
+
+    def Destroy(self):
+        pass
+
+
+VSPHERE = {"vcenter": VSphereFakeVCenter()}
+
+
+def install_pyvmomi(vcenter=None):
+    """
+    pyVim / pyVmomi whose sessions connect to `vcenter`
+    """
+    VSPHERE["vcenter"] = vcenter if vcenter is not None else VSphereFakeVCenter()
+
+    class Spec(object):
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+    class InvalidLogin(Exception):
+        pass
+
+    def smart_connect(**kwargs):
+        vcenter = VSPHERE["vcenter"]
+        vcenter.sessions += 1
+        content = types.SimpleNamespace(
+            rootFolder=object(),
+            viewManager=types.SimpleNamespace(
+                CreateContainerView=lambda *args: types.SimpleNamespace(Destroy=lambda: None)),
+            propertyCollector=types.SimpleNamespace(CreatePropertyCollector=lambda: VSphereFakeCollector(vcenter)))
+        return types.SimpleNamespace(RetrieveContent=lambda: content)
+
+    def disconnect(si):
+        VSPHERE["vcenter"].disconnects += 1
+
+    property_collector = types.SimpleNamespace(TraversalSpec=Spec, ObjectSpec=Spec, PropertySpec=Spec,
+                                               FilterSpec=Spec, WaitOptions=Spec, RetrieveOptions=Spec)
+    _package("pyVim")
+    _module("pyVim.connect", SmartConnect=smart_connect, Disconnect=disconnect)
+    _module("pyVmomi",
+            vim=types.SimpleNamespace(VirtualMachine=type("VirtualMachine", (object,), {}),
+                                      view=types.SimpleNamespace(ContainerView=type("ContainerView", (object,), {})),
+                                      fault=types.SimpleNamespace(InvalidLogin=InvalidLogin)),
+            vmodl=types.SimpleNamespace(query=types.SimpleNamespace(PropertyCollector=property_collector)))
+
+
+# ---------------------------------------------------------------- cloudify
+
+def install_cloudify():
+    import logging
+    _package("cloudify")
+    sys.modules["cloudify"].ctx = types.SimpleNamespace(logger=logging.getLogger("cloudify.ctx"))
+
+
+def install(inventory=100, latency=0.0):
+    INVENTORY["rows"] = inventory
+    LATENCY["seconds"] = latency
+    _scaled.clear()
+    install_kscore()
+    install_tencentcloud()
+    install_googleapiclient()
+    if "cloudify" not in sys.modules:
+        try:
+            import cloudify  # noqa: F401
+        except ImportError:
+            install_cloudify()
@@ -0,0 +1,91 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+"""
+Import the query code of `cloudentries` under the package names it has once it is deployed in SmartCMP:
+
+    cloudchef_integration.tasks.cloud_resources.<cloud_type>  ->  cloudentries/<cloud_type>/query
+    cloudchef_integration.tasks.cloud_resources.utils        ->  cloudentries/commoncloud/query/utils.py
+    cloudchef_integration.libs.fc_rest_client                ->  cloudentries/fusioncompute/lifecycles/fc_rest_client
+
+and the lifecycle code under the names it has in the abstract plugin:
+
+    abstract_plugin.platforms.<cloud_type>                   ->  cloudentries/<cloud_type>/lifecycles
+
+The `__init__.py` of the query packages register the resources with the `Platforms` of SmartCMP, the ones of
+the lifecycle packages need cloudify: they are not executed, the benchmarks and tests import the modules directly.
+"""
+
+import importlib
+import importlib.abc
+import importlib.util
+import os
+import sys
+import types
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cloudentries")
+CLOUD_RESOURCES = "cloudchef_integration.tasks.cloud_resources"
+PLATFORMS = "abstract_plugin.platforms"
+NAMESPACES = ("cloudchef_integration", "cloudchef_integration.tasks", CLOUD_RESOURCES, "cloudchef_integration.libs",
+              "abstract_plugin", PLATFORMS)
+ALIASES = {
+    CLOUD_RESOURCES + ".utils": CLOUD_RESOURCES + ".commoncloud.utils"
+}
+
+
+class _AliasLoader(importlib.abc.Loader):
+    def __init__(self, target):
+        self.target = target
+
+    def create_module(self, spec):
+        return importlib.import_module(self.target)
+
+    def exec_module(self, module):
+        pass
+
+
+class _PackageLoader(importlib.abc.Loader):
+    """
+    Package whose `__init__.py` is skipped
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def create_module(self, spec):
+        module = types.ModuleType(spec.name)
+        module.__path__ = [self.path] if self.path else []
+        return module
+
+    def exec_module(self, module):
+        pass
+
+
+class CloudEntriesFinder(importlib.abc.MetaPathFinder):
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname in NAMESPACES:
+            return importlib.util.spec_from_loader(fullname, _PackageLoader(None), is_package=True)
+        if fullname == "cloudchef_integration.libs.fc_rest_client":
+            package_path = os.path.join(ROOT, "fusioncompute", "lifecycles", "fc_rest_client")
+            return importlib.util.spec_from_file_location(fullname, os.path.join(package_path, "__init__.py"),
+                                                          submodule_search_locations=[package_path])
+        if fullname in ALIASES:
+            return importlib.util.spec_from_loader(fullname, _AliasLoader(ALIASES[fullname]))
+        prefix, _, cloud_type = fullname.rpartition(".")
+        package_dir = {CLOUD_RESOURCES: "query", PLATFORMS: "lifecycles"}.get(prefix)
+        if package_dir is not None:
+            package_path = os.path.join(ROOT, cloud_type, package_dir)
+            if os.path.isdir(package_path):
+                return importlib.util.spec_from_loader(fullname, _PackageLoader(package_path), is_package=True)
+        return None
+
+
+def install():
+    if not any(isinstance(finder, CloudEntriesFinder) for finder in sys.meta_path):
+        sys.meta_path.insert(0, CloudEntriesFinder())
+
+
+def resource_class(cloud_type, module, class_name):
+    install()
+    resources = importlib.import_module("{}.{}.{}".format(CLOUD_RESOURCES, cloud_type, module))
+    return getattr(resources, class_name)
@@ -0,0 +1,81 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+"""
+Counters shared by the stand-in servers and the SDK fakes, and the per-method measurement
+"""
+
+import resource
+import threading
+import time
+
+
+class ApiCounter(object):
+    """
+    API calls and bytes (request + response bodies) seen by the stand-ins / fakes
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.bytes = 0
+
+    def count(self, sent=0, received=0):
+        with self._lock:
+            self.calls += 1
+            self.bytes += sent + received
+
+
+api_counter = ApiCounter()
+
+
+def reset_peak_rss():
+    """
+    Linux resets the peak RSS (VmHWM) of the process when "5" is written to clear_refs
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except (IOError, OSError):
+        return False
+
+
+def peak_rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (IOError, OSError):
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(func):
+    """
+    Run `func` once, return its wall time, rows, API calls, bytes and peak RSS.
+    The stand-ins run in this process, so the peak RSS includes the memory of their inventories
+    """
+    api_counter.reset()
+    reset_peak_rss()
+    error = None
+    rows = 0
+    start = time.perf_counter()
+    try:
+        result = func()
+        rows = len(result) if hasattr(result, "__len__") else len(list(result))
+    except Exception as e:
+        error = "{}: {}".format(type(e).__name__, e)
+    wall = time.perf_counter() - start
+    return {
+        "wall_ms": round(wall * 1000, 2),
+        "rows": rows,
+        "api_calls": api_counter.calls,
+        "bytes": api_counter.bytes,
+        "peak_rss_kb": peak_rss_kb(),
+        "error": error
+    }
@@ -0,0 +1,440 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+"""
+Local HTTP stand-ins of the REST APIs queried by ZStack, SmartX, FusionAccess, FusionCompute and UCloud.
+Each serves `inventory` synthetic rows per collection, sleeps `latency` seconds per request
+and replies `page_size` rows at most per page (like the real APIs do)
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from measure import api_counter
+
+
+class StandIn(object):
+    """
+    routes: list of (method, path regex, handler name), the handler is called with
+            (match, query, body) and returns (status, json body[, headers]).
+            A repeated query parameter (e.g. ZStack's `q`) is a list in `query`
+    """
+    routes = []
+    default_page_size = 100
+
+    def __init__(self, inventory=100, latency=0.0, page_size=None):
+        self.inventory = inventory
+        self.latency = latency
+        self.page_size = page_size or self.default_page_size
+        self._rows = {}
+        self._server = None
+        self._compiled = [(method, re.compile(pattern + "$"), name) for method, pattern, name in self.routes]
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def rows(self, kind):
+        if kind not in self._rows:
+            self._rows[kind] = [self.row(kind, index) for index in range(self.inventory)]
+        return self._rows[kind]
+
+    def row(self, kind, index):
+        raise NotImplementedError
+
+    def page(self, rows, offset, limit):
+        limit = min(int(limit or self.page_size), self.page_size)
+        return rows[int(offset or 0):int(offset or 0) + limit]
+
+    def dispatch(self, method, path, query, body):
+        for route_method, pattern, name in self._compiled:
+            match = pattern.match(path)
+            if route_method == method and match:
+                return getattr(self, name)(match, query, body)
+        return 404, {"error": "no stand-in route for {} {}".format(method, path)}
+
+    def start(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body in one segment: no Nagle / delayed ACK stall on keep-alive connections
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw_body = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw_body) if raw_body else {}
+                except ValueError:
+                    body = {}
+                parts = urlsplit(self.path)
+                query = dict((key, values if len(values) > 1 else values[0])
+                             for key, values in list(parse_qs(parts.query).items()))
+                if standin.latency:
+                    time.sleep(standin.latency)
+                reply = standin.dispatch(self.command, parts.path, query, body)
+                status, payload = reply[0], reply[1]
+                headers = reply[2] if len(reply) > 2 else {}
+                data = json.dumps(payload).encode("utf-8")
+                api_counter.count(sent=len(raw_body), received=len(data))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in list(headers.items()):
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class ZStackStandIn(StandIn):
+    """
+    /zstack/v1 query APIs: `start`/`limit`/`replyWithCount` and the `q=` conditions `=`, `?=` (in),
+    `~=` (like) are honoured, other conditions are ignored
+    """
+    condition = re.compile(r"^(?P<field>[\w.]+?)(?P<op>\?=|~=|=)(?P<value>.*)$")
+    default_page_size = 1000
+    routes = [
+        ("PUT", r"/zstack/v1/accounts/login", "login"),
+        ("DELETE", r"/zstack/v1/accounts/sessions/(?P<session>[^/]+)", "logout"),
+        ("GET", r"/zstack/v1/(?P<kind>[a-z0-9/-]+?)(?:/(?P<uuid>[a-z]+-[0-9a-f-]+))?", "query")
+    ]
+
+    def login(self, match, query, body):
+        return 200, {"inventory": {"uuid": "session-0001"}}
+
+    def logout(self, match, query, body):
+        return 200, {}
+
+    def query(self, match, query, body):
+        rows = self.rows(match.group("kind"))
+        if match.group("uuid"):
+            rows = [row for row in rows if row["uuid"] == match.group("uuid")]
+        conditions = query.get("q") or []
+        for condition in conditions if isinstance(conditions, list) else [conditions]:
+            rows = [row for row in rows if self.matches(row, condition)]
+        reply = {"inventories": self.page(rows, query.get("start"), query.get("limit"))}
+        if query.get("replyWithCount") == "true":
+            reply["total"] = len(rows)
+        return 200, reply
+
+    def matches(self, row, condition):
+        parsed = self.condition.match(condition)
+        if not parsed or parsed.group("field") not in row:
+            return True
+        value, expected = str(row[parsed.group("field")]), parsed.group("value")
+        if parsed.group("op") == "?=":
+            return value in expected.split(",")
+        if parsed.group("op") == "~=":
+            return re.match(re.escape(expected).replace("%", ".*").replace("_", ".") + "$", value, re.I) is not None
+        return value == expected
+
+    def row(self, kind, index):
+        return {
+            "uuid": "{}-{:08x}".format(kind.replace("/", "-"), index),
+            "name": "{}-{}".format(kind, index),
+            "description": "",
+            "state": "Running" if kind == "vm-instances" else "Enabled",
+            "status": "Ready",
+            "type": "Root" if index % 2 == 0 else "Data",
+            "platform": "Linux",
+            "createDate": "Jan 1, 2021 12:00:00 AM",
+            "imageUuid": "images-{:08x}".format(index),
+            "rootImageUuid": "images-{:08x}".format(index),
+            "hostUuid": "host-{}".format(index % 8),
+            "vmInstanceUuid": "vm-instances-{:08x}".format(index),
+            "volumeUuid": "volumes-{:08x}".format(index),
+            "volumeType": "Root",
+            "l2NetworkUuid": "l2-networks-vlan-{:08x}".format(index % 16),
+            "memorySize": 4 << 30,
+            "cpuNum": 2,
+            "size": 40 << 30,
+            "diskSize": 100 << 30,
+            "vlan": 100 + index % 3000,
+            "ipVersion": 4,
+            "category": "Private",
+            "dns": [],
+            "hostRoute": [],
+            "networkServices": [],
+            "rules": [],
+            "attachedL3NetworkUuids": [],
+            "ipRanges": [{"networkCidr": "10.{}.0.0/24".format(index % 250)}],
+            "vmNics": [{"ip": "10.0.{}.{}".format(index // 250 % 250, index % 250)}]
+        }
+
+
+class SmartXStandIn(StandIn):
+    """
+    /api/v2 list APIs with `skip`/`count`, /api/v3/sessions
+    """
+    routes = [
+        ("POST", r"/api/v3/sessions", "login"),
+        ("DELETE", r"/api/v3/sessions", "logout"),
+        ("GET", r"/api/v2/(?P<kind>network/vds|storage_policies)", "plain_list"),
+        ("GET", r"/api/v2/(?P<kind>vms|vm_templates|volumes|network/vm_vlans/search)", "paged_list"),
+        ("GET", r"/api/v2/vms/(?P<uuid>[^/]+)", "get_vm")
+    ]
+
+    def login(self, match, query, body):
+        return 200, {"token": "token-0001"}
+
+    def logout(self, match, query, body):
+        return 200, {}
+
+    def plain_list(self, match, query, body):
+        return 200, {"ec": "EOK", "data": self.rows(match.group("kind"))}
+
+    def paged_list(self, match, query, body):
+        rows = self.rows(match.group("kind"))
+        return 200, {"ec": "EOK", "data": {"entities": self.page(rows, query.get("skip"), query.get("count")),
+                                           "total": len(rows)}}
+
+    def get_vm(self, match, query, body):
+        return 200, {"ec": "EOK", "data": self.row("vms", 0)}
+
+    def row(self, kind, index):
+        uuid = "{}-{:08x}".format(kind.replace("/", "-"), index)
+        return {
+            "uuid": uuid,
+            "name": "{}-{}".format(kind, index),
+            "vm_name": "vm-{}".format(index),
+            "description": "",
+            "status": "running",
+            "type": "KVM",
+            "vcpu": 2,
+            "cpu": {"topology": {"cores": 2}},
+            "cpu_model": "cluster_default",
+            "memory": 4 << 30,
+            "create_time": 1609459200,
+            "created_time": 1609459200,
+            "node_ip": "192.168.0.{}".format(index % 250),
+            "guest_info": {"os_version": "CentOS Linux 7"},
+            "nics": [{"ip_address": "10.0.{}.{}".format(index // 250 % 250, index % 250)}],
+            "disks": [{"volume_uuid": "volumes-{:08x}".format(index), "name": "1", "size_in_byte": 40 << 30}],
+            "size_in_byte": 40 << 30,
+            "resource_state": "in-use",
+            "read_only": False,
+            "datastores": [],
+            "storage_pool_id": "system",
+            "vlan_id": 100 + index % 3000,
+            "vds_uuid": "network-vds-{:08x}".format(index % 4),
+            "bond_mode": "active-backup",
+            "bond_name": "bond0",
+            "hosts_associated": [],
+            "hosts_initialized": [],
+            "vlans_count": 1,
+            "usage": "VM"
+        }
+
+
+class FusionAccessStandIn(StandIn):
+    """
+    /services/ita APIs, every list is replied in one response (FusionAccess does not page)
+    """
+    SET_NAMES = {
+        "describeSites": "sites",
+        "describeClusters": "clusters",
+        "describeInstancesInfo": "instancesInfoList",
+        "describeTemplatesInfo": "templateInfoList",
+        "describeDatastoreInfo": "datastoreList",
+        "describeSecurityGroups": "securityGroups",
+        "describePortGroups": "portGroups"
+    }
+    routes = [
+        ("POST", r"/services/ita/login", "login"),
+        ("POST", r"/services/ita/(?P<action>\w+)", "describe")
+    ]
+
+    def login(self, match, query, body):
+        return 200, {"resultCode": 0}, {"X-Auth-Token": "token-0001"}
+
+    def describe(self, match, query, body):
+        action = match.group("action")
+        if action not in self.SET_NAMES:
+            return 404, {"resultCode": 1}
+        return 200, {"resultCode": 0, self.SET_NAMES[action]: self.rows(action)}
+
+    def row(self, kind, index):
+        return {
+            "siteId": "site-{}".format(index),
+            "clusterId": "cluster-{}".format(index % 8),
+            "name": "{}-{}".format(kind, index),
+            "vmId": "vm-{:08x}".format(index),
+            "computerName": "desktop-{}".format(index),
+            "instanceState": "running",
+            "osPlatform": 1,
+            "VCpu": 2,
+            "cores": 2,
+            "memory": 4096,
+            "createTime": "2021-01-01 00:00:00",
+            "ip": "10.0.{}.{}".format(index // 250 % 250, index % 250),
+            "systemDisk": "40",
+            "templateId": "template-{}".format(index % 16),
+            "templateName": "template-{}".format(index % 16),
+            "diskList": [],
+            "nicList": [],
+            "datastoreIdList": [],
+            "datastoreId": "datastore-{}".format(index),
+            "sgId": "sg-{}".format(index),
+            "sgName": "sg-{}".format(index),
+            "sgDesc": "",
+            "rules": [],
+            "portGroupId": "portgroup-{}".format(index),
+            "portGroupName": "portgroup-{}".format(index),
+            "dvSwitchId": "dvswitch-{}".format(index % 4),
+            "description": "",
+            "vlanId": 100 + index % 3000
+        }
+
+
+class FusionComputeStandIn(StandIn):
+    """
+    /service REST APIs, `limit`/`offset` with `total` for the lists
+    """
+    routes = [
+        ("POST", r"/service/session", "login"),
+        ("DELETE", r"/service/session", "logout"),
+        ("GET", r"/service/sites", "sites"),
+        ("GET", r"/service/sites/(?P<site>\d+)/dvswitchs/(?P<dvswitch>\d+)/portgroups", "portgroups"),
+        ("GET", r"/service/sites/(?P<site>\d+)/(?P<kind>hosts|vms|securitygroups|dvswitchs|volumes)", "list")
+    ]
+    SET_NAMES = {
+        "hosts": "hosts",
+        "vms": "vms",
+        "securitygroups": "securityGroups",
+        "dvswitchs": "dvSwitchs",
+        "volumes": "volumes",
+        "portgroups": "portGroups"
+    }
+
+    def login(self, match, query, body):
+        return 200, {}, {"X-Auth-Token": "token-0001"}
+
+    def logout(self, match, query, body):
+        return 200, {}
+
+    def sites(self, match, query, body):
+        return 200, {"sites": [{"urn": "urn:sites:1", "name": "site-1"}]}
+
+    def portgroups(self, match, query, body):
+        return 200, {"portGroups": self.page(self.rows("portgroups"), query.get("offset"), query.get("limit"))}
+
+    def list(self, match, query, body):
+        kind = match.group("kind")
+        rows = self.rows(kind)
+        if kind == "vms":
+            rows = [row for row in rows if str(row["isTemplate"]).lower() == str(query.get("isTemplate", False)).lower()]
+        return 200, {self.SET_NAMES[kind]: self.page(rows, query.get("offset"), query.get("limit")),
+                     "total": len(rows)}
+
+    def row(self, kind, index):
+        return {
+            "urn": "urn:sites:1:{}:{}".format(kind, index),
+            "name": "{}-{}".format(kind, index),
+            "status": "running",
+            "isTemplate": index % 10 == 0,
+            "osOptions": {"osType": "Linux"},
+            "vmConfig": {"nics": [{"ip": "10.0.{}.{}".format(index // 250 % 250, index % 250)}], "disks": []}
+        }
+
+
+class UCloudStandIn(StandIn):
+    """
+    `/?Action=...` APIs with `Offset`/`Limit` and `TotalCount`, the signature is not checked
+    """
+    default_page_size = 100
+    SET_NAMES = {
+        "GetRegion": "Regions",
+        "DescribeImage": "ImageSet",
+        "DescribeUHostInstance": "UHostSet",
+        "DescribeUDisk": "DataSet",
+        "DescribeUDiskSnapshot": "DataSet",
+        "DescribeEIP": "EIPSet",
+        "DescribeFirewall": "DataSet",
+        "DescribeSubnet": "DataSet",
+        "DescribeVPC": "DataSet"
+    }
+    routes = [
+        ("GET", r"/", "action")
+    ]
+
+    def action(self, match, query, body):
+        action = query.get("Action")
+        if action not in self.SET_NAMES:
+            return 200, {"RetCode": 160, "Message": "Missing Action"}
+        rows = self.rows(action)
+        return 200, {"RetCode": 0, "Action": action + "Response", "TotalCount": len(rows),
+                     self.SET_NAMES[action]: self.page(rows, query.get("Offset"), query.get("Limit") or 20)}
+
+    def row(self, kind, index):
+        return {
+            "Region": "cn-sh2",
+            "RegionName": "cn-sh2",
+            "RegionId": 1,
+            "Zone": "cn-sh2-0{}".format(index % 3 + 1),
+            "IsDefault": index == 0,
+            "UHostId": "uhost-{:08x}".format(index),
+            "UDiskId": "bsm-{:08x}".format(index),
+            "ImageId": "uimage-{:08x}".format(index),
+            "ImageName": "CentOS 7.{}".format(index % 10),
+            "ImageType": "Base",
+            "ImageSize": 20,
+            "OsType": "Linux",
+            "OsName": "CentOS 7.9 64位",
+            "FWId": "firewall-{:08x}".format(index),
+            "SubnetId": "subnet-{:08x}".format(index),
+            "Subnet": "10.{}.{}.0".format(index // 250 % 250, index % 250),
+            "VPCId": "uvnet-{:08x}".format(index % 16),
+            "EIPId": "eip-{:08x}".format(index),
+            "Name": "{}-{}".format(kind, index),
+            "UHostName": "uhost-{}".format(index),
+            "State": "Running",
+            "Status": "Available",
+            "CPU": 2,
+            "Memory": 4096,
+            "CreateTime": 1609459200,
+            "ExpireTime": 1924992000,
+            "Size": 40,
+            "DiskType": "DataDisk",
+            "Tag": "Default",
+            "IPSet": [{"IP": "10.0.{}.{}".format(index // 250 % 250, index % 250), "Type": "Private"}],
+            "DiskSet": [],
+            "Rule": [],
+            "Network": ["10.{}.0.0/16".format(index % 250)],
+            "EIPAddr": [{"IP": "106.75.0.{}".format(index % 250)}]
+        }
@@ -0,0 +1,169 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import os
+import random
+import threading
+import time
+
+from abstract_plugin.platforms.common.clients import client_key
+
+# the waits are batched only if BATCH_POLLING is set: a poller merges the waits of one process, and the agents
+# run each operation in its own process unless the workflow runs its operations as threads of one worker
+BATCH_POLLING_ENABLED = os.environ.get('BATCH_POLLING', '').lower() in ('1', 'true', 'yes')
+# a poll due in `delay` seconds may be sent up to SLACK * delay earlier, to join the batch of other waiters
+SLACK = 0.5
+# the polling thread exits after this many idle seconds, the next poll starts a new one
+IDLE_SECONDS = 60
+
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+def backoff_intervals(maximum, first=2, factor=1.5, jitter=0):
+    """
+    Seconds between the polls of a wait: fast at first (a resource is often ready quickly), then `maximum`
+    jitter: `Optional`; each interval is spread by +/- this fraction, the waits started together drift apart
+    """
+    interval = min(first, maximum)
+    while True:
+        yield interval * random.uniform(1 - jitter, 1 + jitter) if jitter else interval
+        interval = min(interval * factor, maximum)
+
+
+class _PollRequest(object):
+    __slots__ = ("resource_id", "due", "slack", "done", "resource", "error")
+
+    def __init__(self, resource_id, delay):
+        self.resource_id = resource_id
+        self.due = time.time() + delay
+        self.slack = delay * SLACK
+        self.done = threading.Event()
+        self.resource = None
+        self.error = None
+
+
+class PollTimeout(Exception):
+    pass
+
+
+class Poller(object):
+    """
+    Describes the resource of each poll in the thread of the wait, after `delay` seconds:
+
+        vm = poller.poll(instance_id, delay=next(intervals))
+
+    describe: `Required`; function(list of ids) -> {id: resource}
+    """
+
+    def __init__(self, describe):
+        self.describe = describe
+
+    def poll(self, resource_id, delay=0, timeout=None):
+        """
+        The resource (None if the API does not return it) described `delay` seconds from now
+        timeout: `Optional`; seconds left to the deadline of the wait, PollTimeout is raised if the poll is due
+        after them
+        """
+        if timeout is not None and delay > timeout:
+            time.sleep(max(timeout, 0))
+            raise PollTimeout("Polling {} timed out after {:.1f} seconds".format(resource_id, timeout))
+        if delay > 0:
+            time.sleep(delay)
+        return self.describe([resource_id]).get(resource_id)
+
+
+class BatchPoller(object):
+    """
+    Coalesces the concurrent waits on the resources of one kind and account (e.g. 50 VMs of a scale workflow
+    whose operations run as threads of one worker process) into batched describe calls, sent by one polling
+    thread. It only merges the waits of its own process, see BATCH_POLLING_ENABLED; the interface is the one of
+    `Poller`
+
+    describe: `Required`; function(list of ids) -> {id: resource}, it must not need the operation's `ctx`
+    max_batch: `Optional`; ids per describe call, 1 when the API filters one id only
+    """
+
+    def __init__(self, describe, max_batch=100):
+        self.describe = describe
+        self.max_batch = max_batch
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def poll(self, resource_id, delay=0, timeout=None):
+        """
+        The resource (None if the API does not return it) described `delay` seconds from now at the latest
+        timeout: `Optional`; seconds left to the deadline of the wait, PollTimeout is raised once they elapse
+        (e.g. the describe calls of the batch hang)
+        """
+        request = _PollRequest(resource_id, delay)
+        with self._cond:
+            self._pending.append(request)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="batch-poller")
+                self._thread.daemon = True
+                self._thread.start()
+            self._cond.notify()
+        if not request.done.wait(timeout):
+            with self._cond:
+                if request in self._pending:
+                    self._pending.remove(request)
+            raise PollTimeout("Polling {} timed out after {:.1f} seconds".format(resource_id, timeout))
+        if request.error is not None:
+            raise request.error
+        return request.resource
+
+    def _next_batch(self):
+        with self._cond:
+            while True:
+                if not self._pending:
+                    if not self._cond.wait(IDLE_SECONDS) and not self._pending:
+                        self._thread = None
+                        return None
+                    continue
+                now = time.time()
+                first_due = min(request.due for request in self._pending)
+                if first_due > now:
+                    self._cond.wait(first_due - now)
+                    continue
+                batch = [request for request in self._pending if request.due - request.slack <= now]
+                self._pending = [request for request in self._pending if request.due - request.slack > now]
+                return batch
+
+    def _describe(self, resource_ids):
+        resources = {}
+        for start in range(0, len(resource_ids), self.max_batch):
+            resources.update(self.describe(resource_ids[start:start + self.max_batch]))
+        return resources
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            resource_ids = list(dict.fromkeys(request.resource_id for request in batch))
+            try:
+                resources, error = self._describe(resource_ids), None
+            except Exception as e:
+                resources, error = {}, e
+            for request in batch:
+                request.resource = resources.get(request.resource_id)
+                request.error = error
+                request.done.set()
+
+
+def batch_poller(kind, region, domain, access_key_id, secret, describe, max_batch=100):
+    """
+    The poller shared by the waits on the `kind` resources (e.g. "ksyun-instance") of one region and account,
+    keyed like the clients (`client_key`): a rotated secret gets a new poller. `describe` of the first waiter is
+    used by all of them, it must only depend on the region and the account.
+    Unless BATCH_POLLING is set, a `Poller` of the wait's own `describe`: no thread, no shared queue
+    """
+    if not BATCH_POLLING_ENABLED:
+        return Poller(describe)
+    key = client_key(kind, region, domain, access_key_id, secret)
+    with _pollers_lock:
+        poller = _pollers.get(key)
+        if poller is None:
+            poller = _pollers[key] = BatchPoller(describe, max_batch)
+        return poller
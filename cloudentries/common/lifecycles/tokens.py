@@ -0,0 +1,113 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+
+DEFAULT_TOKEN_TTL = 20 * 60
+# tokens are renewed this many seconds before the platform would expire them
+EXPIRY_MARGIN = 30
+
+logger = logging.getLogger(__name__)
+
+
+class TokenExpired(Exception):
+    """
+    Raised by a request sent with a token which the cloud platform does not accept anymore (e.g. HTTP 401)
+    """
+    pass
+
+
+def token_key(endpoint, username, password):
+    """
+    Tokens are shared per (endpoint, user), the password digest keeps a changed password from reusing a token
+    """
+    return endpoint, username, hashlib.sha256((password or "").encode('utf-8')).hexdigest()
+
+
+class _Token(object):
+    __slots__ = ("value", "expires_at", "release")
+
+    def __init__(self, value, expires_at, release):
+        self.value = value
+        self.expires_at = expires_at
+        self.release = release
+
+    def valid(self):
+        return self.expires_at > time.time()
+
+
+class TokenBroker(object):
+    """
+    Thread-safe cache of login tokens with expiry, refresh-on-`TokenExpired` and release at shutdown.
+    Concurrent callers of the same key wait for a single login instead of logging in one by one
+    """
+
+    def __init__(self, margin=EXPIRY_MARGIN):
+        self.margin = margin
+        self._tokens = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key, login, ttl=DEFAULT_TOKEN_TTL, release=None):
+        """
+        login: `Required`; function returning a new token
+        release: `Optional`; function(token) which logs the token out
+        """
+        token = self._tokens.get(key)
+        if token is not None and token.valid():
+            return token.value
+        with self._key_lock(key):
+            token = self._tokens.get(key)
+            if token is not None and token.valid():
+                return token.value
+            if token is not None:
+                self._release(token)
+            value = login()
+            self._tokens[key] = _Token(value, time.time() + max(ttl - self.margin, 0), release)
+            return value
+
+    def invalidate(self, key, value=None):
+        """
+        Forget the token of `key` (only if it is still `value` when given), the platform rejected it already
+        """
+        with self._key_lock(key):
+            token = self._tokens.get(key)
+            if token is not None and (value is None or token.value == value):
+                del self._tokens[key]
+
+    def call(self, key, login, func, ttl=DEFAULT_TOKEN_TTL, release=None):
+        """
+        func(token): send the request, raise `TokenExpired` to have it sent once more with a new token
+        """
+        value = self.get(key, login, ttl, release)
+        try:
+            return func(value)
+        except TokenExpired:
+            self.invalidate(key, value)
+            return func(self.get(key, login, ttl, release))
+
+    def release_all(self):
+        with self._lock:
+            tokens, self._tokens = self._tokens, {}
+        for token in list(tokens.values()):
+            self._release(token)
+
+    @staticmethod
+    def _release(token):
+        if not token.release:
+            return
+        try:
+            token.release(token.value)
+        except Exception as e:
+            logger.warning("Release token failed, the error message is {0}".format(e))
+
+
+token_broker = TokenBroker()
+atexit.register(token_broker.release_all)
@@ -0,0 +1,96 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+DEFAULT_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE') or 10)
+DEFAULT_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES') or 3)
+DEFAULT_BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR') or 0.5)
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (float(os.environ.get('HTTP_CONNECT_TIMEOUT') or 15),
+                   float(os.environ.get('HTTP_READ_TIMEOUT') or 600))
+# the methods retried after a read error or a 502/503/504: the read-only ones, a request that changes the
+# appliance (ZStack sends its logins, VM actions and resizes as PUT) may have been applied already.
+# A connect error is retried for every method, the request was not sent
+RETRY_METHODS = frozenset(['HEAD', 'GET', 'OPTIONS'])
+RETRY_STATUS = (502, 503, 504)
+
+
+def _retry(max_retries, backoff_factor):
+    kwargs = dict(total=max_retries, connect=max_retries, read=max_retries, status=max_retries,
+                  backoff_factor=backoff_factor, status_forcelist=RETRY_STATUS, raise_on_status=False)
+    try:
+        return Retry(allowed_methods=RETRY_METHODS, **kwargs)
+    except TypeError:  # urllib3 < 1.26
+        return Retry(method_whitelist=RETRY_METHODS, **kwargs)
+
+
+class HttpTransport(object):
+    """
+    Keep-alive `requests.Session` per (scheme, host, port), shared by every client of the process.
+    The sessions never store cookies: the same appliance is queried with the credentials of many tenants
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR, timeout=DEFAULT_TIMEOUT):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url):
+        parts = urlsplit(url)
+        return parts.scheme, parts.hostname, parts.port
+
+    def _new_session(self):
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                              max_retries=_retry(self.max_retries, self.backoff_factor))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def session(self, url):
+        key = self.host_key(url)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._sessions[key] = self._new_session()
+        return session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session(url).request(method.upper(), url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('get', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('post', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('put', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('delete', url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in list(sessions.values()):
+            session.close()
+
+
+transport = HttpTransport()
@@ -0,0 +1,280 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import copy
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# the query cache is off unless QUERY_CACHE is set: a cached result may be up to its TTL old
+QUERY_CACHE_ENABLED = os.environ.get('QUERY_CACHE', '').lower() in ('1', 'true', 'yes')
+# seconds, by resource method name; methods which are not listed are not cached. Only the catalogue of the
+# cloud is listed: the lifecycle operations run in the agents, they cannot invalidate the cache of this process,
+# and `validation` must see a changed password or a revoked key at once
+DEFAULT_TTLS = {
+    "region": 6 * 3600,
+    "zone": 6 * 3600,
+    "family": 6 * 3600,
+    "line": 6 * 3600,
+    "resource_limit": 6 * 3600,
+    "security_group_templates": 6 * 3600,
+    "image": 1800,
+    "flavor": 1800,
+    "volume_type": 1800,
+    "storage_policy": 1800
+}
+
+DEFAULT_MAX_SIZE = 1024
+# the disk cache is pruned down to this fraction of its size limit, the next sets do not list it again
+DISK_PRUNE_RATIO = 0.9
+
+
+def hash_params(params):
+    """
+    Stable digest of connection / query params, the secrets never appear in the cache keys
+    """
+    normalized = json.dumps(params or {}, sort_keys=True, default=str)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class MemoryBackend(object):
+    """
+    In-process LRU, bounded by `max_size` entries
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry[1])
+
+    def set(self, key, value, ttl):
+        """
+        Return the number of evicted entries
+        """
+        entry = (time.time() + ttl, copy.deepcopy(value))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def invalidate(self, match):
+        with self._lock:
+            keys = [key for key in self._entries if match(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskBackend(object):
+    """
+    One pickle file per entry under `cache_dir`, shared by the processes of one host.
+    The entries are counted by the sets of the process, the directory is listed once the count goes above
+    `max_size`: the least recently read files are evicted down to DISK_PRUNE_RATIO * `max_size` and the count
+    is the number of files left (the other processes write the same directory)
+    """
+    SUFFIX = ".qcache"
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE * 8):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._count = None
+        self._lock = threading.Lock()
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + self.SUFFIX)
+
+    def _files(self):
+        return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                if name.endswith(self.SUFFIX)]
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, key):
+        path = self._path(key)
+        entry = self._load(path)
+        if entry is None or entry[1] != key:
+            return None
+        if entry[0] < time.time():
+            self._remove(path)
+            return None
+        os.utime(path, None)
+        return entry[2]
+
+    def set(self, key, value, ttl):
+        path = self._path(key)
+        tmp_path = "{}.{}.{}".format(path, os.getpid(), threading.get_ident())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((time.time() + ttl, key, value), f, pickle.HIGHEST_PROTOCOL)
+        added = not os.path.exists(path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._count is None:
+                self._count = len(self._files())
+            elif added:
+                self._count += 1
+            if self._count <= self.max_size:
+                return 0
+            files = self._files()
+            files.sort(key=self._mtime)
+            evicted = files[:max(len(files) - int(self.max_size * DISK_PRUNE_RATIO), 0)]
+            for file_path in evicted:
+                self._remove(file_path)
+            self._count = len(files) - len(evicted)
+            return len(evicted)
+
+    def invalidate(self, match):
+        invalidated = 0
+        files = self._files()
+        for path in files:
+            entry = self._load(path)
+            if entry is None or match(entry[1]):
+                self._remove(path)
+                invalidated += 1
+        with self._lock:
+            self._count = len(files) - invalidated
+        return invalidated
+
+    def __len__(self):
+        return len(self._files())
+
+
+class QueryCache(object):
+    """
+    TTL cache of resource query results in front of `support_getattr`.
+    keys: (cloudentry_id, hash of connection params, method name, hash of query_params)
+    """
+
+    def __init__(self, backend=None, ttls=None, enabled=True):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.enabled = enabled
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+    @staticmethod
+    def make_key(cloudentry_id, connect_params, method, query_params):
+        return cloudentry_id, hash_params(connect_params), method, hash_params(query_params)
+
+    def ttl(self, method, overrides=None):
+        if overrides and method in overrides:
+            return overrides[method]
+        return self.ttls.get(method, 0)
+
+    def _count(self, method, counter, increment=1):
+        with self._stats_lock:
+            method_stats = self._stats.setdefault(method, {"hits": 0, "misses": 0, "evictions": 0})
+            method_stats[counter] += increment
+
+    def get_or_call(self, key, func, ttl):
+        method = key[2]
+        if not self.enabled or ttl <= 0:
+            return func()
+        value = self.backend.get(key)
+        if value is not None:
+            self._count(method, "hits")
+            return value
+        self._count(method, "misses")
+        value = func()
+        evicted = self.backend.set(key, value, ttl)
+        if evicted:
+            self._count(method, "evictions", evicted)
+        return value
+
+    def invalidate(self, cloudentry_id=None, connect_params=None, method=None):
+        """
+        Drop the entries matching every given argument, e.g. after a lifecycle operation changed the resources
+        """
+        credential_hash = hash_params(connect_params) if connect_params is not None else None
+
+        def match(key):
+            return (cloudentry_id is None or key[0] == cloudentry_id) and \
+                (credential_hash is None or key[1] == credential_hash) and \
+                (method is None or key[2] == method)
+
+        return self.backend.invalidate(match)
+
+    def stats(self):
+        """
+        Hit/miss counters per method, `hits` is the number of cloud API calls saved
+        """
+        with self._stats_lock:
+            by_method = copy.deepcopy(self._stats)
+        total = {"hits": 0, "misses": 0, "evictions": 0}
+        for method_stats in list(by_method.values()):
+            for counter, count in list(method_stats.items()):
+                total[counter] += count
+        total.update({"size": len(self.backend), "methods": by_method})
+        return total
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {}
+
+
+def _default_backend():
+    max_size = int(os.environ.get('QUERY_CACHE_SIZE') or DEFAULT_MAX_SIZE)
+    cache_dir = os.environ.get('QUERY_CACHE_DIR')
+    if cache_dir:
+        return DiskBackend(cache_dir, max_size=max_size)
+    return MemoryBackend(max_size=max_size)
+
+
+query_cache = QueryCache(backend=_default_backend(), enabled=QUERY_CACHE_ENABLED)
+
+
+def configure_query_cache(backend=None, ttls=None, enabled=None):
+    """
+    Replace the backend, TTLs or the switch of the process-wide `query_cache`
+    """
+    if backend is not None:
+        query_cache.backend = backend
+    if ttls:
+        query_cache.ttls.update(ttls)
+    if enabled is not None:
+        query_cache.enabled = enabled
+    return query_cache
@@ -0,0 +1,81 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_CLIENTS = int(os.environ.get('SDK_CLIENT_CACHE_SIZE', 64))
+
+
+def client_key(service, region, domain, access_key_id, secret_access_key):
+    """
+    Clients are shared per (service, region, domain, access key), the secret digest keeps a rotated secret
+    from reusing a client
+    """
+    return (service, region, domain, access_key_id,
+            hashlib.sha256((secret_access_key or "").encode('utf-8')).hexdigest())
+
+
+class ClientCache(object):
+    """
+    Process-wide LRU of cloud SDK clients, bounded by `max_size` clients.
+    Building a client loads the service models and endpoint resolvers of the SDK, the clients themselves
+    are thread-safe and are reused by every caller with the same key
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_CLIENTS):
+        self.max_size = max_size
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self._building = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, factory):
+        """
+        The client of `key`, built by `factory()` once: concurrent callers of a missing key wait for that build
+        """
+        with self._lock:
+            if key in self._clients:
+                self._clients.move_to_end(key)
+                self.hits += 1
+                return self._clients[key]
+            self.misses += 1
+            build_lock = self._building.setdefault(key, threading.Lock())
+        with build_lock:
+            with self._lock:
+                if key in self._clients:
+                    return self._clients[key]
+            client = factory()
+            with self._lock:
+                self._clients[key] = client
+                self._building.pop(key, None)
+                while len(self._clients) > self.max_size:
+                    self._clients.popitem(last=False)
+                    self.evictions += 1
+            return client
+
+    def discard(self, key):
+        with self._lock:
+            self._clients.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self):
+        """
+        Pool statistics: clients held, lookups served by a pooled client (hits) or which built it (misses, with
+        the callers which waited for that build), clients evicted by the LRU
+        """
+        with self._lock:
+            return {"size": len(self._clients), "max_size": self.max_size, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
+
+    def __len__(self):
+        return len(self._clients)
+
+
+client_cache = ClientCache()
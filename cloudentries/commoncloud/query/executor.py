@@ -0,0 +1,186 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import asyncio
+import copy
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import hash_params
+from .utils import find_resource_class
+
+DEFAULT_MAX_WORKERS = int(os.environ.get('QUERY_EXECUTOR_WORKERS') or 8)
+
+_local = threading.local()
+
+
+class SubQueryMemo(object):
+    """
+    Results of the client calls made during one batch, e.g. `describe_availability_zone` is sent once
+    for both `zone` and `flavor`. Concurrent callers of the same call wait for the first one
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_or_call(self, key, func):
+        with self._lock:
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = {"done": threading.Event()}
+        if owner:
+            try:
+                value = func()
+            except Exception as e:
+                entry["error"] = e
+                entry["done"].set()
+                raise
+            # lazy results (generators) can be consumed once only, they are not shared
+            entry["shared"] = isinstance(value, (list, tuple, dict))
+            entry["value"] = copy.deepcopy(value) if entry["shared"] else None
+            entry["done"].set()
+            return value
+        entry["done"].wait()
+        if "error" in entry:
+            raise entry["error"]
+        if not entry["shared"]:
+            return func()
+        return copy.deepcopy(entry["value"])
+
+
+def current_memo():
+    """
+    `SubQueryMemo` of the batch running in this thread, None outside of a batch
+    """
+    return getattr(_local, "memo", None)
+
+
+def memoize_call(client, func_name, converted_params, func):
+    """
+    Used by `convert_params`: share the result of a client call between the queries of a batch.
+    The calls of the same client class, region and account (`client.memo_key`, built by `clients.client_key`) are
+    shared, the clients without a `memo_key` are not memoized: the region / account may be in their state only
+    """
+    memo = current_memo()
+    memo_key = getattr(client, "memo_key", None)
+    if memo is None or memo_key is None:
+        return func()
+    key = (type(client).__module__, type(client).__name__, memo_key, func_name, hash_params(converted_params))
+    return memo.get_or_call(key, func)
+
+
+def fan_out(func, items, max_workers=DEFAULT_MAX_WORKERS, limiter=None):
+    """
+    [func(item) for item in items], called concurrently by `max_workers` threads, in the order of `items`.
+    The first error is raised. The calls join the batch (`memoize_call`) of the calling thread
+    limiter: `Optional`; `ratelimit.RateLimiter` acquired before each call
+    """
+    items = list(items)
+
+    def limited(item):
+        if limiter is not None:
+            limiter.acquire()
+        return func(item)
+
+    if len(items) <= 1 or max_workers <= 1:
+        return [limited(item) for item in items]
+    memo = current_memo()
+
+    def call(item):
+        _local.memo = memo
+        try:
+            return limited(item)
+        finally:
+            _local.memo = None
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(call, items))
+
+
+class QueryExecutor(object):
+    """
+    Run the queries of one cloud entry concurrently in a bounded thread pool:
+
+        QueryExecutor(KsyunResource, connect_params).run([("zone", {"region": "cn-beijing-6"}),
+                                                          ("flavor", {"region": "cn-beijing-6"})])
+        => {"zone": {"result": [...], "error": None}, "flavor": {"result": [...], "error": None}}
+
+    queries: list of (resource_type, query_params), or dict of {label: (resource_type, query_params)}
+    Identical queries run once, the client calls they share run once per batch
+    """
+
+    def __init__(self, resource_class, connect_params, max_workers=DEFAULT_MAX_WORKERS):
+        self.resource_class = resource_class
+        self.connect_params = connect_params
+        self.max_workers = max_workers
+
+    @staticmethod
+    def _labelled(queries):
+        if isinstance(queries, dict):
+            return list(queries.items())
+        labelled = []
+        for resource_type, query_params in queries:
+            if resource_type in [label for label, _ in labelled]:
+                raise Exception("resource type: {} is queried more than once, "
+                                "label the queries with a dict instead".format(resource_type))
+            labelled.append((resource_type, (resource_type, query_params)))
+        return labelled
+
+    def _query(self, memo, resource_type, query_params):
+        _local.memo = memo
+        try:
+            # the resources modify their connect / query params
+            resource = self.resource_class(copy.deepcopy(self.connect_params), copy.deepcopy(query_params or {}))
+            result = getattr(resource, resource_type)
+            # lazy results are materialized in the pool, a method may also return None
+            return list(result or []) if not isinstance(result, (list, dict)) else result
+        finally:
+            _local.memo = None
+
+    def _submit_all(self, pool, labelled):
+        memo = SubQueryMemo()
+        futures = {}
+        for _, (resource_type, query_params) in labelled:
+            key = (resource_type, hash_params(query_params))
+            if key not in futures:
+                futures[key] = pool.submit(self._query, memo, resource_type, query_params)
+        return [(label, futures[(resource_type, hash_params(query_params))])
+                for label, (resource_type, query_params) in labelled]
+
+    @staticmethod
+    def _outcome(future):
+        try:
+            return {"result": copy.deepcopy(future.result()), "error": None}
+        except Exception as e:
+            return {"result": None, "error": e}
+
+    def run(self, queries):
+        labelled = self._labelled(queries)
+        with ThreadPoolExecutor(max_workers=max(min(self.max_workers, len(labelled)), 1)) as pool:
+            futures = self._submit_all(pool, labelled)
+            return dict((label, self._outcome(future)) for label, future in futures)
+
+    async def arun(self, queries):
+        """
+        asyncio flavour of `run`, the SDKs are blocking so the queries still run in the thread pool
+        """
+        labelled = self._labelled(queries)
+        pool = ThreadPoolExecutor(max_workers=max(min(self.max_workers, len(labelled)), 1))
+        try:
+            futures = self._submit_all(pool, labelled)
+            await asyncio.gather(*[asyncio.wrap_future(future) for _, future in futures], return_exceptions=True)
+            return dict((label, self._outcome(future)) for label, future in futures)
+        finally:
+            pool.shutdown(wait=False)
+
+
+def batch_query(cloudentry_id, connect_params, queries, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    `QueryExecutor.run` with the resource class registered for `cloudentry_id`
+    """
+    resource_class = find_resource_class(cloudentry_id)
+    if resource_class is None:
+        raise Exception("no resource class is registered for cloudentry: {}".format(cloudentry_id))
+    return QueryExecutor(resource_class, connect_params, max_workers).run(queries)
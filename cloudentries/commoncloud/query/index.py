@@ -0,0 +1,89 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .cache import hash_params
+
+DEFAULT_INDEX_TTL = int(os.environ.get('RESOURCE_INDEX_TTL', 1800))
+DEFAULT_MAX_SCOPES = 256
+
+
+def index_scope(name, connect_params):
+    """
+    One index per (name, account / region): e.g. ("ksyun-image-os", hash of the connection params)
+    """
+    return name, hash_params(connect_params)
+
+
+class ResourceIndex(object):
+    """
+    Resource id -> value maps (e.g. image id -> operating system) used to join a resource list with another one,
+    refreshed per id: only the ids which are missing or expired are fetched from the cloud API.
+    Ids the API does not know (e.g. a deleted image) are indexed as None and not fetched again before `ttl`
+    """
+
+    def __init__(self, ttl=DEFAULT_INDEX_TTL, max_scopes=DEFAULT_MAX_SCOPES, enabled=True):
+        self.ttl = ttl
+        self.max_scopes = max_scopes
+        self.enabled = enabled
+        self._scopes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entries(self, scope):
+        entries = self._scopes.get(scope)
+        if entries is None:
+            entries = self._scopes[scope] = {}
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        self._scopes.move_to_end(scope)
+        return entries
+
+    def lookup(self, scope, ids, fetch):
+        """
+        Values of `ids` in `scope`
+        fetch: function(missing ids) -> {id: value}, called once for all the ids missing from the index
+        """
+        ids = [resource_id for resource_id in OrderedDict.fromkeys(ids) if resource_id]
+        if not self.enabled:
+            fetched = fetch(ids) if ids else {}
+            return dict((resource_id, fetched.get(resource_id)) for resource_id in ids)
+        now = time.time()
+        found = {}
+        with self._lock:
+            entries = self._entries(scope)
+            for resource_id in ids:
+                entry = entries.get(resource_id)
+                if entry is not None and entry[0] > now:
+                    found[resource_id] = entry[1]
+        missing = [resource_id for resource_id in ids if resource_id not in found]
+        if missing:
+            fetched = fetch(missing)
+            self.update(scope, fetched)
+            self.update(scope, dict((resource_id, None) for resource_id in missing if resource_id not in fetched))
+            found.update((resource_id, fetched.get(resource_id)) for resource_id in missing)
+        return found
+
+    def update(self, scope, values):
+        """
+        Index `values` ({id: value}), e.g. with the rows of a full listing
+        """
+        if not self.enabled or not values:
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            entries = self._entries(scope)
+            for resource_id, value in list(values.items()):
+                entries[resource_id] = (expires_at, value)
+
+    def invalidate(self, scope=None):
+        with self._lock:
+            if scope is None:
+                self._scopes.clear()
+            else:
+                self._scopes.pop(scope, None)
+
+
+resource_index = ResourceIndex(enabled=os.environ.get('RESOURCE_INDEX_DISABLED', '').lower() not in ('1', 'true', 'yes'))
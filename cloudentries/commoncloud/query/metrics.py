@@ -0,0 +1,226 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+from .utils import resource_cloudentry_id
+
+# stages recorded by the decorators of `params` and `response`:
+#   params:     `common_params` / `convert_params` validate & convert the query params
+#   request:    the cloud API call of a `convert_response` method (each page when streamed)
+#   conversion: `resp_convert_schema` of `convert_response`
+#   filter:     each `filter_output`
+#   validation: `common_response` projects the rows on the response schema
+STAGES = ("params", "request", "conversion", "filter", "validation")
+
+_local = threading.local()
+_cloudentry_ids = {}
+
+
+def cloudentry_id_of(owner):
+    cls = type(owner)
+    if cls not in _cloudentry_ids:
+        _cloudentry_ids[cls] = resource_cloudentry_id(cls)
+    return _cloudentry_ids[cls]
+
+
+def count_rows(value):
+    """
+    Number of rows of a list / tuple, None for a raw response or a (lazy) iterable
+    """
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    return None
+
+
+def payload_size(value):
+    """
+    Approximate size in bytes of a raw response, as it would be serialized by the cloud API
+    """
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if hasattr(value, 'to_json_string'):
+        return len(value.to_json_string())
+    if isinstance(value, (dict, list, tuple)):
+        return len(json.dumps(value, default=str))
+    return None
+
+
+class Span(object):
+    """
+    Times one stage. `seconds` is the wall time of the stage, `self_seconds` excludes the stages nested in it
+    (e.g. the page requests pulled by the validation of a streamed response) and the instrumentation itself
+    """
+    __slots__ = ("recorder", "stage", "cloudentry_id", "method", "name", "rows_in", "rows_out", "payload",
+                 "_start", "_children")
+
+    def __init__(self, recorder, stage, owner, method, name=None):
+        self.recorder = recorder
+        self.stage = stage
+        self.cloudentry_id = cloudentry_id_of(owner)
+        self.method = method
+        self.name = name
+        self.rows_in = None
+        self.rows_out = None
+        self.payload = None
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self._children = 0.0
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end = time.perf_counter()
+        seconds = end - self._start
+        size = payload_size(self.payload) if self.payload is not None else None
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1]._children += time.perf_counter() - self._start
+        self.recorder.record({
+            "cloudentry_id": self.cloudentry_id,
+            "method": self.method,
+            "stage": self.stage,
+            "name": self.name,
+            "seconds": seconds,
+            "self_seconds": max(seconds - self._children, 0.0),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "bytes": size,
+            "error": exc_type.__name__ if exc_type else None
+        })
+        return False
+
+
+class NullRecorder(object):
+    """
+    Default: the decorators check `enabled` and skip the instrumentation
+    """
+    enabled = False
+
+    def record(self, observation):
+        pass
+
+    def flush(self):
+        pass
+
+
+class JsonLinesRecorder(object):
+    """
+    One JSON object per stage, written to `stream` or appended to the file `path`
+    """
+    enabled = True
+
+    def __init__(self, stream=None, path=None):
+        self.path = path
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def record(self, observation):
+        line = json.dumps(dict(observation, ts=round(time.time(), 6))) + "\n"
+        with self._lock:
+            if self.path:
+                with open(self.path, "a") as f:
+                    f.write(line)
+            else:
+                (self.stream or sys.stderr).write(line)
+
+    def flush(self):
+        if self.stream:
+            self.stream.flush()
+
+
+class PrometheusRecorder(object):
+    """
+    Counters by (cloudentry_id, method, stage) in the Prometheus text format, see `render`.
+    With `path` the text is (re)written there by `flush` and at exit, e.g. for the textfile collector
+    """
+    enabled = True
+    PREFIX = "cloudentries_query_stage"
+    COUNTERS = (
+        ("calls_total", "Number of times the stage ran"),
+        ("errors_total", "Number of times the stage raised"),
+        ("seconds_total", "Seconds spent in the stage, nested stages excluded"),
+        ("rows_in_total", "Rows received by the stage"),
+        ("rows_out_total", "Rows returned by the stage"),
+        ("bytes_total", "Approximate bytes of the raw responses")
+    )
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def record(self, observation):
+        key = (observation["cloudentry_id"], observation["method"], observation["stage"])
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = dict((name, 0) for name, _ in self.COUNTERS)
+            series["calls_total"] += 1
+            series["errors_total"] += 1 if observation["error"] else 0
+            series["seconds_total"] += observation["self_seconds"]
+            series["rows_in_total"] += observation["rows_in"] or 0
+            series["rows_out_total"] += observation["rows_out"] or 0
+            series["bytes_total"] += observation["bytes"] or 0
+
+    @staticmethod
+    def _escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def render(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        lines = []
+        for name, description in self.COUNTERS:
+            metric = "{}_{}".format(self.PREFIX, name)
+            lines.append("# HELP {} {}".format(metric, description))
+            lines.append("# TYPE {} counter".format(metric))
+            for (cloudentry_id, method, stage), values in series:
+                lines.append('{}{{cloudentry_id="{}",method="{}",stage="{}"}} {}'.format(
+                    metric, self._escape(cloudentry_id), self._escape(method), stage, values[name]))
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def flush(self):
+        if self.path:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(self.render())
+            os.rename(tmp_path, self.path)
+
+
+def _default_recorder():
+    exporter = os.environ.get('QUERY_METRICS', '').lower()
+    path = os.environ.get('QUERY_METRICS_FILE') or None
+    if exporter == 'jsonl':
+        return JsonLinesRecorder(path=path)
+    if exporter == 'prometheus':
+        return PrometheusRecorder(path=path)
+    return NullRecorder()
+
+
+recorder = _default_recorder()
+atexit.register(lambda: recorder.flush())
+
+
+def configure_metrics(new_recorder=None):
+    """
+    Replace the process-wide recorder (None: back to the no-op recorder), returns the recorder in use
+    """
+    global recorder
+    recorder = new_recorder if new_recorder is not None else NullRecorder()
+    return recorder
@@ -0,0 +1,151 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import os
+from abc import ABCMeta, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PAGE_SIZE = 100
+# pages requested ahead of the consumer once the total count is known, 1 disables the prefetch
+DEFAULT_PREFETCH = int(os.environ.get('PAGINATOR_PREFETCH') or 4)
+
+
+class Paginator(metaclass=ABCMeta):
+    """
+    Iterating a paginator yields the rows as the pages arrive
+    """
+
+    @abstractmethod
+    def pages(self):
+        """
+        Each page (list of rows) in order, requested as the consumer goes
+        """
+
+    def __iter__(self):
+        for page in self.pages():
+            for row in page:
+                yield row
+
+    def all(self):
+        return list(self)
+
+
+class OffsetPaginator(Paginator):
+    """
+    offset/limit style, e.g. Tencent `Offset`/`Limit` + `TotalCount`, ZStack `start`/`limit` + `total`.
+    The offset moves by the rows returned, a server may cap its pages below `limit`: the pages are read until
+    the total, or until an empty page if the API does not count
+    fetch: `Required`; function(offset, limit) returning (rows, total), total is None if the API does not count
+    prefetch: `Optional`; once the total is known, the next pages are requested concurrently (their stride is
+              the size of the first page), `fetch` must be thread-safe unless it is 1
+    """
+
+    def __init__(self, fetch, limit=DEFAULT_PAGE_SIZE, start=0, prefetch=DEFAULT_PREFETCH):
+        self.fetch = fetch
+        self.limit = limit
+        self.start = start
+        self.prefetch = prefetch
+
+    def pages(self):
+        rows, total = self.fetch(self.start, self.limit)
+        yield rows
+        offset = self.start + len(rows)
+        if rows and total is not None and self.prefetch > 1:
+            stride = len(rows)
+            for page_offset, rows, total in self._prefetched_pages(offset, stride, total):
+                if rows:
+                    yield rows
+                offset = page_offset + len(rows)
+                if len(rows) < stride:
+                    # a short page (the last one, or rows were deleted): the next ones are read one by one
+                    break
+        # the total is checked on every page, rows may be added while paging
+        while rows and (total is None or offset < total):
+            rows, total = self.fetch(offset, self.limit)
+            if rows:
+                yield rows
+                offset += len(rows)
+
+    def _prefetched_pages(self, offset, stride, total):
+        offsets = iter(range(offset, total, stride))
+        pool = ThreadPoolExecutor(max_workers=self.prefetch)
+        pending = deque()
+        try:
+            for offset in offsets:
+                pending.append((offset, pool.submit(self.fetch, offset, self.limit)))
+                if len(pending) >= self.prefetch:
+                    break
+            while pending:
+                offset, future = pending.popleft()
+                rows, page_total = future.result()
+                next_offset = next(offsets, None)
+                if next_offset is not None:
+                    pending.append((next_offset, pool.submit(self.fetch, next_offset, self.limit)))
+                yield offset, rows, page_total
+        finally:
+            # the consumer stopped early: the requests which did not start are dropped
+            for _, future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+
+class TokenPaginator(Paginator):
+    """
+    marker / NextToken / pageToken style, the pages are requested one by one
+    fetch: `Required`; function(token) returning (rows, next token), token is None for the first page
+    prefetch: `Optional`; the next page is requested as soon as its token arrives, while the consumer
+              processes the current page
+    """
+
+    def __init__(self, fetch, token=None, prefetch=False):
+        self.fetch = fetch
+        self.token = token
+        self.prefetch = prefetch
+
+    def pages(self):
+        if self.prefetch:
+            for rows in self._prefetched_pages():
+                yield rows
+            return
+        token = self.token
+        seen = set()
+        while True:
+            rows, token = self.fetch(token)
+            yield rows
+            # some APIs echo the last token instead of an empty one
+            if not token or token in seen:
+                break
+            seen.add(token)
+
+    def _prefetched_pages(self):
+        pool = ThreadPoolExecutor(max_workers=1)
+        seen = set()
+        future = pool.submit(self.fetch, self.token)
+        try:
+            while future is not None:
+                rows, token = future.result()
+                future = None
+                if token and token not in seen:
+                    seen.add(token)
+                    future = pool.submit(self.fetch, token)
+                yield rows
+        finally:
+            if future is not None:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+
+PAGINATORS = {
+    "offset": OffsetPaginator,
+    "marker": TokenPaginator,
+    "token": TokenPaginator
+}
+
+
+def paginate(style, fetch, **options):
+    """
+    Paginator of `style` ("offset" | "marker" | "token"), see `OffsetPaginator` / `TokenPaginator` for `fetch`
+    """
+    if style not in PAGINATORS:
+        raise Exception("the pagination style should in: {}, but the given is: {}".format(list(PAGINATORS), style))
+    return PAGINATORS[style](fetch, **options)
@@ -2,6 +2,9 @@
 
 from functools import wraps
 from .utils import ParamType, BasicSchema, CommonValidate
+from .schema import compile_schema
+from .executor import memoize_call
+from . import metrics
 
 
 class CommonCloudParams(CommonValidate):
@@ -10,14 +13,7 @@ class CommonCloudParams(CommonValidate):
         super(CommonCloudParams, self).__init__(raw_params)
 
     def params(self, param_format):
-        validated_params = {}
-        for param_key, param_schema in list(param_format.items()):
-            param_value = self.param_value(param_key)
-            self.validate_required(param_schema, param_key, param_value)
-            self.validate_type(param_schema, param_key, param_value)
-            self.validate_allow_values(param_schema, param_key, param_value)
-            validated_params.update({param_key: param_value})
-        return validated_params
+        return compile_schema(param_format).validate_params(self.raw_params)
 
 
 def common_params(param_schema, validate_method=CommonCloudParams):
@@ -26,10 +22,17 @@ def common_params(param_schema, validate_method=CommonCloudParams):
                      whether match `param_schema` or not
     """
 
+    compile_schema(param_schema)  # compiled once at import time
+
     def validate_params(func):
         @wraps(func)
         def wrapper(self):
-            converted_params = validate_method(self.query_params).params(param_schema)
+            recorder = metrics.recorder
+            if not recorder.enabled:
+                converted_params = validate_method(self.query_params).params(param_schema)
+            else:
+                with metrics.Span(recorder, "params", self, func.__name__):
+                    converted_params = validate_method(self.query_params).params(param_schema)
             self.params = converted_params
             return func(self)
 
@@ -44,19 +47,7 @@ class ConvertParams(CommonValidate):
         super(ConvertParams, self).__init__(raw_params)
 
     def convert(self, param_format):
-        converted_params = {}
-        for converted_key, param_schema in list(param_format.items()):
-            param_value = self.fixed_value(converted_key, param_schema)
-            if not param_value:
-                _raw_key = self.raw_key(param_schema)
-                param_value = self.param_value(param_schema)
-                self.validate_required(param_schema, _raw_key, param_value, "Convert Param")
-                self.validate_type(param_schema, _raw_key, param_value, "Convert Param")
-                self.validate_allow_values(param_schema, _raw_key, param_value, "Convert Param")
-                param_value = self.filter_param(converted_key, param_schema)
-            if param_value:  # remove params with empty value
-                converted_params.update(param_value)
-        return converted_params
+        return compile_schema(param_format).convert_params(self.raw_params)
 
     def raw_key(self, param_schema):
         return param_schema.get("raw_key")
@@ -101,11 +92,19 @@ def convert_params(param_schema, convert_method=ConvertParams):
                     to match each cloud platform's param format
     """
 
+    compile_schema(param_schema)  # compiled once at import time
+
     def validate_params(func):
         @wraps(func)
         def wrapper(self, params=None):
-            converted_params = convert_method(params).convert(param_schema)
-            return func(self, converted_params)
+            recorder = metrics.recorder
+            if not recorder.enabled:
+                converted_params = convert_method(params).convert(param_schema)
+            else:
+                with metrics.Span(recorder, "params", self, func.__name__):
+                    converted_params = convert_method(params).convert(param_schema)
+            # within a `QueryExecutor` batch, identical calls are sent once
+            return memoize_call(self, func.__name__, converted_params, lambda: func(self, converted_params))
 
         return wrapper
 
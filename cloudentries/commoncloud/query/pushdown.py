@@ -0,0 +1,67 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+# more ids than this are filtered client-side: the request (e.g. its query string) would grow too long
+MAX_PUSHED_VALUES = 100
+
+
+class Pushdown(object):
+    """
+    Server-side form of one `FilterResponse` filter of a provider
+    to_request: function(query_params) -> query params understood by the provider's param schema,
+                or None when the filter cannot be pushed for these query params
+    exact: `Optional`; the cloud API applies exactly the predicate of the filter, otherwise it only narrows
+           the result and the filter still runs client-side (on far fewer rows)
+    """
+
+    def __init__(self, to_request, exact=True):
+        self.to_request = to_request
+        self.exact = exact
+
+
+class FilterPlanner(object):
+    """
+    Pushes the filters of a resource method into its request, keeps the others client-side:
+
+        @filter_output(FilterResponse.filter_resource)
+        def instance(self):
+            params = planner.plan(self, 'instance', FilterResponse.filter_resource)
+            return Client(...).describe_instances(params)
+
+    `filter_output` skips the filters recorded in `resource.pushed_filters[method]`
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+
+    def plan(self, resource, method, *filters):
+        request_params = dict(resource.query_params or {})
+        pushed = set()
+        for flt in filters:
+            name = getattr(flt, '__name__', flt)
+            rule = self.rules.get(name)
+            if rule is None:
+                continue
+            params = rule.to_request(resource.query_params or {})
+            if params is None:
+                continue
+            for key, value in list(params.items()):
+                if isinstance(value, list) and isinstance(request_params.get(key), list):
+                    request_params[key] = request_params[key] + value
+                else:
+                    request_params[key] = value
+            if rule.exact:
+                pushed.add(name)
+        if not hasattr(resource, 'pushed_filters'):
+            resource.pushed_filters = {}
+        resource.pushed_filters[method] = pushed
+        return request_params
+
+
+def split_values(value, limit=MAX_PUSHED_VALUES):
+    """
+    Values of a comma separated query param, None when there are none or too many to push
+    """
+    values = [item for item in (value or "").split(',') if item]
+    if not values or len(values) > limit:
+        return None
+    return values
@@ -0,0 +1,45 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import threading
+import time
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class RateLimiter(object):
+    """
+    Token bucket: `rate` calls per second on average, up to `burst` calls at once.
+    `acquire` reserves a token and sleeps until it is due, callers are served in order
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+def rate_limiter(key, rate, burst=None):
+    """
+    The limiter shared by the callers of `key`, e.g. ("ksyun", access key, region): the API quotas of a
+    cloud platform apply per account, not per resource query
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = RateLimiter(rate, burst)
+        return limiter
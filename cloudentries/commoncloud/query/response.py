@@ -2,6 +2,8 @@
 
 from functools import wraps
 from .utils import BasicSchema, ParamType, CommonValidate
+from .schema import compile_schema
+from . import metrics
 
 
 class CommonCloudResponse(CommonValidate):
@@ -10,19 +12,7 @@ class CommonCloudResponse(CommonValidate):
         super(CommonCloudResponse, self).__init__(raw_resp)
 
     def response(self, resp_format):
-        _resp = []
-        for resp in self.raw_params:
-            each_resp = {}
-            for param_key, param_schema in list(resp_format[0].items()):
-                param_value = resp.get(param_key) if resp.get(param_key) else ""
-                self.validate_required(param_schema, param_key, param_value, "Response")
-                self.validate_type(param_schema, param_key, param_value, "Response")
-                if param_value:  # value 为空时，不返回对应key
-                    each_resp.update({
-                        param_key: param_value
-                    })
-            _resp.append(each_resp)
-        return _resp
+        return compile_schema(resp_format).project(self.raw_params)
 
 
 def common_response(response_schema, validate_method=CommonCloudResponse):
@@ -31,11 +21,19 @@ def common_response(response_schema, validate_method=CommonCloudResponse):
                      whether match `response_schema` or not
     """
 
+    compile_schema(response_schema)  # compiled once at import time
+
     def validate_resp(func):
         @wraps(func)
         def wrapper(self):
             resp = func(self)
-            _response = validate_method(resp).response(response_schema)
+            recorder = metrics.recorder
+            if not recorder.enabled:
+                return validate_method(resp).response(response_schema)
+            with metrics.Span(recorder, "validation", self, func.__name__) as span:
+                span.rows_in = metrics.count_rows(resp)
+                _response = validate_method(resp).response(response_schema)
+                span.rows_out = metrics.count_rows(_response)
             return _response
 
         return wrapper
@@ -44,6 +42,15 @@ def common_response(response_schema, validate_method=CommonCloudResponse):
 
 
 class FilterResponse(object):
+    """
+    Each filter returns a list for a list, and stays lazy when the response is streamed (see `convert_response`)
+    """
+
+    @staticmethod
+    def select(resp, predicate):
+        if isinstance(resp, (list, tuple)):
+            return [dct for dct in resp if predicate(dct)]
+        return (dct for dct in resp if predicate(dct))
 
     @classmethod
     def filter_resource(cls, params, resp):
@@ -52,12 +59,8 @@ class FilterResponse(object):
         """
         if not params.get('resource_id'):
             return resp
-        aim = []
         resource_ids = params.get('resource_id').split(',')
-        for dct in resp:
-            if dct['Id'] in resource_ids:
-                aim.append(dct)
-        return aim
+        return cls.select(resp, lambda dct: dct['Id'] in resource_ids)
 
     @classmethod
     def filter_image_name(cls, params, resp):
@@ -67,11 +70,8 @@ class FilterResponse(object):
         pattern_image_name = params.get('patternImageName')
         if not pattern_image_name:
             return resp
-        aim = []
-        for dct in resp:
-            if pattern_image_name.lower() in dct['Name'].lower():
-                aim.append(dct)
-        return aim
+        pattern_image_name = pattern_image_name.lower()
+        return cls.select(resp, lambda dct: pattern_image_name in dct['Name'].lower())
 
     @classmethod
     def filter_flavor(cls, params, resp):
@@ -81,17 +81,17 @@ class FilterResponse(object):
         is_filter = params.get('matchCpuAndMemory')
         if (not is_filter) or str(is_filter).lower() != "true":
             return resp
-        aim = []
         _cpu = params.get('cpu')
         _mem = params.get('memory')
-        for dct in resp:
-            cpu, mem = str(dct['CPU']), str(dct['Memory'])
-            if _cpu and cpu != str(_cpu):
-                continue
-            if _mem and mem != str(_mem):
-                continue
-            aim.append(dct)
-        return aim
+
+        def match(dct):
+            if _cpu and str(dct['CPU']) != str(_cpu):
+                return False
+            if _mem and str(dct['Memory']) != str(_mem):
+                return False
+            return True
+
+        return cls.select(resp, match)
 
     @classmethod
     def filter_os_type(cls, params, resp):
@@ -101,41 +101,90 @@ class FilterResponse(object):
         os_type = params.get('osType')
         if (not os_type) or (not resp):
             return resp
-        linux_images, windows_images = [], []
-        for image in resp:
-            if 'windows' in image.get('Platform', '').lower():
-                windows_images.append(image)
-            else:
-                linux_images.append(image)
-        return windows_images if os_type.lower() == 'windows' else linux_images
+        want_windows = os_type.lower() == 'windows'
+        return cls.select(resp, lambda image: ('windows' in image.get('Platform', '').lower()) == want_windows)
 
 
-def convert_response(resp_convert_schema):
+def convert_response(resp_convert_schema, stream=False):
     """
     Decorate class `BasicClient`'s method, and convert each cloud platform's response according to `resp_convert_schema`
+    stream: `Optional`; the method returns an iterable of raw pages instead of one response, each page is converted
+            when it is consumed so that only one raw page is kept in memory. `filter_output` stays lazy and
+            `common_response` is the boundary that materializes the list returned to CMP, resources which
+            opt in must keep their connection open until then (e.g. `yield from` inside the `with` block)
     """
 
     def validate_response(func):
         @wraps(func)
         def wrapper(self, params=None):
-            resp = func(self, params)
-            return resp_convert_schema(resp)
+            recorder = metrics.recorder
+            if not recorder.enabled:
+                resp = func(self, params)
+                if stream:
+                    return iter_converted(resp, resp_convert_schema)
+                return resp_convert_schema(resp)
+            if stream:
+                return iter_converted_recorded(recorder, self, func.__name__, func(self, params),
+                                               resp_convert_schema)
+            with metrics.Span(recorder, "request", self, func.__name__) as span:
+                resp = func(self, params)
+                span.payload = resp
+            with metrics.Span(recorder, "conversion", self, func.__name__) as span:
+                span.rows_in = metrics.count_rows(resp)
+                converted = resp_convert_schema(resp)
+                span.rows_out = metrics.count_rows(converted)
+            return converted
 
         return wrapper
 
     return validate_response
 
 
+def iter_converted(pages, resp_convert_schema):
+    for page in pages:
+        for row in resp_convert_schema(page):
+            yield row
+
+
+def iter_converted_recorded(recorder, owner, method, pages, resp_convert_schema):
+    """
+    `iter_converted` recording the request and the conversion of each page
+    """
+    pages = iter(pages)
+    while True:
+        with metrics.Span(recorder, "request", owner, method) as span:
+            page = next(pages, None)
+            span.payload = page
+        if page is None:
+            return
+        with metrics.Span(recorder, "conversion", owner, method) as span:
+            span.rows_in = metrics.count_rows(page)
+            rows = resp_convert_schema(page)
+            span.rows_out = metrics.count_rows(rows)
+        for row in rows:
+            yield row
+
+
 def filter_output(validate_method):
     """
     Decorate class `BasicClient`'s method, and filter response's resource
+    The filter is skipped when the request applied it already (see `pushdown.FilterPlanner`)
     """
 
     def validate_response(func):
         @wraps(func)
         def wrapper(self):
             resp = func(self)
-            return validate_method(self.query_params, resp)
+            if validate_method.__name__ in getattr(self, 'pushed_filters', {}).get(func.__name__, ()):
+                return resp
+            recorder = metrics.recorder
+            if not recorder.enabled:
+                return validate_method(self.query_params, resp)
+            with metrics.Span(recorder, "filter", self, func.__name__, name=validate_method.__name__) as span:
+                span.rows_in = metrics.count_rows(resp)
+                filtered = validate_method(self.query_params, resp)
+                span.rows_out = metrics.count_rows(filtered)
+            return filtered
 
         return wrapper
 
@@ -0,0 +1,147 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import builtins
+import threading
+from .utils import ValidatException
+
+
+class CompiledField(object):
+    """
+    One entry of a `BasicSchema.schema(...)` dict, with every lookup done once
+    """
+    __slots__ = ("key", "raw_key", "required", "type_name", "expected_type", "allow_values", "filter_key", "value")
+
+    def __init__(self, key, param_schema):
+        self.key = key
+        self.raw_key = param_schema.get("raw_key")
+        self.required = bool(param_schema.get("required"))
+        self.type_name = param_schema.get("type") or None
+        self.expected_type = self._resolve_type(self.type_name)
+        self.allow_values = param_schema.get("allow_values") or None
+        self.filter_key = param_schema.get("filter_key")
+        self.value = param_schema.get("value")
+
+    @staticmethod
+    def _resolve_type(type_name):
+        """
+        `ParamType` values are the names of python builtins, compare the classes instead of `type(x).__name__`
+        """
+        if not type_name:
+            return None
+        expected_type = getattr(builtins, type_name, None)
+        return expected_type if isinstance(expected_type, type) else type_name
+
+    def check(self, param_key, param_value, handle_type="Param"):
+        """
+        Same rules & messages as `CommonValidate.validate_required/validate_type/validate_allow_values`
+        """
+        if not param_value:
+            if self.required:
+                err_msg = "param `{}` is required, but received is empty".format(param_key)
+                raise ValidatException(param_key, handle_type, err_msg)
+            return
+        self.check_type(param_key, param_value, handle_type)
+        if self.allow_values and (param_value not in self.allow_values):
+            err_msg = "the allow values of: {} should in: {}, but the given is: {}".format(param_key,
+                                                                                           self.allow_values,
+                                                                                           param_value)
+            raise ValidatException(param_key, handle_type, err_msg)
+
+    def check_type(self, param_key, param_value, handle_type):
+        value_type = type(param_value)
+        if self.expected_type is not None and value_type is not self.expected_type and \
+                value_type.__name__ != self.type_name:
+            err_msg = "the type of: {} should be: {}, but the given is: {}".format(param_key, self.type_name,
+                                                                                   value_type)
+            raise ValidatException(param_key, handle_type, err_msg)
+
+
+class CompiledSchema(object):
+    """
+    Specialized validator/projector of a `Schema` dict (or the `[{...}]` form used by responses)
+    """
+
+    def __init__(self, schema):
+        if isinstance(schema, (list, tuple)):
+            schema = schema[0] if schema else {}
+        self.fields = tuple(CompiledField(key, param_schema) for key, param_schema in list(schema.items()))
+        # (key, required, expected_type, field) tuples keep the per-row loop free of attribute lookups
+        self._row_fields = tuple((field.key, field.required, field.expected_type, field) for field in self.fields)
+
+    def validate_params(self, raw_params, handle_type="Param"):
+        """
+        Equal to `CommonCloudParams.params`
+        """
+        validated_params = {}
+        if not self.fields:
+            return validated_params
+        get = raw_params.get
+        for field in self.fields:
+            param_value = get(field.key, "")
+            field.check(field.key, param_value, handle_type)
+            validated_params[field.key] = param_value
+        return validated_params
+
+    def convert_params(self, raw_params, handle_type="Convert Param"):
+        """
+        Equal to `ConvertParams.convert`
+        """
+        converted_params = {}
+        if not self.fields:
+            return converted_params
+        get = raw_params.get
+        for field in self.fields:
+            if field.value:
+                converted_params[field.key] = field.value
+                continue
+            param_value = get(field.raw_key, "")
+            field.check(field.raw_key, param_value, handle_type)
+            if not field.filter_key:
+                if param_value:  # remove params with empty value
+                    converted_params[field.key] = param_value
+                continue
+            param_value = param_value if param_value else get('resource_id')
+            if param_value:
+                for index, resource_id in enumerate(param_value.split(',')):
+                    converted_params["{}.{}".format(field.filter_key, index)] = resource_id
+        return converted_params
+
+    def project(self, rows, handle_type="Response"):
+        """
+        Equal to `CommonCloudResponse.response`: validate each row and keep the non-empty schema keys only
+        """
+        projected = []
+        append = projected.append
+        row_fields = self._row_fields
+        for row in rows:
+            get = row.get
+            each_resp = {}
+            for key, required, expected_type, field in row_fields:
+                param_value = get(key)
+                if param_value:  # value 为空时，不返回对应key
+                    if expected_type is not None and type(param_value) is not expected_type:
+                        field.check_type(key, param_value, handle_type)
+                    each_resp[key] = param_value
+                elif required:
+                    field.check(key, "", handle_type)
+            append(each_resp)
+        return projected
+
+
+_compiled_schemas = {}
+_compile_lock = threading.Lock()
+
+
+def compile_schema(schema):
+    """
+    Return the cached `CompiledSchema` of `schema`.
+    Schemas are class attributes defined once at import, so they are cached by identity
+    """
+    cached = _compiled_schemas.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+    with _compile_lock:
+        compiled = CompiledSchema(schema)
+        # keep a reference to `schema` so that its id can not be reused by another object
+        _compiled_schemas[id(schema)] = (schema, compiled)
+    return compiled
@@ -1,9 +1,15 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
 from functools import wraps
+import copy
 import datetime
 import re
+import sys
 from .constants import InstanceStatusMapper, PowerStatusMapper
+from .cache import query_cache
+
+# every class decorated with `support_getattr`, see `find_resource_class`
+_resource_classes = []
 
 
 class ParamType(object):
@@ -93,21 +99,70 @@ class CommonValidate(object):
 def support_getattr(cls):
     """
     In order to be compatible with the old method of CommonCloud Resource Query method
+    The results are served from `query_cache` within the TTL of each method,
+    `cache_ttls` on the resource class overrides the default TTLs (0 disables the cache for a method)
     """
 
     class wrapper():
         def __init__(self, *args, **kwargs):
+            query_params = args[1] if len(args) > 1 else kwargs.get('query_params')
+            # snapshots before the resource (or its query methods) modify the params, e.g. the default region:
+            # the cache keys of the wrapper stay the ones of the params it was created with
+            self._query_params = copy.deepcopy(query_params)
+            self._connect_params = copy.deepcopy(
+                args[0] if args else kwargs.get('connect_params', kwargs.get('connection_params')))
             self.wrapped = cls(*args, **kwargs)
 
-        def __getattr__(self, name):
+        def _call(self, name):
+            attr = getattr(self.wrapped, name)
+            if not callable(attr):  # property: already evaluated
+                return attr
             try:
-                return getattr(self.wrapped, name)()
+                return attr()
             except TypeError as e:
                 if "not callable" in str(e):
-                    return getattr(self.wrapped, name)
+                    return attr
+
+        def _cache_key(self, name):
+            return query_cache.make_key(resource_cloudentry_id(cls), self._connect_params, name, self._query_params)
+
+        def __getattr__(self, name):
+            if name.startswith('__'):
+                raise AttributeError(name)
+            ttl = query_cache.ttl(name, getattr(cls, 'cache_ttls', None))
+            if ttl <= 0 or not query_cache.enabled:
+                return self._call(name)
+            return query_cache.get_or_call(self._cache_key(name), lambda: self._call(name), ttl)
+
+        def invalidate_query_cache(self, name=None):
+            return query_cache.invalidate(resource_cloudentry_id(cls), self._connect_params, name)
+
+    wrapper.wrapped_class = cls
+    _resource_classes.append(wrapper)
     return wrapper
 
 
+def find_resource_class(cloudentry_id):
+    """
+    The (wrapped) resource class registered with `Platforms` for `cloudentry_id`
+    """
+    for resource_class in _resource_classes:
+        if resource_cloudentry_id(resource_class.wrapped_class) == cloudentry_id:
+            return resource_class
+    return None
+
+
+def resource_cloudentry_id(cls):
+    """
+    `cloudentry_id` of the resource class, or the one registered in its package's `__init__.py`
+    """
+    cloudentry_id = getattr(cls, 'cloudentry_id', None)
+    if cloudentry_id:
+        return cloudentry_id
+    package = sys.modules.get(cls.__module__.rpartition('.')[0])
+    return getattr(package, 'cloudentry_id', None) or "{}.{}".format(cls.__module__, cls.__name__)
+
+
 def standardize_obj(obj, mapper):
     standard_obj = {}
     for key in obj:
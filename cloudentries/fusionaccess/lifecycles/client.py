@@ -1,12 +1,15 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
-import requests
 import json
 from .constants import SUCCESS_CODE
 import hashlib
 from abstract_plugin.platforms.common.connector import Connector
+from abstract_plugin.platforms.common.transport import transport
+from abstract_plugin.platforms.common.tokens import token_broker, token_key, TokenExpired
 from cloudify.utils import decrypt_password
 
+TOKEN_TTL = 20 * 60
+
 
 class FusionAccessConnect(Connector):
     def __init__(self, **kwargs):
@@ -31,24 +34,32 @@ class FusionAccessConnect(Connector):
             'X-Auth-Key': self.encrypt()
         }
         url = self.gen_url(uri="/login")
-        rep = requests.request("post", url, headers=headers, verify=False)
+        rep = transport.request("post", url, headers=headers, verify=False)
         if (not rep) or (rep.status_code not in [200]) or (not rep.headers) or (not rep.headers.get("X-Auth-Token")):
             raise Exception("Request Cloud API generate token failed, msg:{}".format(rep))
         return rep.headers.get("X-Auth-Token")
 
     def common_request(self, method, uri="", params={}, token_name="X-Auth-Token", verify=False,
                        success_code=SUCCESS_CODE):
+        params.update({
+            "operatorId": self.username
+        })
+        return token_broker.call(token_key(self.gen_url(), self.username, self.password), self.gen_token,
+                                 lambda token: self._request(method, uri, params, token, token_name, verify,
+                                                             success_code),
+                                 ttl=TOKEN_TTL)
+
+    def _request(self, method, uri, params, token, token_name, verify, success_code):
         headers = {
             'Content-Type': 'application/json'
         }
         url = self.gen_url(uri)
-        token = self.gen_token()
         if token:
             headers.update({token_name: token})
-        params.update({
-            "operatorId": self.username
-        })
-        rep = requests.request(method, url, headers=headers, json=params, verify=verify)
+        rep = transport.request(method, url, headers=headers, json=params, verify=verify)
+        if rep.status_code == 401:
+            # rejected before it was processed, sending it again with a new token is safe
+            raise TokenExpired("Request Cloud API failed, msg:{}".format(rep))
         content = rep.content
         if content and (not isinstance(content, dict)):
             content = json.loads(content)
@@ -1,14 +1,18 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
-import requests
 import json
+from cloudchef_integration.tasks.cloud_resources.commoncloud.transport import transport
+from cloudchef_integration.tasks.cloud_resources.commoncloud.tokens import token_broker, token_key, TokenExpired
 from cloudchef_integration.tasks.cloud_resources.fusionaccess.constants import SUCCESS_CODE
 from cloudchef_integration.tasks.cloud_resources.commoncloud.params import convert_params, EmptyDesc
+from cloudchef_integration.tasks.cloud_resources.commoncloud.clients import client_key
 from cloudchef_integration.tasks.cloud_resources.commoncloud.response import convert_response
 from cloudchef_integration.tasks.cloud_resources.fusionaccess.response import FusionAccessStandardResponse
 from . import params as FaParams
 import hashlib
 
+TOKEN_TTL = 20 * 60
+
 
 class FusionAccessConnect(object):
     def __init__(self, protocol, host, port, username, password="", **kwargs):
@@ -43,7 +47,7 @@ class FusionAccessConnect(object):
             'X-Auth-Key': self.encrypt()
         }
         url = self.gen_url(uri="/login")
-        rep = requests.request("post", url, headers=headers, verify=False)
+        rep = transport.request("post", url, headers=headers, verify=False)
         if (not rep) or (rep.status_code not in [200]) or (not rep.headers) or (not rep.headers.get("X-Auth-Token")):
             raise Exception("Request Cloud API generate token failed, msg:{}".format(rep))
         return rep.headers.get("X-Auth-Token")
@@ -59,17 +63,24 @@ class FusionAccessConnect(object):
         :param success_code: eg:[200], type: list
         :return:
         """
+        params.update({
+            "operatorId": self.username
+        })
+        return token_broker.call(token_key(self.gen_url(), self.username, self.password), self.gen_token,
+                                 lambda token: self._request(method, uri, params, token, token_name, verify,
+                                                             success_code),
+                                 ttl=TOKEN_TTL)
+
+    def _request(self, method, uri, params, token, token_name, verify, success_code):
         headers = {
             'Content-Type': 'application/json'
         }
         url = self.gen_url(uri)
-        token = self.gen_token()
         if token:
             headers.update({token_name: token})
-        params.update({
-            "operatorId": self.username
-        })
-        rep = requests.request(method, url, headers=headers, json=params, verify=verify)
+        rep = transport.request(method, url, headers=headers, json=params, verify=verify)
+        if rep.status_code == 401:
+            raise TokenExpired("Request Cloud API failed, msg:{}".format(rep))
         content = rep.content
         if content and (not isinstance(content, dict)):
             content = json.loads(content)
@@ -81,6 +92,7 @@ class FusionAccessConnect(object):
 class FusionAccessClient(object):
     def __init__(self, protocol, host, port, username, password="", **kwargs):
         self.conn = FusionAccessConnect(protocol, host, port, username, password, **kwargs)
+        self.memo_key = client_key("fusionaccess", None, "{}:{}".format(host, port), username, password)
 
     @convert_params(EmptyDesc.Schema)
     @convert_response(FusionAccessStandardResponse.validation)
@@ -86,4 +86,4 @@ class FusionAccessResource(object):
     @common_params(Params.VolumeType.Schema)
     @common_response(Response.Flavor.Schema)
     def image(self):
-        return self.flavor
+        return self.flavor()
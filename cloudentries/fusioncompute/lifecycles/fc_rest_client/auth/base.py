@@ -1,7 +1,66 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
-import requests
+import atexit
+import hashlib
+import os
+import threading
+import time
+
 from ..exceptions import ValidationError
+from ..common.session import session_pool, TIMEOUT
+
+# FusionCompute expires idle tokens after 30 minutes
+TOKEN_TTL = int(os.environ.get('FUSION_COMPUTE_TOKEN_TTL') or 20 * 60)
+
+
+class TokenCache(object):
+    """
+    Tokens shared by every `Auth` of the same (base_url, username, password), logged out at shutdown
+    """
+
+    def __init__(self, ttl=TOKEN_TTL):
+        self.ttl = ttl
+        self._tokens = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key, login):
+        """
+        login: function returning (token, logout function)
+        """
+        entry = self._tokens.get(key)
+        if entry is not None and entry[1] > time.time():
+            return entry[0]
+        with self._key_lock(key):
+            entry = self._tokens.get(key)
+            if entry is not None and entry[1] > time.time():
+                return entry[0]
+            token, logout = login()
+            self._tokens[key] = (token, time.time() + self.ttl, logout)
+            return token
+
+    def invalidate(self, key, token=None):
+        with self._key_lock(key):
+            entry = self._tokens.get(key)
+            if entry is not None and (token is None or entry[0] == token):
+                del self._tokens[key]
+
+    def release_all(self):
+        with self._lock:
+            tokens, self._tokens = self._tokens, {}
+        for token, _, logout in list(tokens.values()):
+            try:
+                logout(token)
+            except Exception:
+                pass
+
+
+token_cache = TokenCache()
+atexit.register(token_cache.release_all)
 
 
 class Auth(object):
@@ -34,25 +93,44 @@ class Auth(object):
     def authorize(self):
         auth_url = self.base_url + self.SESSION_URI
         try:
-            resp = requests.post(auth_url,
-                                 headers=self.headers,
-                                 verify=self.verify,
-                                 cert=self.cert)
+            resp = session_pool.get(auth_url).post(auth_url,
+                                                   headers=self.headers,
+                                                   verify=self.verify,
+                                                   cert=self.cert,
+                                                   timeout=TIMEOUT)
             if resp.status_code != 200:
                 raise ValidationError(resp.content)
         except Exception as e:
             raise ValidationError(e)
         return resp
 
-    def get_token(self):
+    @property
+    def token_key(self):
+        return self.base_url, self.username, hashlib.sha256((self.password or "").encode('utf-8')).hexdigest()
+
+    def login(self):
         resp = self.authorize()
-        token = resp.headers['X-Auth-Token']
-        return token
+        return resp.headers['X-Auth-Token'], self.logout
+
+    def logout(self, token):
+        auth_url = self.base_url + self.SESSION_URI
+        headers = self.get_auth_headers(token)
+        session_pool.get(auth_url).delete(auth_url, headers=headers, verify=self.verify, cert=self.cert,
+                                          timeout=TIMEOUT)
+
+    def get_token(self):
+        return token_cache.get(self.token_key, self.login)
+
+    def invalidate_token(self, token=None):
+        """
+        Forget the cached token (only if it is still `token` when given) after the server rejected it
+        """
+        token_cache.invalidate(self.token_key, token)
 
-    def get_auth_headers(self):
+    def get_auth_headers(self, token=None):
         return {
             "Content-Type": "application/json;charset=UTF-8",
             "Accept": "application/json;version={0};charset=UTF-8".format(self.version),
             "Accept-Language": "en_US",
-            "X-Auth-Token": self.get_token()
+            "X-Auth-Token": token or self.get_token()
         }
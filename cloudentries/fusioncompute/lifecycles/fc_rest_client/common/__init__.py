@@ -1,3 +1,4 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
 from .client import RestClient, FusionComputeBase  # NOQA
+from .session import session_pool  # NOQA
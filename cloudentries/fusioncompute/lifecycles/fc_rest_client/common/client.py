@@ -3,8 +3,8 @@
 import os
 import json
 import logging
-import requests
 from .. import exceptions
+from .session import session_pool, TIMEOUT
 
 
 class RestClient(object):
@@ -25,6 +25,10 @@ class RestClient(object):
     def headers(self):
         return self.auth.get_auth_headers()
 
+    @property
+    def session(self):
+        return session_pool.get(self.url)
+
     def _raise_client_error(self, response, url=None):
         try:
             result = response.json()
@@ -76,7 +80,18 @@ class RestClient(object):
                                    headers=headers,
                                    stream=stream,
                                    verify=verify,
-                                   timeout=timeout)
+                                   timeout=timeout if timeout is not None else TIMEOUT)
+        if response.status_code == 401 and expected_status_code != 401:
+            # the shared token expired: send the request once more with a new one
+            self.auth.invalidate_token(headers.get('X-Auth-Token'))
+            headers = dict(headers, **{'X-Auth-Token': self.auth.get_token()})
+            response = requests_method(request_url,
+                                       data=body,
+                                       params=params,
+                                       headers=headers,
+                                       stream=stream,
+                                       verify=verify,
+                                       timeout=timeout if timeout is not None else TIMEOUT)
         if self.logger.isEnabledFor(logging.DEBUG):
             for hdr, hdr_content in list(response.request.headers.items()):
                 self.logger.debug('request header:  %s: %s'
@@ -145,7 +160,7 @@ class RestClient(object):
 
     def get(self, uri, data=None, params=None, headers=None,
             expected_status_code=200, stream=False, timeout=None):
-        return self.do_request(requests.get,
+        return self.do_request(self.session.get,
                                uri,
                                data=data,
                                params=params,
@@ -156,7 +171,7 @@ class RestClient(object):
 
     def put(self, uri, data=None, params=None, headers=None,
             expected_status_code=200, stream=False, timeout=None):
-        return self.do_request(requests.put,
+        return self.do_request(self.session.put,
                                uri,
                                data=data,
                                params=params,
@@ -167,7 +182,7 @@ class RestClient(object):
 
     def patch(self, uri, data=None, params=None, headers=None,
               expected_status_code=200, stream=False, timeout=None):
-        return self.do_request(requests.patch,
+        return self.do_request(self.session.patch,
                                uri,
                                data=data,
                                params=params,
@@ -178,7 +193,7 @@ class RestClient(object):
 
     def post(self, uri, data=None, params=None, headers=None,
              expected_status_code=200, stream=False, timeout=None):
-        return self.do_request(requests.post,
+        return self.do_request(self.session.post,
                                uri,
                                data=data,
                                params=params,
@@ -189,7 +204,7 @@ class RestClient(object):
 
     def delete(self, uri, data=None, params=None, headers=None,
                expected_status_code=200, stream=False, timeout=None):
-        return self.do_request(requests.delete,
+        return self.do_request(self.session.delete,
                                uri,
                                data=data,
                                params=params,
@@ -229,18 +244,19 @@ class FusionComputeBase(object):
     def urn2uri(self, urn):
         return urn.replace(":", "/").replace("urn", self.BASE_URI)
 
-    def list(self, urn):
+    def list(self, urn, params=None):
         """
         ClustersClient,HostsClient,ServersClient,DvSwitchsClient,DatastoresClient --> site_urn
         PortGroupsClient --> dvswitch_urn
         SitesClient --> overwrited. no parameter.
+        params: `Optional`; query string, e.g. {"limit": 100, "offset": 0}
 
         Example:
             list sites --> SitesClient().list()
             list clusters --> ClustersClient().list("urn:sites:48630826")
         """
         uri = '/'.join([self.urn2uri(urn), self.IDENTIFIER])
-        return self.rest_client.get(uri)
+        return self.rest_client.get(uri, params=params)
 
     def get(self, urn):
         uri = self.urn2uri(urn)
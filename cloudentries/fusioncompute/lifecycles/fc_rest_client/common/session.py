@@ -0,0 +1,66 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+POOL_SIZE = int(os.environ.get('FUSION_COMPUTE_POOL_SIZE') or 10)
+MAX_RETRIES = int(os.environ.get('FUSION_COMPUTE_MAX_RETRIES') or 3)
+BACKOFF_FACTOR = 0.5
+# (connect, read) seconds
+TIMEOUT = (float(os.environ.get('FUSION_COMPUTE_CONNECT_TIMEOUT') or 15),
+           float(os.environ.get('FUSION_COMPUTE_READ_TIMEOUT') or 600))
+RETRY_METHODS = frozenset(['HEAD', 'GET', 'PUT', 'DELETE', 'OPTIONS'])
+RETRY_STATUS = (502, 503, 504)
+
+
+class SessionPool(object):
+    """
+    One keep-alive session per FusionCompute host, cookies are never kept between users
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, max_retries=MAX_RETRIES):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _retry(self):
+        kwargs = dict(total=self.max_retries, connect=self.max_retries, read=self.max_retries,
+                      status=self.max_retries, backoff_factor=BACKOFF_FACTOR, status_forcelist=RETRY_STATUS,
+                      raise_on_status=False)
+        try:
+            return Retry(allowed_methods=RETRY_METHODS, **kwargs)
+        except TypeError:  # urllib3 < 1.26
+            return Retry(method_whitelist=RETRY_METHODS, **kwargs)
+
+    def get(self, url):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = requests.Session()
+                    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                                          max_retries=self._retry())
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._sessions[key] = session
+        return session
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in list(sessions.values()):
+            session.close()
+
+
+session_pool = SessionPool()
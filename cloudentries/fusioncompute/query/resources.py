@@ -2,6 +2,7 @@
 
 from cloudchef_integration.libs.fc_rest_client.client import FusionComputeClient as Client
 from cloudchef_integration.tasks.cloud_resources.commoncloud.utils import patch_key, format_ins_status
+from cloudchef_integration.tasks.cloud_resources.commoncloud.paginator import OffsetPaginator
 from cloudchef_integration.tasks.cloud_resources.fusioncompute import constants
 
 
@@ -41,12 +42,12 @@ class FusionComputeClient(object):
 
     @property
     def instance(self):
+        def fetch(offset, limit):
+            vms = self.client.servers.list(self.site, {"limit": limit, "offset": offset, "detail": 2})
+            return vms['vms'], vms.get('total')
+
         resp = []
-        for index in range(100):
-            offset = index * 100
-            vms = self.client.servers.list(self.site, {"limit": 100, "offset": offset, "detail": 2})['vms']
-            if not vms:
-                break
+        for vms in OffsetPaginator(fetch, limit=100).pages():
             for vm in vms:
                 if not vm.get('isTemplate'):
                     if self.resource_id and vm.get('urn') not in self.resource_id:
@@ -1,10 +1,10 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
-import time
 from cloudify import ctx
 from abstract_plugin.platforms.common.connector import Connector
 from abstract_plugin.platforms.common import constants
 from abstract_plugin.platforms.gcp.client import GCPConnect
+from abstract_plugin.platforms.gcp.operations import wait_for_operation
 from cloudify.exceptions import NonRecoverableError
 
 
@@ -32,21 +32,17 @@ class Base(Connector):
         ctx.instance.update()
 
     def _wait_for_operation(self, server, project, zone, operation, timeout=600, sleep_interval=10):
+        """
+        Long-polls the operation, or polls it in batches with the concurrent waits, see `operations`
+        """
         ctx.logger.info('Waiting for operation to finish...')
-        timeout = time.time() + timeout
-        while time.time() < timeout:
-            result = server.zoneOperations().get(
-                project=project,
-                zone=zone,
-                operation=operation).execute()
-
-            if result['status'] == 'DONE':
-                print("done.")
-                if 'error' in result:
-                    raise Exception(result['error'])
-                return result
-
-            time.sleep(sleep_interval)
+        result = wait_for_operation(server, GCPConnect(self.connection_config, 'compute', 'v1'), project, zone,
+                                    operation, timeout, sleep_interval)
+        if result is not None and result['status'] == 'DONE':
+            print("done.")
+            if 'error' in result:
+                raise Exception(result['error'])
+            return result
         raise NonRecoverableError("Waiting for operation to finish failed!")
 
     def describe_volume(self, compute, volume_id):
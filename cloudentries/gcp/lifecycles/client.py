@@ -4,8 +4,7 @@ import httplib2
 from cloudify.exceptions import NonRecoverableError
 from abstract_plugin.platforms.common.utils import validate_parameter
 from cloudify.utils import decrypt_password
-from oauth2client.service_account import ServiceAccountCredentials
-from googleapiclient.discovery import build
+from abstract_plugin.platforms.gcp.discovery import get_service
 
 
 class GCPConnect(object):
@@ -36,13 +35,9 @@ class GCPConnect(object):
 
     def connection(self):
         try:
-            credentials = ServiceAccountCredentials.from_json_keyfile_dict(self.key_json, self.scope)
             # FIXME: This is the company's HTTP proxy, which needs to be removed later
-            http = credentials.authorize(
-                httplib2.Http(proxy_info=httplib2.ProxyInfo(httplib2.socks.PROXY_TYPE_SOCKS5, '192.168.1.16', 1089),
-                              disable_ssl_certificate_validation=True))
-            client = build(self.api_name, self.api_version, http=http)
-
-            return client
+            return get_service(self.api_name, self.api_version, self.key_json, self.scope, lambda: httplib2.Http(
+                proxy_info=httplib2.ProxyInfo(httplib2.socks.PROXY_TYPE_SOCKS5, '192.168.1.16', 1089),
+                disable_ssl_certificate_validation=True))
         except Exception as e:
             raise NonRecoverableError("Connect to Google Cloud failed! the error message is {0}".format(e))
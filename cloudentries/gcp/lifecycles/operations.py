@@ -0,0 +1,70 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import time
+
+from abstract_plugin.platforms.common.poller import backoff_intervals, batch_poller, PollTimeout
+
+# operations per batch HTTP request of the polls
+MAX_BATCH = 100
+# `zoneOperations().wait` returns after this many seconds at most, even if the operation is not done
+LONG_POLL_SECONDS = 120
+
+
+def operation_poller(connect, project):
+    """
+    The poller of the zone operations of the project: the `zoneOperations().get` of the concurrent waits are sent
+    in one batch HTTP request. The polling thread builds its own service, `httplib2.Http` is not thread-safe
+    connect: `Required`; the `GCPConnect` of the service account
+    """
+    def describe(operations):
+        service = connect.connection()
+        results = {}
+
+        def callback(request_id, response, exception):
+            results[operations[int(request_id)]] = exception if exception is not None else response
+
+        batch = service.new_batch_http_request(callback=callback)
+        for index, (zone, operation) in enumerate(operations):
+            batch.add(service.zoneOperations().get(project=project, zone=zone, operation=operation),
+                      request_id=str(index))
+        batch.execute()
+        return results
+
+    return batch_poller("gcp-operation", project, None, connect.client_email, connect.private_key, describe,
+                        MAX_BATCH)
+
+
+def wait_for_operation(service, connect, project, zone, operation, timeout=600, max_interval=10):
+    """
+    The zone operation once DONE, or its last state after `timeout` seconds.
+    `zoneOperations().wait` returns as soon as the operation is done (or after 2 minutes), one request per
+    2 minutes of wait. Within the last 2 minutes before the deadline (a long poll would overrun it), or without
+    the method (discovery documents older than it), the operation is polled (in batches with the concurrent
+    waits of the project if BATCH_POLLING is set), backing off up to `max_interval` seconds
+    """
+    deadline = time.time() + timeout
+    try:
+        long_poll = service.zoneOperations().wait
+    except AttributeError:
+        long_poll = None
+    if long_poll is not None:
+        while deadline - time.time() >= LONG_POLL_SECONDS:
+            result = long_poll(project=project, zone=zone, operation=operation).execute()
+            if result['status'] == 'DONE':
+                return result
+
+    poller = operation_poller(connect, project)
+    intervals = backoff_intervals(max_interval, first=1)
+    delay = 0
+    result = None
+    while True:
+        remaining = max(deadline - time.time(), 0)
+        try:
+            result = poller.poll((zone, operation), min(delay, remaining), remaining)
+        except PollTimeout:
+            return result
+        if isinstance(result, Exception):
+            raise result
+        if result is not None and result['status'] == 'DONE' or time.time() >= deadline:
+            return result
+        delay = next(intervals)
@@ -1,7 +1,5 @@
-import json
-from oauth2client.service_account import ServiceAccountCredentials
-from googleapiclient.discovery import build
 import httplib2
+from cloudchef_integration.tasks.cloud_resources.gcp.discovery import get_service
 
 
 class Conn_GCP:
@@ -20,9 +18,7 @@ class Conn_GCP:
 
     def get_service(self, api_name='compute', api_version='v1'):
         try:
-            credentials = ServiceAccountCredentials.from_json_keyfile_dict(self.KEY_JSON, self.SCOPE)
-            http = credentials.authorize(httplib2.Http(disable_ssl_certificate_validation=True))
-            service = build(api_name, api_version, http=http)
-            return service
+            return get_service(api_name, api_version, self.KEY_JSON, self.SCOPE,
+                               lambda: httplib2.Http(disable_ssl_certificate_validation=True))
         except Exception as e:
             raise Exception("Connect to gcp failed! the error message is {0}".format(e))
@@ -0,0 +1,139 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import httplib2
+from googleapiclient.discovery import build_from_document
+from oauth2client.service_account import ServiceAccountCredentials
+
+DISCOVERY_URI = "https://www.googleapis.com/discovery/v1/apis/{api}/{apiVersion}/rest"
+# the discovery documents fetched once are kept in this directory of the user (mode 0700), the next processes
+# build their services offline. The documents shipped with google-api-python-client >= 2.0 are used first
+DISCOVERY_CACHE_DIR = os.environ.get('GCP_DISCOVERY_CACHE_DIR') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'cloudentries-gcp-discovery')
+# services kept per thread (`httplib2.Http` is not thread-safe), the least recently used one is dropped beyond
+MAX_THREAD_SERVICES = 8
+
+_documents = {}
+_documents_lock = threading.Lock()
+_local = threading.local()
+
+
+def _static_document(api_name, api_version):
+    """
+    The document shipped with google-api-python-client >= 2.0
+    """
+    try:
+        from googleapiclient.discovery_cache import get_static_doc
+    except ImportError:
+        return None
+    return get_static_doc(api_name, api_version)
+
+
+def _private_dir(path):
+    """
+    Whether `path` is a directory of the user that the other users cannot write, created if missing
+    """
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path, mode=0o700)
+        stat = os.stat(path)
+    except (IOError, OSError):
+        return False
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+def _cached_document(path):
+    """
+    The cached document, unless another user owns or can write it: the document holds the URLs the access token
+    of the service account is sent to
+    """
+    try:
+        with open(path) as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+                return None
+            return f.read()
+    except (IOError, OSError):
+        return None
+
+
+def _fetch_document(api_name, api_version, http, path):
+    resp, content = http.request(DISCOVERY_URI.format(api=api_name, apiVersion=api_version))
+    if int(resp.status) >= 400:
+        raise Exception("Get the discovery document of {} {} failed! the status is {}".format(
+            api_name, api_version, resp.status))
+    content = content.decode('utf-8') if isinstance(content, bytes) else content
+    if _private_dir(DISCOVERY_CACHE_DIR):
+        temp_path = "{}.{}".format(path, os.getpid())
+        try:
+            with os.fdopen(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+                f.write(content)
+            os.rename(temp_path, path)
+        except (IOError, OSError):
+            pass
+    return content
+
+
+def _trusted(document):
+    """
+    Whether the requests of the document go to a Google API endpoint
+    """
+    host = urlsplit(document.get('rootUrl') or '').hostname or ''
+    return host == 'googleapis.com' or host.endswith('.googleapis.com')
+
+
+def discovery_document(api_name, api_version, http):
+    """
+    The parsed discovery document of the API, from the client library, the cache directory of the user or the
+    discovery service (then cached), parsed once per process
+    """
+    key = (api_name, api_version)
+    with _documents_lock:
+        document = _documents.get(key)
+        if document is None:
+            path = os.path.join(DISCOVERY_CACHE_DIR, "{}.{}.json".format(api_name, api_version))
+            content = _static_document(api_name, api_version)
+            if content is None and _private_dir(DISCOVERY_CACHE_DIR):
+                content = _cached_document(path)
+            document = json.loads(content) if content is not None else None
+            if document is None or not _trusted(document):
+                document = json.loads(_fetch_document(api_name, api_version, http, path))
+            if not _trusted(document):
+                raise Exception("The discovery document of {} {} has an unexpected root URL: {}".format(
+                    api_name, api_version, document.get('rootUrl')))
+            _documents[key] = document
+        return document
+
+
+def _thread_services():
+    services = getattr(_local, 'services', None)
+    if services is None:
+        services = _local.services = OrderedDict()
+    return services
+
+
+def get_service(api_name, api_version, key_json, scope, http_factory=httplib2.Http):
+    """
+    The service of the service account `key_json`, built once per thread (`httplib2.Http` is not thread-safe)
+    and kept by the thread, not in the shared client pool: its authorized HTTP object keeps the access token
+    and refreshes it once expired
+    http_factory: `Optional`; function() -> unauthorized `httplib2.Http`
+    """
+    key = (api_name, api_version, ",".join(scope), key_json.get('client_email'),
+           hashlib.sha256((key_json.get('private_key') or "").encode('utf-8')).hexdigest())
+    services = _thread_services()
+    service = services.get(key)
+    if service is None:
+        credentials = ServiceAccountCredentials.from_json_keyfile_dict(key_json, scope)
+        http = credentials.authorize(http_factory())
+        service = services[key] = build_from_document(discovery_document(api_name, api_version, http), http=http)
+        while len(services) > MAX_THREAD_SERVICES:
+            services.popitem(last=False)
+    services.move_to_end(key)
+    return service
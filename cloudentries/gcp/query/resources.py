@@ -2,8 +2,11 @@
 
 from .connection import Conn_GCP
 from cloudchef_integration.tasks.cloud_resources.commoncloud.utils import patch_key, format_ins_status, filter_flavor
+from cloudchef_integration.tasks.cloud_resources.commoncloud.paginator import TokenPaginator
 from cloudchef_integration.tasks.cloud_resources.gcp import constants
 
+AGGREGATED_PAGE_SIZE = 500
+
 
 class GCPClient(object):
     def __init__(self, connection_config, query_params=None):
@@ -31,7 +34,7 @@ class GCPClient(object):
         if self.resource_id:
             resp = [self.client.regions().get(project=self.project_id, region=self.resource_id).execute()]
         else:
-            resp = self.client.regions().list(project=self.project_id).execute()['items']
+            resp = self.list_items(self.client.regions, project=self.project_id)
         return patch_key(self.modify_value(resp), constants.REGION_MAPPER)
 
     @property
@@ -54,7 +57,7 @@ class GCPClient(object):
         if self.resource_id:
             resp = [self.client.networks().get(project=self.project_id, network=self.resource_id).execute()]
         else:
-            resp = self.client.networks().list(project=self.project_id).execute()['items']
+            resp = self.list_items(self.client.networks, project=self.project_id)
         return patch_key(self.modify_value(resp), constants.NETWORK_MAPPER)
 
     @property
@@ -65,14 +68,12 @@ class GCPClient(object):
                                                             subnetwork=self.resource_id).execute()
             resp.append(resource_config)
         if self.query_params.get('NetworkId'):
-            network_id = self.query_params.get('NetworkId')
-            subnetworks = self.get_subnetworks_from_network(self.client, self.project_id, network_id)
-            for subnetwork in subnetworks:
-                subnetwork_config = self.client.subnetworks().get(project=self.project_id, region=self.site,
-                                                                  subnetwork=subnetwork).execute()
-                resp.append(subnetwork_config)
-        else:
-            resp = self.client.subnetworks().list(project=self.project_id, region=self.site).execute()['items']
+            # the subnetworks of the network in this region, filtered by the API instead of one `get` per subnetwork
+            resp.extend(self.list_items(self.client.subnetworks, project=self.project_id, region=self.site,
+                                        filter='network = "{}"'.format(
+                                            self.network_url(self.query_params.get('NetworkId')))))
+        elif not self.resource_id:
+            resp = self.list_items(self.client.subnetworks, project=self.project_id, region=self.site)
         for port_group in resp:
             port_group['network'] = port_group['network'].split('/')[-1]
             port_group['region'] = port_group['region'].split('/')[-1]
@@ -94,7 +95,7 @@ class GCPClient(object):
         else:
             for zone in zones:
                 try:
-                    response = self.client.machineTypes().list(project=self.project_id, zone=zone).execute()['items']
+                    response = self.list_items(self.client.machineTypes, project=self.project_id, zone=zone)
                     resp += response
                 except Exception as e:
                     pass
@@ -118,58 +119,21 @@ class GCPClient(object):
 
     @property
     def volume(self):
-        zones = self.get_zones_from_region(self.client, self.project_id, self.site)
-        resp = []
-        if self.resource_id:
-            for zone in zones:
-                try:
-                    resource_config = self.client.disks().get(project=self.project_id, zone=zone, disk=self.resource_id)
-                    response = resource_config.execute()
-                    resp.append(response)
-                except Exception as e:
-                    pass
-        else:
-            for zone in zones:
-                try:
-                    response = self.client.disks().list(project=self.project_id, zone=zone).execute()['items']
-                    resp += response
-                except Exception:
-                    pass
-            if self.query_params.get('InstanceId'):
-                for zone in zones:
-                    try:
-                        resp = self.client.instances().get(project=self.project_id, zone=zone,
-                                                           instance=self.query_params.get('InstanceId')).execute()[
-                            'disks']
-                        for obj in resp:
-                            obj['id'] = obj['deviceName']
-                        return patch_key(resp, constants.VM_DISK_MAPPER)
-                    except Exception as e:
-                        pass
+        if self.query_params.get('InstanceId') and not self.resource_id:
+            instances = self.aggregated_items(self.client.instances, 'instances',
+                                              name=self.query_params.get('InstanceId'))
+            if instances:
+                resp = instances[0]['disks']
+                for obj in resp:
+                    obj['id'] = obj['deviceName']
+                return patch_key(resp, constants.VM_DISK_MAPPER)
+        resp = self.aggregated_items(self.client.disks, 'disks', name=self.resource_id)
         return patch_key(resp, constants.VOLUME_MAPPER)
 
     @property
     def volume_type(self):
-        zones = self.get_zones_from_region(self.client, self.project_id, self.site)
         resp = []
-        temporary_storage = []
-        if self.resource_id:
-            for zone in zones:
-                try:
-                    resource_config = self.client.diskTypes().get(project=self.project_id, zone=zone,
-                                                                  diskType=self.resource_id).execute()
-                    temporary_storage.append(resource_config)
-                except Exception as e:
-                    pass
-        else:
-            for zone in zones:
-                try:
-                    resource_config = self.client.diskTypes().list(project=self.project_id, zone=zone).execute()[
-                        'items']
-                    temporary_storage += resource_config
-                except Exception:
-                    pass
-        for obj in temporary_storage:
+        for obj in self.aggregated_items(self.client.diskTypes, 'diskTypes', name=self.resource_id):
             if obj['name'] != 'local-ssd':
                 obj['id'] = obj['name']
                 resp.append(obj)
@@ -177,26 +141,9 @@ class GCPClient(object):
 
     @property
     def instance(self):
-        zones = self.get_zones_from_region(self.client, self.project_id, self.site)
-        resp = []
-        if self.resource_id:
-            for zone in zones:
-                try:
-                    resource_info = self.client.instances().get(project=self.project_id, zone=zone,
-                                                                instance=self.resource_id).execute()
-                    resource_info["status"] = format_ins_status(resource_info["status"])
-                    resp.append(resource_info)
-                except Exception as e:
-                    pass
-        else:
-            for zone in zones:
-                try:
-                    response = self.client.instances().list(project=self.project_id, zone=zone).execute()['items']
-                    for instance in response:
-                        instance["status"] = format_ins_status(instance["status"])
-                        resp.append(instance)
-                except Exception:
-                    pass
+        resp = self.aggregated_items(self.client.instances, 'instances', name=self.resource_id)
+        for instance in resp:
+            instance["status"] = format_ins_status(instance["status"])
         return patch_key(self.modify_value(resp), constants.INSTANCE_MAPPER)
 
     @property
@@ -204,9 +151,52 @@ class GCPClient(object):
         if self.resource_id:
             resp = [self.client.firewalls().get(project=self.project_id, firewall=self.resource_id).execute()]
         else:
-            resp = self.client.firewalls().list(project=self.project_id).execute()['items']
+            resp = self.list_items(self.client.firewalls, project=self.project_id)
         return patch_key(self.modify_value(resp), constants.SECURITY_GROUP_MAPPER)
 
+    @staticmethod
+    def list_items(collection, **kwargs):
+        """
+        `items` of every page of `collection().list(**kwargs)`, following `nextPageToken`
+        """
+        def fetch(token):
+            if token:
+                kwargs['pageToken'] = token
+            resp = collection().list(**kwargs).execute()
+            return resp.get('items', []), resp.get('nextPageToken')
+
+        return TokenPaginator(fetch).all()
+
+    def aggregated_items(self, collection, item_key, name=None):
+        """
+        `item_key` items of the zones of the region from `collection().aggregatedList`: one paged call for every
+        zone instead of a `list` per zone, the next page is requested while a page is processed.
+        The API filters the items by the URL of their zone ("<region>-<letter>"), the other regions only send
+        an empty scope
+        name: `Optional`; only the items of this name, filtered by the API
+        """
+        # RE2 full matches, the names of GCP resources and regions ([-a-z0-9]) are literal
+        expressions = []
+        if name:
+            expressions.append('(name eq "{}")'.format(name))
+        if self.site:
+            expressions.append('(zone eq ".*/zones/{}-[^/]+")'.format(self.site))
+
+        def fetch(token):
+            kwargs = {'project': self.project_id, 'maxResults': AGGREGATED_PAGE_SIZE}
+            if expressions:
+                kwargs['filter'] = " ".join(expressions)
+            if token:
+                kwargs['pageToken'] = token
+            resp = collection().aggregatedList(**kwargs).execute()
+            items = []
+            # scope: "zones/<zone>", the scopes without items have a `warning` instead
+            for scoped_list in list(resp.get('items', {}).values()):
+                items.extend(scoped_list.get(item_key, []))
+            return items, resp.get('nextPageToken')
+
+        return TokenPaginator(fetch, prefetch=True).all()
+
     @staticmethod
     def get_zones_from_region(client, project_id, region):
         zones = []
@@ -215,6 +205,9 @@ class GCPClient(object):
             zones.append(zone.split('/')[-1])
         return zones
 
+    def network_url(self, network):
+        return "https://www.googleapis.com/compute/v1/projects/{}/global/networks/{}".format(self.project_id, network)
+
     @staticmethod
     def get_subnetworks_from_network(client, project_id, network):
         subnetworks = []
@@ -12,6 +12,8 @@ from .base import Base
 from .handler import client_error_handler
 from abstract_plugin.platforms.common.compute import CommonCompute
 from abstract_plugin.platforms.ksyun.restclient import Helper
+from abstract_plugin.platforms.common.poller import backoff_intervals, PollTimeout
+from .poller import instance_poller, eip_poller, local_snapshot_poller, cloud_snapshot_poller
 from . import constants as ksyun_constants
 
 
@@ -83,9 +85,20 @@ class Compute(Base, CommonCompute):
         return None if not vm_info else vm_info['InstanceState']['Name']
 
     def wait_for_target_state(self, instance_id, target_state, timeout=600, sleep_interval=10):
+        """
+        The polls of the concurrent waits of the process are batched if BATCH_POLLING is set, see `poller`
+        """
+        poller = instance_poller(Helper())
+        intervals = backoff_intervals(sleep_interval)
+        delay = 0
+        instance_state = None
         timeout = time.time() + timeout
         while time.time() < timeout:
-            instance_state = self.get_vm_state(instance_id)
+            try:
+                vm_info = poller.poll(instance_id, delay, max(timeout - time.time(), 0))
+            except PollTimeout:
+                break
+            instance_state = None if not vm_info else vm_info['InstanceState']['Name']
             ctx.logger.info('Waiting for server "{0}" to be {1}. current state: {2}'
                             .format(instance_id, target_state, instance_state))
             if isinstance(target_state, tuple):
@@ -94,7 +107,7 @@ class Compute(Base, CommonCompute):
             else:
                 if instance_state == target_state:
                     return
-            time.sleep(sleep_interval)
+            delay = next(intervals)
         raise NonRecoverableError("Waiting server to target state failed! the current "
                                   "state is {0}, the target state is {1}".format(instance_state, target_state))
 
@@ -218,14 +231,19 @@ class Compute(Base, CommonCompute):
             'AllocationId.1': eip_id
         }
         eip_info = Helper().execute_request('eip', 'describe_addresses', request_body)['AddressesSet'][0]
-        while timeout:
+        poller = eip_poller(Helper())
+        intervals = backoff_intervals(interval)
+        deadline = time.time() + timeout
+        while time.time() < deadline:
             if eip_info['State'] in statuses:
                 return eip_info
             ctx.logger.info(
                 'Wait Eip:{} to be status:{},current status:{}...'.format(eip_id, ','.join(statuses),
                                                                           eip_info['State']))
-            time.sleep(interval)
-            timeout -= interval
+            try:
+                eip_info = poller.poll(eip_id, next(intervals), max(deadline - time.time(), 0)) or eip_info
+            except PollTimeout:
+                break
         raise NonRecoverableError("Waiting eip to target state failed! the current "
                                   "state is {0}, the target state:{1}".format(eip_info['State'], ','.join(statuses)))
 
@@ -347,19 +365,25 @@ class Compute(Base, CommonCompute):
         return snapshot['SnapshotStatus']
 
     def wait_for_snapshot_available(self, snapshot_type, snapshot_id, timeout=1200, sleep_interval=10):
-        timeout = time.time() + timeout
-        while time.time() < timeout:
-            if snapshot_type == 'local_volume':
-                snapshot_state = self.get_local_volume_snapshot_state(snapshot_id)
-                ctx.logger.info('Waiting for snapshot "{0}" to be ACTIVE. current state: {1}'
-                                .format(snapshot_id, snapshot_state))
-            else:
-                snapshot_state = self.get_cloud_volume_snapshot_state(snapshot_id)
-                ctx.logger.info('Waiting for snapshot "{0}" to be available. current state: {1}'
-                                .format(snapshot_id, snapshot_state))
+        if snapshot_type == 'local_volume':
+            poller, state_key, target = local_snapshot_poller(Helper()), 'State', 'ACTIVE'
+        else:
+            poller, state_key, target = cloud_snapshot_poller(Helper()), 'SnapshotStatus', 'available'
+        intervals = backoff_intervals(sleep_interval)
+        delay = 0
+        snapshot_state = None
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                snapshot = poller.poll(snapshot_id, delay, max(deadline - time.time(), 0))
+            except PollTimeout:
+                break
+            snapshot_state = snapshot.get(state_key) if snapshot else None
+            ctx.logger.info('Waiting for snapshot "{0}" to be {1}. current state: {2}'
+                            .format(snapshot_id, target, snapshot_state))
             if snapshot_state in ksyun_constants.KS_SNAPSHOT_STATE_AVAILABLE:
                 return
-            time.sleep(sleep_interval)
+            delay = next(intervals)
         raise NonRecoverableError("Waiting for snapshot available timeout({0} seconds)! the current "
                                   "state is {1}".format(timeout, snapshot_state))
 
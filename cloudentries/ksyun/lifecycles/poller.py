@@ -0,0 +1,59 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+from abstract_plugin.platforms.common.poller import batch_poller
+
+# largest `MaxResults` of DescribeInstances / DescribeVolumes / DescribeAddresses, the ids of a batch
+MAX_BATCH = 100
+
+
+def _describe_by_ids(helper, service, request_method, id_param, set_name, id_key):
+    def describe(resource_ids):
+        request_body = dict(("{}.{}".format(id_param, index + 1), resource_id)
+                            for index, resource_id in enumerate(resource_ids))
+        request_body['MaxResults'] = max(len(resource_ids), 5)
+        resp = helper.execute_request(service, request_method, request_body)
+        return dict((resource[id_key], resource) for resource in resp.get(set_name) or [])
+
+    return describe
+
+
+def _describe_one(helper, service, request_method, id_param, set_name):
+    def describe(resource_ids):
+        resp = helper.execute_request(service, request_method, {id_param: resource_ids[0]})
+        return dict((resource_ids[0], resource) for resource in (resp.get(set_name) or [])[:1])
+
+    return describe
+
+
+def _poller(kind, helper, describe, max_batch=MAX_BATCH):
+    return batch_poller("ksyun-" + kind, helper.region, helper.domain, helper.ks_access_key_id,
+                        helper.ks_secret_access_key, describe, max_batch)
+
+
+def instance_poller(helper):
+    return _poller("instance", helper,
+                   _describe_by_ids(helper, 'kec', 'describe_instances', 'InstanceId', 'InstancesSet', 'InstanceId'))
+
+
+def volume_poller(helper):
+    return _poller("volume", helper,
+                   _describe_by_ids(helper, 'ebs', 'describe_volumes', 'VolumeId', 'Volumes', 'VolumeId'))
+
+
+def eip_poller(helper):
+    return _poller("eip", helper,
+                   _describe_by_ids(helper, 'eip', 'describe_addresses', 'AllocationId', 'AddressesSet',
+                                    'AllocationId'))
+
+
+def local_snapshot_poller(helper):
+    # DescribeLocalVolumeSnapshots filters one LocalVolumeSnapshotId
+    return _poller("local-snapshot", helper,
+                   _describe_one(helper, 'kec', 'describe_local_volume_snapshots', 'LocalVolumeSnapshotId',
+                                 'LocalVolumeSnapshotSet'), max_batch=1)
+
+
+def cloud_snapshot_poller(helper):
+    # DescribeSnapshots filters one SnapshotId
+    return _poller("cloud-snapshot", helper,
+                   _describe_one(helper, 'ebs', 'describe_snapshots', 'SnapshotId', 'Snapshots'), max_batch=1)
@@ -5,6 +5,7 @@ from cloudify.exceptions import NonRecoverableError
 from cloudify.utils import decrypt_password, hide_password
 from abstract_plugin.platforms.common.utils import validate_parameter, get_connection_config
 from kscore.session import get_session
+from abstract_plugin.platforms.common.clients import client_cache, client_key
 
 
 class Helper(object):
@@ -17,6 +18,13 @@ class Helper(object):
         self.domain = self.connection_config.get('domain')
 
     def get_client(self, service):
+        """
+        The client is shared with the other helpers of this (service, region, domain, access key)
+        """
+        key = client_key(service, self.region, self.domain, self.ks_access_key_id, self.ks_secret_access_key)
+        return client_cache.get(key, lambda: self.create_client(service))
+
+    def create_client(self, service):
         session = get_session()
         if self.domain:
             session.set_domain(self.domain)
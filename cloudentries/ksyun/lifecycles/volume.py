@@ -11,6 +11,8 @@ from abstract_plugin.platforms.common.volume import CommonVolume
 from .base import Base
 from .compute import Compute
 from abstract_plugin.platforms.ksyun.restclient import Helper
+from abstract_plugin.platforms.common.poller import backoff_intervals, PollTimeout
+from .poller import volume_poller
 
 
 class Volume(Base, CommonVolume):
@@ -53,14 +55,25 @@ class Volume(Base, CommonVolume):
         return self.describe_volume(volume_id)['VolumeStatus']
 
     def wait_for_target_state(self, volume_id, target_state, timeout=600, sleep_interval=10):
+        """
+        The polls of the concurrent waits of the process are batched if BATCH_POLLING is set, see `poller`
+        """
+        poller = volume_poller(Helper())
+        intervals = backoff_intervals(sleep_interval)
+        delay = 0
+        volume_state = None
         timeout = time.time() + timeout
         while time.time() < timeout:
-            volume_state = self.get_volume_state(volume_id)
+            try:
+                volume_info = poller.poll(volume_id, delay, max(timeout - time.time(), 0))
+            except PollTimeout:
+                break
+            volume_state = volume_info.get('VolumeStatus') if volume_info else None
             ctx.logger.info('Waiting for volume "{0}" to be {1}. current state: {2}'
                             .format(volume_id, target_state, volume_state))
             if volume_state == target_state:
                 return
-            time.sleep(sleep_interval)
+            delay = next(intervals)
         raise NonRecoverableError("Waiting server to target state failed! the current "
                                   "state is {0}, the target state is {1}".format(volume_state, target_state))
 
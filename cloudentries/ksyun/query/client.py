@@ -1,11 +1,20 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
+import os
 from kscore.session import get_session
+from cloudchef_integration.tasks.cloud_resources.commoncloud.clients import client_cache, client_key
+from cloudchef_integration.tasks.cloud_resources.commoncloud.ratelimit import rate_limiter
+from cloudchef_integration.tasks.cloud_resources.commoncloud.paginator import OffsetPaginator, TokenPaginator
 from cloudchef_integration.tasks.cloud_resources.commoncloud.params import convert_params, EmptyDesc
 from cloudchef_integration.tasks.cloud_resources.commoncloud.response import convert_response
 from cloudchef_integration.tasks.cloud_resources.ksyun import params as KsyunParams
 from cloudchef_integration.tasks.cloud_resources.ksyun.response import KsyunStandardResponse
 
+# calls per second of the concurrent queries (e.g. the snapshots of each local volume), below the API quotas
+API_RATE = float(os.environ.get('KSYUN_API_RATE', 50))
+# largest `MaxResults` of the KEC, EBS, VPC and EIP describe APIs
+PAGE_SIZE = 1000
+
 
 class KsyunConnection(object):
     def __init__(self, region=None, ks_access_key_id=None, ks_secret_access_key=None, domain=None, **kwargs):
@@ -15,18 +24,26 @@ class KsyunConnection(object):
         self.domain = domain
         self.kwargs = kwargs
 
+    def create_client(self, service):
+        session = get_session()
+        if self.domain:
+            session.set_domain(self.domain)
+        return session.create_client(service_name=service,
+                                     region_name=self.region,
+                                     ks_access_key_id=self.ks_access_key_id,
+                                     ks_secret_access_key=self.ks_secret_access_key,
+                                     use_ssl=False,
+                                     **self.kwargs)
+
     def connection(self, service):
+        """
+        The client is shared with the other connections of this (service, region, domain, access key)
+        """
+        key = client_key(service, self.region, self.domain, self.ks_access_key_id, self.ks_secret_access_key)
+        if self.kwargs:
+            key += tuple(sorted((k, str(v)) for k, v in list(self.kwargs.items())))
         try:
-            session = get_session()
-            if self.domain:
-                session.set_domain(self.domain)
-            client = session.create_client(service_name=service,
-                                           region_name=self.region,
-                                           ks_access_key_id=self.ks_access_key_id,
-                                           ks_secret_access_key=self.ks_secret_access_key,
-                                           use_ssl=False,
-                                           **self.kwargs)
-            return client
+            return client_cache.get(key, lambda: self.create_client(service))
         except Exception as e:
             raise Exception("Connect to ksyun failed! the error message is {0}".format(e))
 
@@ -34,6 +51,43 @@ class KsyunConnection(object):
 class KsyunClient(object):
     def __init__(self, region, ks_access_key_id, ks_secret_access_key, **kwargs):
         self.kc = KsyunConnection(region, ks_access_key_id, ks_secret_access_key, **kwargs)
+        self.memo_key = client_key("ksyun", region, self.kc.domain, ks_access_key_id, ks_secret_access_key)
+
+    @property
+    def limiter(self):
+        """
+        Rate of the concurrent calls of this account and region, see `KsyunResource`
+        """
+        return rate_limiter(("ksyun", self.kc.ks_access_key_id, self.kc.region), API_RATE)
+
+    def marker_pages(self, service, operation, set_name, count_name, params):
+        """
+        Pages of an API with `MaxResults`/`Marker` (offset) and a total count (KEC, EBS),
+        the next pages are requested while the current one is converted
+        """
+        client = self.kc.connection(service)
+
+        def fetch(offset, limit):
+            resp = getattr(client, operation)(**dict(params, Marker=offset, MaxResults=limit))
+            return resp.get(set_name, []), resp.get(count_name)
+
+        for rows in OffsetPaginator(fetch, limit=PAGE_SIZE).pages():
+            yield {set_name: rows}
+
+    def token_pages(self, service, operation, params):
+        """
+        Responses of an API with `MaxResults`/`NextToken` (VPC, EIP)
+        """
+        client = self.kc.connection(service)
+
+        def fetch(token):
+            page_params = dict(params, MaxResults=PAGE_SIZE)
+            if token:
+                page_params['NextToken'] = token
+            resp = getattr(client, operation)(**page_params)
+            return resp, resp.get('NextToken')
+
+        return TokenPaginator(fetch).pages()
 
     @convert_params(EmptyDesc.Schema, convert_method=KsyunParams.KsyunConvertParams)
     @convert_response(KsyunStandardResponse.region)
@@ -54,10 +108,9 @@ class KsyunClient(object):
         return client.describe_images(**params)
 
     @convert_params(KsyunParams.InstanceDesc.Schema, convert_method=KsyunParams.KsyunConvertParams)
-    @convert_response(KsyunStandardResponse.instance)
+    @convert_response(KsyunStandardResponse.instance, stream=True)
     def describe_instances(self, params):
-        client = self.kc.connection('kec')
-        return client.describe_instances(**params)
+        return self.marker_pages('kec', 'describe_instances', 'InstancesSet', 'InstanceCount', params)
 
     @convert_params(KsyunParams.FlavorDesc.Schema, convert_method=KsyunParams.KsyunConvertParams)
     @convert_response(KsyunStandardResponse.flavor)
@@ -75,7 +128,7 @@ class KsyunClient(object):
     @convert_response(KsyunStandardResponse.local_volume_sp)
     def describe_local_volume_snapshots(self, params):
         client = self.kc.connection('kec')
-        return client.describe_local_volume_snapshots(**params).get('LocalVolumeSnapshotSet') or []
+        return client.describe_local_volume_snapshots(**params)
 
     @convert_params(EmptyDesc.Schema, convert_method=KsyunParams.KsyunConvertParams)
     @convert_response(KsyunStandardResponse.family)
@@ -84,28 +137,24 @@ class KsyunClient(object):
         return client.describe_instance_familys(**params)
 
     @convert_params(KsyunParams.VpcDesc.Schema, convert_method=KsyunParams.KsyunConvertParams)
-    @convert_response(KsyunStandardResponse.network)
+    @convert_response(KsyunStandardResponse.network, stream=True)
     def describe_vpcs(self, params):
-        client = self.kc.connection('vpc')
-        return client.describe_vpcs(**params)
+        return self.token_pages('vpc', 'describe_vpcs', params)
 
     @convert_params(KsyunParams.SubnetDesc.Schema, convert_method=KsyunParams.KsyunConvertParams)
-    @convert_response(KsyunStandardResponse.subnet)
+    @convert_response(KsyunStandardResponse.subnet, stream=True)
     def describe_subnets(self, params):
-        client = self.kc.connection('vpc')
-        return client.describe_subnets(**params)
+        return self.token_pages('vpc', 'describe_subnets', params)
 
     @convert_params(KsyunParams.FirewallDesc.Schema, convert_method=KsyunParams.KsyunConvertParams)
-    @convert_response(KsyunStandardResponse.security_group)
+    @convert_response(KsyunStandardResponse.security_group, stream=True)
     def describe_security_groups(self, params):
-        client = self.kc.connection('vpc')
-        return client.describe_security_groups(**params)
+        return self.token_pages('vpc', 'describe_security_groups', params)
 
     @convert_params(KsyunParams.EipDesc.Schema, convert_method=KsyunParams.KsyunConvertParams)
-    @convert_response(KsyunStandardResponse.eip)
+    @convert_response(KsyunStandardResponse.eip, stream=True)
     def describe_addresses(self, params):
-        client = self.kc.connection('eip')
-        return client.describe_addresses(**params)
+        return self.token_pages('eip', 'describe_addresses', params)
 
     @convert_params(EmptyDesc.Schema, convert_method=KsyunParams.KsyunConvertParams)
     @convert_response(KsyunStandardResponse.line)
@@ -114,10 +163,9 @@ class KsyunClient(object):
         return client.get_lines()
 
     @convert_params(KsyunParams.CloudVolumeDesc.Schema, convert_method=KsyunParams.KsyunConvertParams)
-    @convert_response(KsyunStandardResponse.cloud_volume)
+    @convert_response(KsyunStandardResponse.cloud_volume, stream=True)
     def describe_volumes(self, params):
-        client = self.kc.connection('ebs')
-        return client.describe_volumes(**params)
+        return self.marker_pages('ebs', 'describe_volumes', 'Volumes', 'TotalCount', params)
 
     @convert_params(KsyunParams.InstanceVolumeDesc.Schema, convert_method=KsyunParams.KsyunConvertParams)
     @convert_response(KsyunStandardResponse.instance_volume)
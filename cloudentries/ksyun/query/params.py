@@ -99,7 +99,6 @@ class ImageDesc(object):
 
 class InstanceDesc(object):
     Schema = {
-        "MaxResults": BasicSchema.schema(raw_key="MaxResults", required=False, value=1000),
         "InstanceId": BasicSchema.schema(raw_key="resource_id", filter_key="InstanceId"),
     }
 
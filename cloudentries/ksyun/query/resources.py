@@ -5,6 +5,8 @@ from cloudchef_integration.tasks.cloud_resources.commoncloud import params as Pa
 from cloudchef_integration.tasks.cloud_resources.commoncloud.params import common_params, EmptyDesc
 from cloudchef_integration.tasks.cloud_resources.commoncloud.response import common_response, filter_output
 from cloudchef_integration.tasks.cloud_resources.commoncloud import response as Resp
+from cloudchef_integration.tasks.cloud_resources.commoncloud.index import resource_index, index_scope
+from cloudchef_integration.tasks.cloud_resources.commoncloud.executor import fan_out
 from cloudchef_integration.tasks.cloud_resources.ksyun.response import KsyunFilterResponse
 from .client import KsyunClient
 import os
@@ -56,19 +58,33 @@ class KsyunResource(object):
     @filter_output(KsyunFilterResponse.filter_image_name)
     @filter_output(KsyunFilterResponse.filter_os_type)
     def image(self):
-        return KsyunClient(**self.connection_params).describe_images(self.query_params)
+        image_set = KsyunClient(**self.connection_params).describe_images(self.query_params)
+        resource_index.update(self.image_index_scope, dict((image["Id"], image["Platform"]) for image in image_set))
+        return image_set
 
     @common_params(Params.Instance.Schema)
     @common_response(Resp.Instance.Schema)
     def instance(self):
 
-        resp = KsyunClient(**self.connection_params).describe_instances(self.query_params)
-        image_set = KsyunClient(**self.connection_params).describe_images({})
-        image_os_dict = {image["Id"]: image["Platform"] for image in image_set}
+        resp = list(KsyunClient(**self.connection_params).describe_instances(self.query_params))
+        image_os_dict = resource_index.lookup(self.image_index_scope, [instance.get('ImageId') for instance in resp],
+                                              self.image_platforms)
         for instance in resp:
             instance['OperatingSystem'] = image_os_dict.get(instance.get('ImageId'))
         return resp
 
+    @property
+    def image_index_scope(self):
+        return index_scope("ksyun-image-os", self.connection_params)
+
+    def image_platforms(self, image_ids):
+        """
+        DescribeImages filters one `ImageId` at most, several missing images are indexed by one full listing
+        """
+        params = {"resource_id": image_ids[0]} if len(image_ids) == 1 else {}
+        return dict((image["Id"], image["Platform"])
+                    for image in KsyunClient(**self.connection_params).describe_images(params))
+
     @common_params(Params.Flavor.Schema)
     @common_response(Resp.Flavor.Schema)
     @filter_output(KsyunFilterResponse.filter_flavor)
@@ -107,25 +123,27 @@ class KsyunResource(object):
         :return:
         '''
 
-        volumes = []
+        client = KsyunClient(**self.connection_params)
         if self.query_params.get("InstanceId"):  # 按InstanceId查询
-            volumes.extend(KsyunClient(**self.connection_params).describe_local_volume(self.query_params))
-            volumes.extend(KsyunClient(**self.connection_params).describe_instance_volumes(self.query_params))
-            return volumes
-
-        # 查询所有的系统/数据盘
-        volumes.extend(KsyunClient(**self.connection_params).describe_local_volume(self.query_params))
-        volumes.extend(KsyunClient(**self.connection_params).describe_volumes(self.query_params))
+            describe_methods = [client.describe_local_volume, client.describe_instance_volumes]
+        else:  # 查询所有的系统/数据盘
+            describe_methods = [client.describe_local_volume, client.describe_volumes]
+        volumes = []
+        for volume_set in fan_out(lambda describe: list(describe(self.query_params)), describe_methods,
+                                  limiter=client.limiter):
+            volumes.extend(volume_set)
         return volumes
 
     @common_params(Params.Snapshot.Schema)
     @common_response(Resp.Snapshot.Schema)
     def snapshot(self):
-        volumes = KsyunClient(**self.connection_params).describe_local_volume(self.query_params)
+        client = KsyunClient(**self.connection_params)
+        volumes = client.describe_local_volume(self.query_params)
+        # DescribeLocalVolumeSnapshots filters one SourceLocalVolumeId, the volumes are queried concurrently
         volume_snapshots = []
-        for volume in volumes:
-            query_params = {"VolumeId": volume['Id']}
-            volume_snapshots.extend(KsyunClient(**self.connection_params).describe_local_volume_snapshots(query_params))
+        for snapshots in fan_out(lambda volume: client.describe_local_volume_snapshots({"VolumeId": volume['Id']}),
+                                 volumes, limiter=client.limiter):
+            volume_snapshots.extend(snapshots)
         return volume_snapshots
 
     @common_params(Params.Vpc.Schema)
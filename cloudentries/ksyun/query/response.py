@@ -181,7 +181,7 @@ class KsyunStandardResponse(object):
     @classmethod
     def local_volume_sp(cls, resp):
         local_volume_sps = []
-        resp = cls.validate_empty(resp, "LocalVolumeSet")
+        resp = cls.validate_empty(resp, "LocalVolumeSnapshotSet")
         if not resp:
             return resp
         for snapshot in resp:
@@ -395,11 +395,7 @@ class KsyunFilterResponse(FilterResponse):
         """
         if not params.get('State'):
             return resp
-        aim = []
-        for dct in resp:
-            if dct['State'] == params.get('State'):
-                aim.append(dct)
-        return aim
+        return cls.select(resp, lambda dct: dct['State'] == params.get('State'))
 
     @classmethod
     def filter_volume_type(cls, params, resp):
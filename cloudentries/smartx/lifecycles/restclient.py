@@ -1,12 +1,15 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
-import requests
 import time
 
 from cloudify import ctx
 from cloudify.utils import decrypt_password
 
 from abstract_plugin.platforms.common.connector import Connector
+from abstract_plugin.platforms.common.transport import transport
+from abstract_plugin.platforms.common.tokens import token_broker, token_key, TokenExpired
+
+TOKEN_TTL = 30 * 60
 
 
 class Client(Connector):
@@ -30,8 +33,12 @@ class Client(Connector):
             path=path
         )
 
-    def get_token(self):
-        res = requests.post(
+    @property
+    def token_key(self):
+        return token_key(self._gen_url("/sessions", True), self.username, self.password)
+
+    def login(self):
+        res = transport.post(
             url=self._gen_url("/sessions", True),
             json={"username": self.username, "password": self.password},
             verify=False
@@ -39,28 +46,34 @@ class Client(Connector):
         res.raise_for_status()
         return res.json()["token"]
 
-    def release(self, token):
+    def logout(self, token):
         if token:
-            requests.delete(
+            transport.delete(
                 url=self._gen_url("/sessions", True),
                 headers={"Grpc-Metadata-Token": token},
                 verify=False
             )
 
+    def get_token(self):
+        return token_broker.get(self.token_key, self.login, ttl=TOKEN_TTL, release=self.logout)
+
+    def release(self, token):
+        """
+        Tokens from `get_token` are shared, they are logged out by the token broker at shutdown
+        """
+        pass
+
     def _call_method(self, method, url, **kwargs):
         def c(tk):
-            m = getattr(requests, method)
-            r = m(url, headers={"X-SmartX-Token": tk}, verify=False, **kwargs)
+            r = transport.request(method, url, headers={"X-SmartX-Token": tk}, verify=False, **kwargs)
+            if r.status_code == 401:
+                raise TokenExpired(r.text)
             r.raise_for_status()
             return r.json()
 
         token = kwargs.pop("token", None)
         if not token:
-            token = self.get_token()
-            try:
-                return c(token)
-            finally:
-                self.release(token)
+            return token_broker.call(self.token_key, self.login, c, ttl=TOKEN_TTL, release=self.logout)
         else:
             return c(token)
 
@@ -109,11 +122,10 @@ class Helper(object):
         return r.get("data")
 
     def __enter__(self):
-        self._token = self.client.get_token()
+        # requests get the shared token of the user from the token broker (`self._token` stays empty)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.client.release(self._token)
         self._token = None
 
     def get_job(self, job_id):
@@ -1,12 +1,18 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
-import requests
 import time
+from cloudchef_integration.tasks.cloud_resources.commoncloud.transport import transport
+from cloudchef_integration.tasks.cloud_resources.commoncloud.tokens import token_broker, token_key, TokenExpired
+from cloudchef_integration.tasks.cloud_resources.commoncloud.paginator import OffsetPaginator
+from cloudchef_integration.tasks.cloud_resources.commoncloud.clients import client_key
 from cloudchef_integration.tasks.cloud_resources.commoncloud.response import convert_response
 from cloudchef_integration.tasks.cloud_resources.smartx.response import SmartXStandardResponse
 from cloudchef_integration.tasks.cloud_resources.commoncloud.params import convert_params, EmptyDesc
 from cloudchef_integration.tasks.cloud_resources.smartx.params import VolumeDesc
 
+TOKEN_TTL = 30 * 60
+PAGE_SIZE = 100
+
 
 class Connection(object):
 
@@ -29,8 +35,12 @@ class Connection(object):
             path=path
         )
 
-    def get_token(self):
-        res = requests.post(
+    @property
+    def token_key(self):
+        return token_key(self._gen_url("/sessions", True), self.username, self.password)
+
+    def login(self):
+        res = transport.post(
             url=self._gen_url("/sessions", True),
             json={"username": self.username, "password": self.password},
             verify=False
@@ -38,14 +48,39 @@ class Connection(object):
         res.raise_for_status()
         return res.json()["token"]
 
-    def release(self, token):
+    def logout(self, token):
         if token:
-            requests.delete(
+            transport.delete(
                 url=self._gen_url("/sessions", True),
                 headers={"Grpc-Metadata-Token": token},
                 verify=False
             )
 
+    def get_token(self, refresh=False):
+        """
+        Shared token of this user, `refresh` logs in again (e.g. to validate the credentials)
+        """
+        if refresh:
+            token_broker.invalidate(self.token_key)
+        return token_broker.get(self.token_key, self.login, ttl=TOKEN_TTL, release=self.logout)
+
+    def release(self, token):
+        """
+        Tokens from `get_token` are shared, they are logged out by the token broker at shutdown
+        """
+        pass
+
+    def _request(self, method, path, token, verify, kwargs):
+        headers = {
+            'X-SmartX-Token': token
+        }
+        url = self._gen_url(path)
+        rep = transport.request(method, url, headers=headers, json=kwargs, verify=verify)
+        if rep.status_code == 401:
+            raise TokenExpired(rep.text)
+        rep.raise_for_status()
+        return rep.json()
+
     def common_request(self, method, path="", token="", verify=False, **kwargs):
         """
         :param method: get | post | put | delete type: string
@@ -56,21 +91,19 @@ class Connection(object):
         :param success_code: eg:[200], type: list
         :return:
         """
-        if not token:
-            token = self.get_token()
-        headers = {
-            'X-SmartX-Token': token
-        }
-        url = self._gen_url(path)
-        rep = requests.request(method, url, headers=headers, json=kwargs, verify=verify)
-        rep.raise_for_status()
-        return rep.json()
+        if token:
+            return self._request(method, path, token, verify, kwargs)
+        return token_broker.call(self.token_key, self.login,
+                                 lambda tk: self._request(method, path, tk, verify, kwargs),
+                                 ttl=TOKEN_TTL, release=self.logout)
 
 
 class Client(object):
     def __init__(self, connection):
         self.conn = connection
         self._token = None
+        self.memo_key = client_key("smartx", None, "{}:{}".format(connection.host, connection.port),
+                                   connection.username, connection.password)
 
     @staticmethod
     def check_r(r):
@@ -79,16 +112,26 @@ class Client(object):
         return r.get("data")
 
     def __enter__(self):
-        self._token = self.conn.get_token()
+        # requests get the shared token of the user from the token broker (`self._token` stays empty)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.conn.release(self._token)
         self._token = None
 
     def get_job(self, job_id):
         return self.check_r(self.conn.common_request("get", "/jobs/{}".format(job_id), token=self._token))["job"]
 
+    def list_entities(self, path, limit=PAGE_SIZE):
+        """
+        `entities` of every page of a v2 list API (`skip`/`count` with `total`)
+        """
+        def fetch(skip, count):
+            data = self.check_r(self.conn.common_request(
+                "get", "{}?skip={}&count={}".format(path, skip, count), token=self._token))
+            return data.get('entities', []), data.get('total')
+
+        return OffsetPaginator(fetch, limit=limit).all()
+
     def wait_job(self, job_id):
         job = self.get_job(job_id)
         while job["state"] not in ("done", "failed"):
@@ -104,12 +147,12 @@ class Client(object):
     @convert_params(EmptyDesc.Schema)
     @convert_response(SmartXStandardResponse.subnet)
     def list_networks(self, params):
-        return self.check_r(self.conn.common_request("get", "/network/vm_vlans/search", token=self._token))['entities']
+        return self.list_entities("/network/vm_vlans/search")
 
     @convert_params(EmptyDesc.Schema)
     @convert_response(SmartXStandardResponse.image)
     def list_templates(self, params):
-        return self.check_r(self.conn.common_request("get", "/vm_templates", token=self._token)).get('entities', [])
+        return self.list_entities("/vm_templates")
 
     @convert_params(EmptyDesc.Schema)
     @convert_response(SmartXStandardResponse.storage_policy)
@@ -119,12 +162,12 @@ class Client(object):
     @convert_params(EmptyDesc.Schema)
     @convert_response(SmartXStandardResponse.volume)
     def list_volumes(self, params):
-        return self.check_r(self.conn.common_request("get", "/volumes", token=self._token)).get('entities', [])
+        return self.list_entities("/volumes")
 
     @convert_params(EmptyDesc.Schema)
     @convert_response(SmartXStandardResponse.instance)
     def list_vms(self, params):
-        return self.check_r(self.conn.common_request("get", "/vms", token=self._token)).get('entities', [])
+        return self.list_entities("/vms")
 
     @convert_params(VolumeDesc.Schema)
     @convert_response(SmartXStandardResponse.vm_volume)
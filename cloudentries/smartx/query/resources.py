@@ -25,7 +25,7 @@ class SmartXResource(object):
     @common_params(Params.EmptyDesc.Schema)
     @common_response(Resp.Validation.Schema)
     def validation(self):
-        self.conn.get_token()
+        self.conn.get_token(refresh=True)
         return []
 
     @common_params(Params.EmptyDesc.Schema)
@@ -156,8 +156,4 @@ class SmartXFilterResponse(FilterResponse):
         volume_category = params.get('volume_category', "")
         if not volume_category or volume_category != "data":
             return resp
-        aim = []
-        for dct in resp:
-            if dct.get("Category") == "data":
-                aim.append(dct)
-        return aim
+        return cls.select(resp, lambda dct: dct.get("Category") == "data")
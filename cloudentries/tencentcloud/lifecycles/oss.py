@@ -31,7 +31,7 @@ class Oss(CommonOss, Base):
                 'Bucket': bucket_name
             }
             try:
-                OssHelper().delete_bucket(request_body)
+                OssHelper().teardown_bucket(request_body)
             except Exception as e:
                 ctx.logger.info('Delete bucket failed...Messages:{}'.format(e))
         clear_runtime_properties()
@@ -0,0 +1,24 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+from abstract_plugin.platforms.common.poller import batch_poller
+from abstract_plugin.platforms.tencentcloud.models import model_to_dict
+
+# largest `Limit` of the Describe* APIs, and the largest number of ids they filter
+MAX_BATCH = 100
+
+
+def resource_poller(helper, resource_type, func, req_class):
+    """
+    The poller of the `resource_type` (a key of `Helper.resource_mappers`) waits of the account and region:
+    the ids of the concurrent waits are described by one `func` call
+    """
+    mapper = helper.resource_mappers()[resource_type]
+
+    def describe(resource_ids):
+        request_body = {mapper['Ids']: resource_ids, 'Limit': MAX_BATCH}
+        resources = getattr(helper._execute_request(func, req_class, **request_body), mapper['Set']) or []
+        return dict((resource[mapper['Id']], resource) for resource in model_to_dict(resources))
+
+    return batch_poller("tencentcloud-" + resource_type, helper.region, None,
+                        helper.connection_config.get('access_key_id'),
+                        helper.connection_config.get('access_key_secret'), describe, MAX_BATCH)
@@ -1,10 +1,12 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
 import time
-import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from tencentcloud.common import credential
 from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
+from tencentcloud.common.profile.client_profile import ClientProfile
+from tencentcloud.common.profile.http_profile import HttpProfile
 
 from tencentcloud.cvm.v20170312 import cvm_client
 from tencentcloud.cvm.v20170312.models import (
@@ -60,7 +62,30 @@ from cloudify import ctx
 from cloudify.exceptions import NonRecoverableError
 from cloudify.utils import decrypt_password
 from abstract_plugin.platforms.tencentcloud import constants
+from abstract_plugin.platforms.tencentcloud.models import model_to_dict
+from abstract_plugin.platforms.tencentcloud.poller import resource_poller
 from abstract_plugin.platforms.common.connector import Connector
+from abstract_plugin.platforms.common.clients import client_cache, client_key
+from abstract_plugin.platforms.common.poller import backoff_intervals, PollTimeout
+
+# the polls of the waits started together (e.g. a scale out) are spread by +/- 20%
+WAIT_JITTER = 0.2
+# the target status of a reboot, resize, image creation or snapshot rollback is also the status before it:
+# these waits check the status once the action has started only
+ACTION_START_SECONDS = 15
+# keys per DeleteObjects call and per page of the COS listings
+COS_BATCH = 1000
+COS_DELETE_WORKERS = 16
+COS_PROGRESS_EVERY = 10000
+
+
+def client_profile():
+    """
+    Keep-alive HTTP connections: the SDK opens a connection per request by default
+    """
+    http_profile = HttpProfile()
+    http_profile.keepAlive = True
+    return ClientProfile(httpProfile=http_profile)
 
 
 class Helper(Connector):
@@ -71,6 +96,18 @@ class Helper(Connector):
             decrypt_password(self.connection_config.get('access_key_secret')))
         self.region = self.resource_config.get("region")
 
+    def get_client(self, service, factory):
+        """
+        The client is shared with the other helpers of this (service, region, access key): its HTTP session
+        keeps the connections to the service endpoint alive between the calls
+        """
+        key = client_key("tencentcloud-" + service, self.region, None, self.connection_config.get('access_key_id'),
+                         self.connection_config.get('access_key_secret'))
+        return client_cache.get(key, factory)
+
+    def get_sdk_client(self, service, client_class):
+        return self.get_client(service, lambda: client_class(self.cred, self.region, client_profile()))
+
     def _execute_request(self, func, request_class, **kwargs):
         try:
             req = request_class()
@@ -85,14 +122,14 @@ class Helper(Connector):
     @staticmethod
     def resource_mappers():
         mappers = {
-            "Disk": {'Ids': 'DiskIds', 'Set': 'DiskSet'},
-            'Instance': {'Ids': 'InstanceIds', 'Set': 'InstanceSet'},
-            'Vpc': {'Ids': 'VpcIds', 'Set': 'VpcSet'},
-            'Subnet': {'Ids': 'SubnetIds', 'Set': 'SubnetSet'},
-            'SecurityGroup': {'Ids': 'SecurityGroupIds', 'Set': 'SecurityGroupSet'},
-            'Image': {'Ids': 'ImageIds', 'Set': 'ImageSet'},
-            'Snapshot': {'Ids': 'SnapshotIds', 'Set': 'SnapshotSet'},
-            'Eip': {'Ids': 'AddressIds', 'Set': 'AddressSet'}
+            "Disk": {'Ids': 'DiskIds', 'Set': 'DiskSet', 'Id': 'DiskId'},
+            'Instance': {'Ids': 'InstanceIds', 'Set': 'InstanceSet', 'Id': 'InstanceId'},
+            'Vpc': {'Ids': 'VpcIds', 'Set': 'VpcSet', 'Id': 'VpcId'},
+            'Subnet': {'Ids': 'SubnetIds', 'Set': 'SubnetSet', 'Id': 'SubnetId'},
+            'SecurityGroup': {'Ids': 'SecurityGroupIds', 'Set': 'SecurityGroupSet', 'Id': 'SecurityGroupId'},
+            'Image': {'Ids': 'ImageIds', 'Set': 'ImageSet', 'Id': 'ImageId'},
+            'Snapshot': {'Ids': 'SnapshotIds', 'Set': 'SnapshotSet', 'Id': 'SnapshotId'},
+            'Eip': {'Ids': 'AddressIds', 'Set': 'AddressSet', 'Id': 'AddressId'}
         }
         return mappers
 
@@ -101,7 +138,7 @@ class Helper(Connector):
         return True if disk['DiskType'] in disk_types else False
 
     def get_instance_disks(self, instance_id, include_system=True):
-        self.cvm_client = cvm_client.CvmClient(self.cred, self.region)
+        self.cvm_client = self.get_sdk_client("cvm", cvm_client.CvmClient)
         instance = self.list_resources(
             self.cvm_client.DescribeInstances, DescribeInstancesRequest, 'Instance', ids=[instance_id])[0]
         system_disk = instance['SystemDisk']
@@ -122,44 +159,64 @@ class Helper(Connector):
 
         resources = getattr(self._execute_request(func, req_class, **request_body), set_key)
         for i in range(len(resources)):
-            resources[i] = json.loads(resources[i].to_json_string())
+            resources[i] = model_to_dict(resources[i])
         return resources
 
-    def wait_for_target_statuses(
-            self, resource_type, resource_id, func, req_class, statuses, status_key=None, timeout=600, interval=15):
-        ctx.logger.debug(
-            'Wait for {} {} status to be {}, timeout is {} seconds.'.format(
-                resource_type, resource_id, statuses, timeout))
-        remain_times = timeout
-        while remain_times:
-            time.sleep(interval)
-            resources = self.list_resources(func, req_class, resource_type, [resource_id])
-            current_status = None
-            if resources:
-                if not status_key:
-                    status_key = resource_type + 'State'
-                current_status = resources[0][status_key]
-                if current_status in statuses:
-                    return resources[0]
-
-            remain_times -= interval
-
-            if resource_type == 'Snapshot' and resources:
+    def wait_for_resource(self, resource_type, resource_id, func, req_class, is_done, description,
+                          status_key=None, timeout=600, interval=15, first_delay=0):
+        """
+        Describe the resource until `is_done(resource)` (resource is None once deleted), return it.
+        The first check is `first_delay` seconds after the call, then the polls back off up to `interval`
+        seconds and are batched with the concurrent waits on the same resource type if BATCH_POLLING is set,
+        see `poller`
+        """
+        status_key = status_key or resource_type + 'State'
+        ctx.logger.debug('Wait for {} {} to be {}, timeout is {} seconds.'.format(
+            resource_type, resource_id, description, timeout))
+        poller = resource_poller(self, resource_type, func, req_class)
+        intervals = backoff_intervals(interval, jitter=WAIT_JITTER)
+        deadline = time.time() + timeout
+        delay = first_delay
+        while True:
+            remaining = max(deadline - time.time(), 0)
+            try:
+                resource = poller.poll(resource_id, min(delay, remaining), remaining)
+            except PollTimeout:
+                raise NonRecoverableError('Wait for {} {} to be {} failed after {} seconds.'.format(
+                    resource_type, resource_id, description, timeout))
+            if is_done(resource):
+                return resource
+            current_status = resource.get(status_key) if resource else None
+            if resource_type == 'Snapshot' and resource:
                 ctx.logger.debug(
-                    'Wait for {} {} status to be {}, current status: {}, current percent: {}%.'.format(
-                        resource_type, resource_id, statuses, current_status, resources[0]['Percent']))
+                    'Wait for {} {} to be {}, current status: {}, current percent: {}%.'.format(
+                        resource_type, resource_id, description, current_status, resource.get('Percent')))
             else:
                 ctx.logger.debug(
-                    'Wait for {} {} status to be {}, current status: {}.'.format(
-                        resource_type, resource_id, statuses, current_status))
-        raise NonRecoverableError('Wait for {} {} to be {} failed after {} seconds.'.format(
-            resource_type, resource_id, statuses, timeout))
+                    'Wait for {} {} to be {}, current status: {}.'.format(
+                        resource_type, resource_id, description, current_status))
+            if time.time() >= deadline:
+                raise NonRecoverableError('Wait for {} {} to be {} failed after {} seconds.'.format(
+                    resource_type, resource_id, description, timeout))
+            delay = next(intervals)
+
+    def wait_for_target_statuses(self, resource_type, resource_id, func, req_class, statuses, status_key=None,
+                                 timeout=600, interval=15, first_delay=0):
+        status_key = status_key or resource_type + 'State'
+        return self.wait_for_resource(
+            resource_type, resource_id, func, req_class,
+            lambda resource: resource is not None and resource.get(status_key) in statuses, statuses,
+            status_key=status_key, timeout=timeout, interval=interval, first_delay=first_delay)
+
+    def wait_for_deleted(self, resource_type, resource_id, func, req_class, timeout=600, interval=15):
+        self.wait_for_resource(resource_type, resource_id, func, req_class, lambda resource: resource is None,
+                               'deleted', timeout=timeout, interval=interval)
 
 
 class NetworkHelper(Helper):
     def __init__(self):
         super(NetworkHelper, self).__init__()
-        self.client = vpc_client.VpcClient(self.cred, self.region)
+        self.client = self.get_sdk_client("vpc", vpc_client.VpcClient)
 
     def list_vpcs(self, ids=None):
         return self.list_resources(self.client.DescribeVpcs, DescribeVpcsRequest, 'Vpc', ids)
@@ -172,17 +229,16 @@ class NetworkHelper(Helper):
             self.client.DescribeSecurityGroups, DescribeSecurityGroupsRequest, 'SecurityGroup', ids)
 
     def create_securitygroup_with_policies(self, request_body):
-        securitygroup_info = json.loads(
+        securitygroup_info = model_to_dict(
             self._execute_request(self.client.CreateSecurityGroupWithPolicies, CreateSecurityGroupWithPoliciesRequest,
-                                  **request_body).to_json_string())['SecurityGroup']
+                                  **request_body).SecurityGroup)
         return securitygroup_info
 
     def delete_securitygroup(self, request_body):
         self._execute_request(self.client.DeleteSecurityGroup, DeleteSecurityGroupRequest, **request_body)
 
     def create_vpc(self, request_body):
-        vpc_info = json.loads(
-            self._execute_request(self.client.CreateVpc, CreateVpcRequest, **request_body).to_json_string())['Vpc']
+        vpc_info = model_to_dict(self._execute_request(self.client.CreateVpc, CreateVpcRequest, **request_body).Vpc)
 
         return vpc_info
 
@@ -190,9 +246,8 @@ class NetworkHelper(Helper):
         self._execute_request(self.client.DeleteVpc, DeleteVpcRequest, **request_body)
 
     def create_subnet(self, request_body):
-        subnet_info = json.loads(
-            self._execute_request(self.client.CreateSubnet, CreateSubnetRequest, **request_body).to_json_string())[
-            'Subnet']
+        subnet_info = model_to_dict(
+            self._execute_request(self.client.CreateSubnet, CreateSubnetRequest, **request_body).Subnet)
 
         return subnet_info
 
@@ -233,7 +288,7 @@ class VolumeHelper(Helper):
 
     def __init__(self):
         super(VolumeHelper, self).__init__()
-        self.client = cbs_client.CbsClient(self.cred, self.region)
+        self.client = self.get_sdk_client("cbs", cbs_client.CbsClient)
 
     def create_snapshot(self, name, instance_id):
         disks = self.get_instance_disks(instance_id)
@@ -271,7 +326,8 @@ class VolumeHelper(Helper):
             request_body = {'DiskId': snapshot['DiskId'], 'SnapshotId': snapshot['SnapshotId']}
             self._execute_request(self.client.ApplySnapshot, ApplySnapshotRequest, **request_body)
             self.wait_for_target_statuses(
-                'Snapshot', snapshot['SnapshotId'], self.client.DescribeSnapshots, DescribeSnapshotsRequest, ['NORMAL'])
+                'Snapshot', snapshot['SnapshotId'], self.client.DescribeSnapshots, DescribeSnapshotsRequest, ['NORMAL'],
+                first_delay=ACTION_START_SECONDS)
 
     def create_disk(self, request_body):
         disk_id = self._execute_request(self.client.CreateDisks, CreateDisksRequest, **request_body).DiskIdSet[0]
@@ -333,14 +389,15 @@ class VolumeHelper(Helper):
 class ComputeHelper(Helper):
     def __init__(self):
         super(ComputeHelper, self).__init__()
-        self.client = cvm_client.CvmClient(self.cred, self.region)
+        self.client = self.get_sdk_client("cvm", cvm_client.CvmClient)
 
     def create_image(self, name, instance_id):
         request_body = {'ImageName': name, 'InstanceId': instance_id}
         image_id = self._execute_request(self.client.CreateImage, CreateImageRequest, **request_body).ImageId
         self.wait_for_target_statuses(
             'Instance', instance_id, self.client.DescribeInstances,
-            DescribeInstancesRequest, [constants.SUCCESS], status_key='LatestOperationState')
+            DescribeInstancesRequest, [constants.SUCCESS], status_key='LatestOperationState',
+            first_delay=ACTION_START_SECONDS)
         return self.list_resources(self.client.DescribeImages, DescribeImagesRequest, 'Image', [image_id])[0]
 
     def delete_image(self, image_ids):
@@ -381,12 +438,7 @@ class ComputeHelper(Helper):
         disks = self.get_instance_disks(instance_id, include_system=False)
         disk_ids = [disk['DiskId'] for disk in disks]
         self._execute_request(self.client.TerminateInstances, TerminateInstancesRequest, **request_body)
-        instances = self.list_resources(
-            self.client.DescribeInstances, DescribeInstancesRequest, 'Instance', ids=[instance_id])
-        while instances:
-            instances = self.list_resources(
-                self.client.DescribeInstances, DescribeInstancesRequest, 'Instance', ids=[instance_id])
-            time.sleep(1)
+        self.wait_for_deleted('Instance', instance_id, self.client.DescribeInstances, DescribeInstancesRequest)
         if disk_ids:
             VolumeHelper().delete_disks(disk_ids)
 
@@ -394,7 +446,8 @@ class ComputeHelper(Helper):
         request_body = {'InstanceIds': [instance_id]}
         self._execute_request(self.client.RebootInstances, RebootInstancesRequest, **request_body)
         self.wait_for_target_statuses(
-            'Instance', instance_id, self.client.DescribeInstances, DescribeInstancesRequest, [constants.RUNNING])
+            'Instance', instance_id, self.client.DescribeInstances, DescribeInstancesRequest, [constants.RUNNING],
+            first_delay=ACTION_START_SECONDS)
 
     def get_instance(self, instance_id):
         instances = self.list_resources(
@@ -413,7 +466,7 @@ class ComputeHelper(Helper):
         request_body = {'InstanceIds': [instance_id], 'InstanceType': instance_type}
         self._execute_request(self.client.ResetInstancesType, ResetInstancesTypeRequest, **request_body)
         self.wait_for_target_statuses('Instance', instance_id, self.client.DescribeInstances, DescribeInstancesRequest,
-                                      [constants.SUCCESS], 'LatestOperationState')
+                                      [constants.SUCCESS], 'LatestOperationState', first_delay=ACTION_START_SECONDS)
 
     def associate_securitygroup(self, instance_id, sg_id):
         request_body = {
@@ -428,7 +481,7 @@ class OssHelper(Helper):
         super(OssHelper, self).__init__()
         self.conf = CosConfig(SecretId=getattr(self.cred, 'secretId'), SecretKey=getattr(self.cred, 'secretKey'),
                               Region=self.region)
-        self.client = CosS3Client(self.conf)
+        self.client = self.get_client("cos", lambda: CosS3Client(self.conf))
 
     def create_bucket(self, request_body):
         self.client.create_bucket(
@@ -438,3 +491,85 @@ class OssHelper(Helper):
     def delete_bucket(self, request_body):
         self.client.delete_bucket(
             Bucket=request_body.get('Bucket'))
+
+    def teardown_bucket(self, request_body, max_workers=COS_DELETE_WORKERS):
+        """
+        Empty the bucket, then delete it
+        """
+        self.empty_bucket(request_body.get('Bucket'), max_workers)
+        self.delete_bucket(request_body)
+
+    def empty_bucket(self, bucket, max_workers=COS_DELETE_WORKERS):
+        """
+        Delete every object version (the current objects too) and delete marker, and abort the incomplete
+        multipart uploads of the bucket. The listing pages are deleted by `DeleteObjects` calls of up to 1000
+        keys on `max_workers` threads while the next pages are listed
+        """
+        deleted, failed = [0], []
+
+        def collect(futures, pending_limit):
+            while len(futures) > pending_limit:
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    count, errors = future.result()
+                    failed.extend(errors)
+                    if (deleted[0] + count) // COS_PROGRESS_EVERY > deleted[0] // COS_PROGRESS_EVERY:
+                        ctx.logger.info('Emptying bucket {}: {} objects deleted.'.format(bucket, deleted[0] + count))
+                    deleted[0] += count
+            return futures
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            futures = set()
+            for objects in self._cos_pages(self.client.list_objects_versions,
+                                           {'KeyMarker': 'NextKeyMarker', 'VersionIdMarker': 'NextVersionIdMarker'},
+                                           ('Version', 'DeleteMarker'), Bucket=bucket, MaxKeys=COS_BATCH):
+                if objects:
+                    futures.add(executor.submit(self._delete_objects, bucket, objects))
+                    futures = collect(futures, max_workers * 2)
+            for uploads in self._cos_pages(self.client.list_multipart_uploads,
+                                           {'KeyMarker': 'NextKeyMarker', 'UploadIdMarker': 'NextUploadIdMarker'},
+                                           ('Upload',), Bucket=bucket, MaxUploads=COS_BATCH):
+                for upload in uploads:
+                    futures.add(executor.submit(self._abort_multipart_upload, bucket, upload))
+                futures = collect(futures, max_workers * 2)
+            collect(futures, 0)
+        ctx.logger.info('Emptied bucket {}: {} objects deleted.'.format(bucket, deleted[0]))
+        if failed:
+            raise NonRecoverableError('Delete objects of bucket {} failed: {}'.format(bucket, failed[:10]))
+
+    def _delete_objects(self, bucket, objects):
+        delete = []
+        for item in objects:
+            key = {'Key': item['Key']}
+            if item.get('VersionId'):
+                key['VersionId'] = item['VersionId']
+            delete.append(key)
+        resp = self.client.delete_objects(Bucket=bucket, Delete={'Object': delete, 'Quiet': 'true'}) or {}
+        errors = _as_list(resp.get('Error'))
+        return len(delete) - len(errors), errors
+
+    def _abort_multipart_upload(self, bucket, upload):
+        self.client.abort_multipart_upload(Bucket=bucket, Key=upload['Key'], UploadId=upload['UploadId'])
+        return 0, []
+
+    @staticmethod
+    def _cos_pages(method, markers, item_keys, **kwargs):
+        """
+        Pages of a COS listing, `markers`: the marker params of the request -> the `Next*` fields of the response
+        """
+        params = dict(kwargs)
+        while True:
+            resp = method(**params)
+            yield [item for key in item_keys for item in _as_list(resp.get(key))]
+            if str(resp.get('IsTruncated')).lower() != 'true':
+                return
+            params.update((param, resp.get(next_key)) for param, next_key in list(markers.items()))
+
+
+def _as_list(value):
+    """
+    The COS SDK decodes XML: a list with one element may come as the element
+    """
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
@@ -1,6 +1,5 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
-import json
 import uuid
 
 from cloudify import ctx
@@ -11,6 +10,7 @@ from tencentcloud.cbs.v20170312.models import (
 
 from abstract_plugin.platforms.common.utils import validate_parameter, clear_runtime_properties
 from abstract_plugin.platforms.common.volume import CommonVolume
+from abstract_plugin.platforms.tencentcloud.models import model_to_dict
 from abstract_plugin.platforms.tencentcloud.restclient import VolumeHelper
 from abstract_plugin.platforms.tencentcloud.utils import Base
 from abstract_plugin.platforms.common.constants import EXTERNAL_ID
@@ -39,7 +39,7 @@ class Volume(CommonVolume, Base):
         if not convert2bool(ctx.node.properties['resource_config'].get('is_system_disk')):
             return False
         instance_id = ctx.instance.relationships[0].target.instance.runtime_properties.get('external_id')
-        volume_info = json.loads(VolumeHelper().describe_system_disk(instance_id).to_json_string())
+        volume_info = model_to_dict(VolumeHelper().describe_system_disk(instance_id))
         volume_id = volume_info['DiskId']
         ctx.instance.runtime_properties['disk_info'] = volume_info
         ctx.instance.runtime_properties['volume'] = {'size': volume_info['DiskSize']}
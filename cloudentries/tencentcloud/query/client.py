@@ -1,11 +1,17 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
+import os
 from cloudchef_integration.tasks.cloud_resources.commoncloud.params import convert_params, EmptyDesc
 from cloudchef_integration.tasks.cloud_resources.commoncloud.response import convert_response
+from cloudchef_integration.tasks.cloud_resources.commoncloud.paginator import OffsetPaginator
+from cloudchef_integration.tasks.cloud_resources.commoncloud.ratelimit import rate_limiter
+from cloudchef_integration.tasks.cloud_resources.commoncloud.clients import client_cache, client_key
 from cloudchef_integration.tasks.cloud_resources.tencentcloud.response import TencentStandardResponse
 from cloudchef_integration.tasks.cloud_resources.tencentcloud import params as TencentParams
 from tencentcloud.common import credential
 from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
+from tencentcloud.common.profile.client_profile import ClientProfile
+from tencentcloud.common.profile.http_profile import HttpProfile
 from tencentcloud.cvm.v20170312 import cvm_client
 from tencentcloud.cvm.v20170312.models import (
     DescribeZonesRequest,
@@ -27,10 +33,35 @@ from tencentcloud.cbs.v20170312.models import DescribeDiskConfigQuotaRequest
 from tencentcloud.billing.v20180709 import billing_client
 
 
+# calls per second of the prefetched pages of one API, account and region: the API quotas are 20/s per API
+API_RATE = float(os.environ.get('TENCENT_API_RATE', 20))
+
+
+def client_profile():
+    """
+    Keep-alive HTTP connections: the SDK opens a connection per request by default
+    """
+    http_profile = HttpProfile()
+    http_profile.keepAlive = True
+    return ClientProfile(httpProfile=http_profile)
+
+
 class TencentClient(object):
 
-    def __init__(self, secretId, secretKey):
+    def __init__(self, secretId, secretKey, region=None):
         self.cred = credential.Credential(secretId, secretKey)
+        self.secret_id = secretId
+        self.secret_key = secretKey
+        self.region = region
+        self.memo_key = client_key("tencentcloud", region, None, secretId, secretKey)
+
+    def sdk_client(self, service, client_class):
+        """
+        The `client_class` client of the account and region, shared by the resource queries: its HTTP session
+        keeps the connections to the service endpoint alive between the calls
+        """
+        key = client_key("tencentcloud-" + service, self.region, None, self.secret_id, self.secret_key)
+        return client_cache.get(key, lambda: client_class(self.cred, self.region, client_profile()))
 
     def execute_request(self, func, request_class, **kwargs):
         try:
@@ -41,12 +72,31 @@ class TencentClient(object):
         except TencentCloudSDKException as err:
             raise
 
+    def offset_pages(self, func, request_class, set_name, limit=100, string_paging=False, **kwargs):
+        """
+        Pages of a `Describe*` API with `Offset`/`Limit` and `TotalCount`, the pages after the first one are
+        requested concurrently (`PAGINATOR_PREFETCH`) and yielded in order
+        string_paging: `Optional`; the API types `Offset`/`Limit` as strings (VPC)
+        """
+        limiter = rate_limiter(("tencentcloud", self.secret_id, self.region, request_class.__name__), API_RATE)
+
+        def fetch(offset, page_limit):
+            limiter.acquire()
+            if string_paging:
+                offset, page_limit = str(offset), str(page_limit)
+            resp = self.execute_request(func, request_class, Offset=offset, Limit=page_limit, **kwargs)
+            return getattr(resp, set_name) or [], resp.TotalCount
+
+        kwargs.pop('Offset', None)
+        kwargs.pop('Limit', None)
+        return OffsetPaginator(fetch, limit=int(limit or 100)).pages()
+
 
 class ComputeTencentClient(TencentClient):
 
     def __init__(self, secretId, secretKey, region):
-        super(ComputeTencentClient, self).__init__(secretId, secretKey)
-        self.client = cvm_client.CvmClient(self.cred, region)
+        super(ComputeTencentClient, self).__init__(secretId, secretKey, region)
+        self.client = self.sdk_client("cvm", cvm_client.CvmClient)
 
     @convert_params(EmptyDesc.Schema)
     @convert_response(TencentStandardResponse.region)
@@ -63,6 +113,15 @@ class ComputeTencentClient(TencentClient):
     def list_instances(self, params):
         return self.execute_request(self.client.DescribeInstances, DescribeInstancesRequest, **params).InstanceSet
 
+    @convert_params(TencentParams.InstanceDesc.Schema, convert_method=TencentParams.TencentConvertParams)
+    @convert_response(TencentStandardResponse.instance, stream=True)
+    def iter_instances(self, params):
+        """
+        Yield the `InstanceSet` of each page, the next pages are prefetched once `TotalCount` is known
+        """
+        return self.offset_pages(self.client.DescribeInstances, DescribeInstancesRequest, 'InstanceSet',
+                                 limit=params.get('Limit'), **params)
+
     @convert_params(TencentParams.VncDesc.Schema)
     def instance_vnc_url(self, params):
         return self.execute_request(self.client.DescribeInstanceVncUrl, DescribeInstanceVncUrlRequest,
@@ -77,43 +136,47 @@ class ComputeTencentClient(TencentClient):
     @convert_params(TencentParams.ImageDesc.Schema, convert_method=TencentParams.TencentConvertParams)
     @convert_response(TencentStandardResponse.image)
     def list_images(self, params):
-        return self.execute_request(self.client.DescribeImages, DescribeImagesRequest, **params).ImageSet
+        return [image for page in self.offset_pages(self.client.DescribeImages, DescribeImagesRequest, 'ImageSet',
+                                                    limit=params.get('Limit'), **params) for image in page]
 
 
 class NetworkTencentClient(TencentClient):
 
     def __init__(self, secretId, secretKey, region):
-        super(NetworkTencentClient, self).__init__(secretId, secretKey)
-        self.client = vpc_client.VpcClient(self.cred, region)
+        super(NetworkTencentClient, self).__init__(secretId, secretKey, region)
+        self.client = self.sdk_client("vpc", vpc_client.VpcClient)
 
     @convert_params(TencentParams.SecurityGroupDesc.Schema)
-    @convert_response(TencentStandardResponse.security_group)
+    @convert_response(TencentStandardResponse.security_group, stream=True)
     def list_security_groups(self, params):
-        return self.execute_request(self.client.DescribeSecurityGroups, DescribeSecurityGroupsRequest,
-                                    **params).SecurityGroupSet
+        return self.offset_pages(self.client.DescribeSecurityGroups, DescribeSecurityGroupsRequest,
+                                 'SecurityGroupSet', string_paging=True, **params)
 
     @convert_params(TencentParams.NetworkDesc.Schema, convert_method=TencentParams.TencentConvertParams)
-    @convert_response(TencentStandardResponse.network)
+    @convert_response(TencentStandardResponse.network, stream=True)
     def list_networks(self, params):
-        return self.execute_request(self.client.DescribeVpcs, DescribeVpcsRequest, **params).VpcSet
+        return self.offset_pages(self.client.DescribeVpcs, DescribeVpcsRequest, 'VpcSet', string_paging=True,
+                                 **params)
 
     @convert_params(TencentParams.SubnetDesc.Schema, convert_method=TencentParams.TencentConvertParams)
-    @convert_response(TencentStandardResponse.subnet)
+    @convert_response(TencentStandardResponse.subnet, stream=True)
     def list_subnets(self, params):
-        return self.execute_request(self.client.DescribeSubnets, DescribeSubnetsRequest, **params).SubnetSet
+        return self.offset_pages(self.client.DescribeSubnets, DescribeSubnetsRequest, 'SubnetSet', string_paging=True,
+                                 **params)
 
 
 class DiskTencentClient(TencentClient):
 
     def __init__(self, secretId, secretKey, region):
-        super(DiskTencentClient, self).__init__(secretId, secretKey)
-        self.client = cbs_client.CbsClient(self.cred, region)
-        self.compute_clinet = cvm_client.CvmClient(self.cred, region)
+        super(DiskTencentClient, self).__init__(secretId, secretKey, region)
+        self.client = self.sdk_client("cbs", cbs_client.CbsClient)
+        self.compute_clinet = self.sdk_client("cvm", cvm_client.CvmClient)
 
     @convert_params(TencentParams.DiskDesc.Schema, convert_method=TencentParams.TencentConvertParams)
     @convert_response(TencentStandardResponse.volume)
     def list_volumes(self, params):
-        return self.execute_request(self.client.DescribeDisks, DescribeDisksRequest, **params).DiskSet
+        return [disk for page in self.offset_pages(self.client.DescribeDisks, DescribeDisksRequest, 'DiskSet',
+                                                   **params) for disk in page]
 
     def is_cloud_disk(self, disk):
         disk_types = ('CLOUD_BASIC', 'CLOUD_SSD', 'CLOUD_PREMIUM')
@@ -139,10 +202,11 @@ class DiskTencentClient(TencentClient):
         return {"Filters": [filter]}
 
     @convert_params(EmptyDesc.Schema)
-    @convert_response(TencentStandardResponse.snapshot)
+    @convert_response(TencentStandardResponse.snapshot, stream=True)
     def list_snapshots(self, params):
         query_params = self.prepare_snapshots_filters(params.get('InstanceId'))
-        return self.execute_request(self.client.DescribeSnapshots, DescribeSnapshotsRequest, **query_params).SnapshotSet
+        return self.offset_pages(self.client.DescribeSnapshots, DescribeSnapshotsRequest, 'SnapshotSet',
+                                 **query_params)
 
     @convert_params(TencentParams.VolumeTypeDesc.Schema)
     @convert_response(TencentStandardResponse.volume_type)
@@ -154,7 +218,7 @@ class DiskTencentClient(TencentClient):
 class AccountTencentClient(TencentClient):
     def __init__(self, secretId, secretKey):
         super(AccountTencentClient, self).__init__(secretId, secretKey)
-        self.client = billing_client.BillingClient(self.cred, None)
+        self.client = self.sdk_client("billing", billing_client.BillingClient)
 
     @convert_params(TencentParams.BalanceDesc.Schema)
     @convert_response(TencentStandardResponse.balance)
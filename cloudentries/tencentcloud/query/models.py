@@ -0,0 +1,42 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+from tencentcloud.common.abstract_model import AbstractModel
+
+# SDK model class -> tuple of (attribute, key), read from a new instance: the models declare every field
+# in `__init__`, newer SDKs as `_Field` behind a property
+_fields = {}
+
+
+def _model_fields(model_class):
+    fields = _fields.get(model_class)
+    if fields is None:
+        try:
+            names = list(vars(model_class()))
+        except TypeError:
+            names = []
+        fields = _fields[model_class] = tuple((name, name[1:] if name.startswith('_') else name) for name in names)
+    return fields
+
+
+def model_to_dict(value):
+    """
+    `json.loads(model.to_json_string())` without the JSON round trip: the same keys, None fields are dropped,
+    lists and nested models are converted
+    """
+    if isinstance(value, list):
+        return [model_to_dict(item) for item in value]
+    if not isinstance(value, AbstractModel):
+        return value
+    attrs = vars(value)
+    fields = _model_fields(type(value))
+    if not fields or len(attrs) > len(fields):  # attributes which the class does not declare
+        fields = tuple((name, name[1:] if name.startswith('_') else name) for name in attrs)
+    result = {}
+    for name, key in fields:
+        item = attrs.get(name)
+        if item is None:
+            continue
+        if isinstance(item, (AbstractModel, list)):
+            item = model_to_dict(item)
+        result[key] = item
+    return result
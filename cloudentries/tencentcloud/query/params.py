@@ -1,6 +1,7 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
 from cloudchef_integration.tasks.cloud_resources.commoncloud.params import ParamType, BasicSchema, ConvertParams
+from cloudchef_integration.tasks.cloud_resources.commoncloud.pushdown import FilterPlanner, Pushdown
 
 
 class TencentConvertParams(ConvertParams):
@@ -69,6 +70,7 @@ class TencentConvertParams(ConvertParams):
 class ImageDesc(object):
     Schema = {
         "image-id": BasicSchema.filter_schema(raw_key="resource_id", filter_name="image-id"),
+        "platform": BasicSchema.filter_schema(raw_key="platform", filter_name="platform"),
         "Limit": BasicSchema.schema(raw_key="Limit", value=100)
     }
 
@@ -144,3 +146,16 @@ class BalanceDesc(object):
     Schema = {
 
     }
+
+
+def windows_condition(params):
+    # `platform` cannot express "not windows", linux images are filtered client-side only
+    if (params.get('osType') or '').lower() != 'windows':
+        return None
+    return {"platform": "Windows"}
+
+
+# filters of `FilterResponse` sent as `Filters`, see `TencentResource`
+filter_planner = FilterPlanner({
+    "filter_os_type": Pushdown(windows_condition, exact=False)
+})
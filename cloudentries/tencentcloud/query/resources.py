@@ -11,6 +11,7 @@ from cloudchef_integration.tasks.cloud_resources.tencentcloud.client import Comp
 from cloudchef_integration.tasks.cloud_resources.tencentcloud.client import NetworkTencentClient
 from cloudchef_integration.tasks.cloud_resources.tencentcloud.client import DiskTencentClient
 from cloudchef_integration.tasks.cloud_resources.tencentcloud.client import AccountTencentClient
+from cloudchef_integration.tasks.cloud_resources.tencentcloud.params import filter_planner
 
 from cloudchef_integration.tasks.cloud_resources.tencentcloud import constants
 
@@ -47,16 +48,7 @@ class TencentResource(object):
     @common_response(Resp.Instance.Schema)
     def instance(self):
         client = ComputeTencentClient(self.secretId, self.secretKey, self.region_name)
-        instances = []
-        offset = 0
-        while True:
-            self.query_params.update({"Offset": offset * 100})
-            resp = client.list_instances(self.query_params)
-            instances.extend(resp)
-            if len(resp) < 100:
-                break
-            offset += 1
-        return instances
+        return client.iter_instances(self.query_params)
 
     @common_params(Params.Firewall.Schema)
     @common_response(Resp.Firewall.Schema)
@@ -82,7 +74,7 @@ class TencentResource(object):
     @filter_output(FilterResponse.filter_os_type)
     def image(self):
         client = ComputeTencentClient(self.secretId, self.secretKey, self.region_name)
-        return client.list_images(self.query_params)
+        return client.list_images(filter_planner.plan(self, 'image', FilterResponse.filter_os_type))
 
     @common_params(Params.Volume.Schema)
     @common_response(Resp.Volume.Schema)
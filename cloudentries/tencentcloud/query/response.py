@@ -1,7 +1,7 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
-import json
 from cloudchef_integration.tasks.cloud_resources.commoncloud.utils import format_ins_status, format_power_status
+from cloudchef_integration.tasks.cloud_resources.tencentcloud.models import model_to_dict
 
 
 class TencentStandardResponse(object):
@@ -79,12 +79,12 @@ class TencentStandardResponse(object):
                 "Memory": ins.Memory,
                 "CPU": ins.CPU,
                 "ChargeType": ins.InstanceChargeType,
-                "SystemDisk": json.loads(ins.SystemDisk.to_json_string()),
-                "Placement": json.loads(ins.Placement.to_json_string()),
+                "SystemDisk": model_to_dict(ins.SystemDisk),
+                "Placement": model_to_dict(ins.Placement),
                 "PrivateIpAddresses": ins.PrivateIpAddresses,
                 "PublicIpAddresses": ins.PublicIpAddresses,
                 "DataDisks": ins.DataDisks,
-                "VirtualPrivateCloud": json.loads(ins.VirtualPrivateCloud.to_json_string()),
+                "VirtualPrivateCloud": model_to_dict(ins.VirtualPrivateCloud),
                 "PowerState": format_power_status(ins.InstanceState),
                 "InstanceType": ins.InstanceType,
                 "SecurityGroupIds": ins.SecurityGroupIds,
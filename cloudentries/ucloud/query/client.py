@@ -20,9 +20,14 @@ else:
     import http.client
 from cloudchef_integration.tasks.cloud_resources.commoncloud.params import convert_params
 from cloudchef_integration.tasks.cloud_resources.commoncloud.response import convert_response
+from cloudchef_integration.tasks.cloud_resources.commoncloud.paginator import OffsetPaginator
+from cloudchef_integration.tasks.cloud_resources.commoncloud.clients import client_key
 from cloudchef_integration.tasks.cloud_resources.ucloud.response import UcloudStandardResponse
 from cloudchef_integration.tasks.cloud_resources.ucloud import params as UcloudParams
 
+# the Describe* APIs reply 20 rows when `Limit` is not given
+PAGE_SIZE = 100
+
 
 class UConnection(object):
     def __init__(self, base_url, public_key, private_key):
@@ -77,6 +82,23 @@ class UConnection(object):
         response = json.loads(self.conn.getresponse().read())
         return response
 
+    def get_all(self, uri, params, set_name, limit=PAGE_SIZE):
+        """
+        `get` of a Describe* API, `set_name` holds the rows of every page (`Offset`/`Limit` with `TotalCount`)
+        """
+        first_page = {}
+
+        def fetch(offset, page_limit):
+            resp = self.get(uri, dict(params, Offset=offset, Limit=page_limit))
+            first_page.setdefault("resp", resp)
+            return resp.get(set_name, []), resp.get('TotalCount')
+
+        # one `http.client` connection: the pages are requested one by one
+        rows = OffsetPaginator(fetch, limit=limit, prefetch=1).all()
+        resp = dict(first_page["resp"])
+        resp[set_name] = rows
+        return resp
+
     def post(self, uri, params):
         _params = self.verify_ac(params)
         headers = {"Content-Type": "application/json"}
@@ -89,6 +111,7 @@ class UcloudClient(object):
     def __init__(self, base_url, public_key, private_key, region):
         self.region = region
         self.conn = UConnection(base_url, public_key, private_key)
+        self.memo_key = client_key("ucloud", region, base_url, public_key, private_key)
 
     @convert_params(UcloudParams.RegionDesc.Schema)
     @convert_response(UcloudStandardResponse.validation)
@@ -113,7 +136,7 @@ class UcloudClient(object):
     def describe_image(self, params):
         params['Action'] = 'DescribeImage'
         params['Region'] = self.region
-        return self.conn.get('/', params)
+        return self.conn.get_all('/', params, 'ImageSet')
 
     @convert_params(UcloudParams.InstanceDesc.Schema)
     @convert_response(UcloudStandardResponse.instance)
@@ -124,7 +147,7 @@ class UcloudClient(object):
         resp = []
         for zone in zones:
             params['Zone'] = zone
-            ret = self.conn.get('/', params).get('UHostSet', [])
+            ret = self.conn.get_all('/', params, 'UHostSet').get('UHostSet', [])
             if ret:
                 resp.extend(ret)
         return resp
@@ -134,7 +157,7 @@ class UcloudClient(object):
     def describe_snapshot(self, params):
         params['Action'] = 'DescribeUDiskSnapshot'
         params['Region'] = self.region
-        return self.conn.get('/', params)
+        return self.conn.get_all('/', params, 'DataSet')
 
     @convert_response(UcloudStandardResponse.volume_type)
     def volume_type(self, params):
@@ -145,28 +168,28 @@ class UcloudClient(object):
     def describe_disk(self, params):
         params['Action'] = 'DescribeUDisk'
         params['Region'] = self.region
-        return self.conn.get('/', params)
+        return self.conn.get_all('/', params, 'DataSet')
 
     @convert_params(UcloudParams.EipDesc.Schema)
     @convert_response(UcloudStandardResponse.eip)
     def describe_eip(self, params):
         params['Action'] = 'DescribeEIP'
         params['Region'] = self.region
-        return self.conn.get('/', params)
+        return self.conn.get_all('/', params, 'EIPSet')
 
     @convert_params(UcloudParams.FirewallDesc.Schema)
     @convert_response(UcloudStandardResponse.security_group)
     def describe_firewall(self, params):
         params['Action'] = 'DescribeFirewall'
         params['Region'] = self.region
-        return self.conn.get('/', params)
+        return self.conn.get_all('/', params, 'DataSet')
 
     @convert_params(UcloudParams.SubnetDesc.Schema)
     @convert_response(UcloudStandardResponse.subnet)
     def describe_subnet(self, params):
         params['Action'] = 'DescribeSubnet'
         params['Region'] = self.region
-        return self.conn.get('/', params)
+        return self.conn.get_all('/', params, 'DataSet')
 
     @convert_params(UcloudParams.VpcDesc.Schema)
     @convert_response(UcloudStandardResponse.network)
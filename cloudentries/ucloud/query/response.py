@@ -306,8 +306,4 @@ class UcloudFilterResponse(FilterResponse):
         """
         if not params.get('region'):
             return regions
-        aim = []
-        for dct in regions:
-            if dct['Region'] == params.get('region'):
-                aim.append(dct)
-        return aim
+        return cls.select(regions, lambda dct: dct['Region'] == params.get('region'))
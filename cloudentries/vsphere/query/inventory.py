@@ -0,0 +1,192 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from pyVim.connect import Disconnect
+from pyVmomi import vim, vmodl
+
+from .client import VSphereClient
+from cloudchef_integration.tasks.cloud_resources.commoncloud.clients import client_key
+
+# the inventory caches are off unless VSPHERE_INVENTORY_CACHE is set: each keeps a session to its vCenter
+INVENTORY_CACHE_ENABLED = os.environ.get('VSPHERE_INVENTORY_CACHE', '').lower() in ('1', 'true', 'yes')
+# a lookup reads the changes of the vCenter when the last read is older than this
+INVENTORY_REFRESH_SECONDS = float(os.environ.get('VSPHERE_INVENTORY_REFRESH', 5))
+# vCenters with a cache, the least recently used one is closed beyond
+INVENTORY_MAX_CACHES = int(os.environ.get('VSPHERE_INVENTORY_MAX_CACHES', 8))
+# the VM properties tracked by the caches
+VM_PATH_SET = ['name', 'guest.guestState']
+# objects per `RetrievePropertiesEx` page / `WaitForUpdatesEx` update set
+PAGE_SIZE = 1000
+
+_caches = OrderedDict()
+_caches_lock = threading.Lock()
+
+
+def vm_filter_spec(container_view, path_set):
+    """
+    The `path_set` properties of the VMs of `container_view`
+    """
+    traversal_spec = vmodl.query.PropertyCollector.TraversalSpec(
+        name='traverseView', type=vim.view.ContainerView, path='view', skip=False)
+    object_spec = vmodl.query.PropertyCollector.ObjectSpec(
+        obj=container_view, skip=True, selectSet=[traversal_spec])
+    property_spec = vmodl.query.PropertyCollector.PropertySpec(
+        type=vim.VirtualMachine, pathSet=path_set, all=False)
+    return vmodl.query.PropertyCollector.FilterSpec(objectSet=[object_spec], propSet=[property_spec])
+
+
+class InventoryCache(object):
+    """
+    The VM properties of a vCenter in memory: the first read is the full snapshot of a property collector filter,
+    the next reads apply the changes since the last version (`WaitForUpdatesEx` without waiting).
+    A failed read (e.g. the session expired) reconnects and takes a new snapshot. A closed (evicted) cache never
+    reconnects, its lookups return None
+    """
+
+    def __init__(self, config, path_set=VM_PATH_SET, refresh_seconds=INVENTORY_REFRESH_SECONDS):
+        self.config = config
+        self.path_set = path_set
+        self.refresh_seconds = refresh_seconds
+        self.vms = {}
+        self.version = None
+        self.synced_at = None
+        self.syncs = 0
+        self.snapshots = 0
+        self.reconnects = 0
+        self.updates = 0
+        self.closed = False
+        self._si = None
+        self._view = None
+        self._collector = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        self._si = VSphereClient().create_client(self.config)
+        content = self._si.RetrieveContent()
+        self._view = content.viewManager.CreateContainerView(content.rootFolder, [vim.VirtualMachine], True)
+        self._collector = content.propertyCollector.CreatePropertyCollector()
+        self._collector.CreateFilter(vm_filter_spec(self._view, self.path_set), True)
+        self.vms = {}
+        self.version = ""
+
+    def close(self):
+        # set before waiting for the lock: the lookups queued behind a read do not reopen the session
+        self.closed = True
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        si, self._si = self._si, None
+        try:
+            if self._collector is not None:
+                self._collector.Destroy()
+            if self._view is not None:
+                self._view.Destroy()
+        except Exception:
+            pass
+        finally:
+            self._collector = self._view = None
+            self.version = None
+            if si is not None:
+                try:
+                    Disconnect(si)
+                except Exception:
+                    pass
+
+    def _apply(self, update_set):
+        for filter_update in update_set.filterSet or []:
+            for object_update in filter_update.objectSet or []:
+                mo_id = object_update.obj._moId
+                if object_update.kind == 'leave':
+                    self.vms.pop(mo_id, None)
+                    continue
+                properties = {} if object_update.kind == 'enter' else self.vms.setdefault(mo_id, {})
+                for change in object_update.changeSet or []:
+                    if change.op in ('remove', 'indirectRemove'):
+                        properties.pop(change.name, None)
+                    else:
+                        properties[change.name] = change.val
+                self.vms[mo_id] = properties
+                self.updates += 1
+
+    def _sync(self):
+        if self._collector is None:
+            self._open()
+            self.snapshots += 1
+        options = vmodl.query.PropertyCollector.WaitOptions(maxWaitSeconds=0, maxObjectUpdates=PAGE_SIZE)
+        while True:
+            update_set = self._collector.WaitForUpdatesEx(self.version, options)
+            if update_set is None:
+                break
+            self._apply(update_set)
+            self.version = update_set.version
+            if not update_set.truncated:
+                break
+        self.synced_at = time.time()
+        self.syncs += 1
+
+    def refresh(self, force=False):
+        with self._lock:
+            if self.closed:
+                return
+            if not force and self.synced_at is not None and time.time() - self.synced_at < self.refresh_seconds \
+                    and self._collector is not None:
+                return
+            try:
+                self._sync()
+            except Exception:
+                # the session expired or the vCenter restarted: a new session, a new snapshot
+                self._close()
+                self.reconnects += 1
+                self._sync()
+
+    def vm_properties(self):
+        """
+        moId -> {property path: value} of every VM, at most `refresh_seconds` old, None once the cache is closed
+        """
+        self.refresh()
+        with self._lock:
+            return None if self.closed else dict(self.vms)
+
+    def stats(self):
+        """
+        Staleness of the cache: version and age (seconds) of the last read, reads, full snapshots, reconnects and
+        object updates applied. Read without the lock, a read holds it across its SOAP calls
+        """
+        synced_at = self.synced_at
+        return {"objects": len(self.vms), "version": self.version,
+                "age": None if synced_at is None else round(time.time() - synced_at, 3),
+                "syncs": self.syncs, "snapshots": self.snapshots, "reconnects": self.reconnects,
+                "updates": self.updates}
+
+
+def inventory_cache(config):
+    """
+    The cache of the vCenter and user of `config`, None unless VSPHERE_INVENTORY_CACHE is set
+    """
+    if not INVENTORY_CACHE_ENABLED:
+        return None
+    key = client_key("vsphere-inventory", config.get('host'), config.get('port'), config.get('user'),
+                     config.get('password'))
+    evicted = []
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = InventoryCache(config)
+            while len(_caches) > INVENTORY_MAX_CACHES:
+                evicted.append(_caches.popitem(last=False)[1])
+        _caches.move_to_end(key)
+    for old_cache in evicted:
+        old_cache.close()
+    return cache
+
+
+def inventory_stats():
+    with _caches_lock:
+        caches = list(_caches.items())
+    # key: ("vsphere-inventory", host, port, user, password digest)
+    return dict(("{}@{}:{}".format(key[3], key[1], key[2]), cache.stats()) for key, cache in caches)
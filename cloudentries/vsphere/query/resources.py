@@ -1,31 +1,76 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
 from .client import VSphereClient
+from .inventory import inventory_cache, vm_filter_spec, VM_PATH_SET, PAGE_SIZE
+from cloudchef_integration.tasks.cloud_resources.commoncloud.paginator import TokenPaginator
 
-from pyVmomi import vim
+from pyVmomi import vim, vmodl
 
 
 class VSphereResource(object):
 
     def __init__(self, config):
-        self.client = VSphereClient().create_client(config)
-        self.content = self.client.RetrieveContent()
+        self.config = config
+        self._client = None
+        self._content = None
 
-    def get_instances(self, params):
+    @property
+    def client(self):
+        # connected on first use: the queries answered by the inventory cache do not log in
+        if self._client is None:
+            self._client = VSphereClient().create_client(self.config)
+        return self._client
 
-        vim_type = [vim.VirtualMachine]
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self.client.RetrieveContent()
+        return self._content
 
-        container_view = self.content.viewManager.CreateContainerView(
-            self.content.rootFolder, vim_type, True)
-        objects = container_view.view
-        container_view.Destroy()
+    def get_instances(self, params):
+        """
+        Id, name and guest state of the VMs of `params` (moIds), from the inventory cache if it is enabled
+        (and not evicted meanwhile)
+        """
+        cache = inventory_cache(self.config)
+        vms = cache.vm_properties() if cache is not None else None
+        if vms is None:
+            vms = self.vm_properties(VM_PATH_SET)
         res = []
         for server_id in params:
-            for obj in objects:
-                if server_id == obj._moId:
-                    instance = {'id': str(obj._moId),
-                                'name': str(obj.name),
-                                'status': str(obj.guest.guestState)}
-                    res.append(instance)
+            properties = vms.get(server_id)
+            if properties is not None:
+                instance = {'id': str(server_id),
+                            'name': str(properties.get('name')),
+                            'status': str(properties.get('guest.guestState'))}
+                res.append(instance)
 
         return res
+
+    def vm_properties(self, path_set, page_size=PAGE_SIZE):
+        """
+        moId -> {property path: value} of every VM: the `path_set` properties are read by one paged
+        `RetrievePropertiesEx` over a container view, instead of a round trip per VM and property
+        """
+        container_view = self.content.viewManager.CreateContainerView(
+            self.content.rootFolder, [vim.VirtualMachine], True)
+        try:
+            filter_spec = vm_filter_spec(container_view, path_set)
+            collector = self.content.propertyCollector
+
+            def fetch(token):
+                if token:
+                    result = collector.ContinueRetrievePropertiesEx(token)
+                else:
+                    result = collector.RetrievePropertiesEx(
+                        [filter_spec], vmodl.query.PropertyCollector.RetrieveOptions(maxObjects=page_size))
+                if result is None:
+                    return [], None
+                return result.objects, result.token
+
+            vms = {}
+            for obj in TokenPaginator(fetch):
+                vms[obj.obj._moId] = dict((prop.name, prop.val) for prop in obj.propSet)
+            return vms
+        finally:
+            container_view.Destroy()
@@ -1,15 +1,19 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
-import requests
 import hashlib
 import json
 import time
 
 from abstract_plugin.platforms.common.connector import Connector
+from abstract_plugin.platforms.common.transport import transport
+from abstract_plugin.platforms.common.tokens import token_broker, token_key, TokenExpired
 from cloudify import ctx
 from cloudify.exceptions import NonRecoverableError
 from cloudify.utils import decrypt_password
 
+# ZStack expires idle sessions after 2 hours by default
+SESSION_TTL = 30 * 60
+
 
 class ZStackConnection(object):
     def __init__(self, url, username, password):
@@ -26,7 +30,7 @@ class ZStackConnection(object):
                 "accountName": self.username
             }
         }
-        r = requests.put(self.url + '/accounts/login', headers=self.headers, data=json.dumps(payload))
+        r = transport.put(self.url + '/accounts/login', headers=self.headers, data=json.dumps(payload))
         return r
 
     def get_session_id(self):
@@ -38,6 +42,8 @@ class ZStackConnection(object):
 
     @staticmethod
     def check_response_code(r):
+        if int(r.status_code) == 401:
+            raise TokenExpired(r.text)
         if int(r.status_code) in (400, 404, 405, 500, 503):
             raise Exception(
                 "query failed, the error message is {0}, the status code is {1}".format(r.text, r.status_code))
@@ -56,12 +62,12 @@ class ZStackConnection(object):
         if condition:
             params = self.prepare_params(condition)
             url = url + "?" + params
-        resp = getattr(requests, method)(url, headers=self.headers, data=json.dumps(body))
+        resp = transport.request(method, url, headers=self.headers, data=json.dumps(body))
         self.check_response_code(resp)
         return resp
 
     def common_polling(self, location, times=1800):
-        resp = requests.get(location, headers=self.headers)
+        resp = transport.get(location, headers=self.headers)
         if int(resp.status_code) == 202 or times <= 0:
             ctx.logger.info("Wait for the result of the asynchronous call to return. left {0} times".format(times))
             time.sleep(2)
@@ -75,20 +81,38 @@ class ZStackConnection(object):
         self.headers['Authorization'] = 'OAuth ' + self.seesion_id
 
     def close_session(self):
-        url = self.url + '/accounts/sessions/' + self.seesion_id
-        resp = requests.delete(url)
+        self.logout(self.seesion_id)
+
+    def logout(self, session_id):
+        url = self.url + '/accounts/sessions/' + session_id
+        resp = transport.delete(url)
         self.check_response_code(resp)
 
-    def call(self, method, endpoint, body=None, condition=None, rpc=False):
-        self.open_session()
+    def _call(self, session_id, method, endpoint, body=None, condition=None, rpc=False):
+        self.seesion_id = session_id
+        self.headers['Authorization'] = 'OAuth ' + session_id
         resp = self.common_request(method, endpoint, body, condition, rpc)
         if resp.json().get('location'):
             location = resp.json()['location']
             resp = self.common_polling(location)
+            if int(resp.status_code) == 401:  # the job was accepted already, it must not be sent again
+                raise Exception("polling {0} failed, the session is expired: {1}".format(location, resp.text))
             self.check_response_code(resp)
-        self.close_session()
         return resp
 
+    def call(self, method, endpoint, body=None, condition=None, rpc=False):
+        """
+        The session is shared with the other calls of this account, and logged out at shutdown
+        """
+        return token_broker.call(
+            token_key(self.url, self.username, self.password),
+            self.get_session_id,
+            # `common_request` consumes `condition`, each attempt gets its own copy
+            lambda session_id: self._call(session_id, method, endpoint, body,
+                                          dict(condition) if condition else None, rpc),
+            ttl=SESSION_TTL,
+            release=self.logout)
+
 
 class Base(Connector):
     def __init__(self):
@@ -1,9 +1,17 @@
 # Copyright (c) 2021 Qianyun, Inc. All rights reserved.
 
-import requests
 import hashlib
 import json
 import time
+from urllib.parse import quote
+from cloudchef_integration.tasks.cloud_resources.commoncloud.transport import transport
+from cloudchef_integration.tasks.cloud_resources.commoncloud.tokens import token_broker, token_key, TokenExpired
+from cloudchef_integration.tasks.cloud_resources.commoncloud.paginator import OffsetPaginator
+
+# ZStack expires idle sessions after 2 hours by default
+SESSION_TTL = 30 * 60
+# ZStack replies 1000 inventories at most when the query has no `limit`
+PAGE_SIZE = 500
 
 
 class ZStackConnection(object):
@@ -21,7 +29,7 @@ class ZStackConnection(object):
                 "accountName": self.username
             }
         }
-        r = requests.put(self.url + '/accounts/login', headers=self.headers, data=json.dumps(payload))
+        r = transport.put(self.url + '/accounts/login', headers=self.headers, data=json.dumps(payload))
         return r
 
     def get_session_id(self):
@@ -33,6 +41,8 @@ class ZStackConnection(object):
 
     @staticmethod
     def check_response_code(r):
+        if int(r.status_code) == 401:
+            raise TokenExpired(r.text)
         if int(r.status_code) in (400, 404, 405, 500, 503):
             raise Exception(
                 "query failed, the error message is {0}, the status code is {1}".format(r.text, r.status_code))
@@ -40,10 +50,12 @@ class ZStackConnection(object):
     def prepare_params(self, params):
         if params.get('resourceBundleId'):
             del params['resourceBundleId']
-        m = ["q={k}={v}".format(k=k, v=v) for k, v in list(params.items()) if v]
+        m = ["q={k}={v}".format(k=k, v=v) for k, v in list(params.items()) if v and k != 'q']
+        # conditions with an operator (`uuid?=a,b`, `name~=%web%`), `%` must be escaped
+        m.extend("q=" + quote(condition, safe="=?!~<>,") for condition in params.get('q') or [])
         return "&".join(m)
 
-    def common_request(self, method, endpoint, body=None, condition=None):
+    def common_request(self, method, endpoint, body=None, condition=None, paging=None, headers=None):
         url = self.url + endpoint
         if condition:
             if condition.get('resource_id'):
@@ -51,12 +63,15 @@ class ZStackConnection(object):
                 del condition['resource_id']
             params = self.prepare_params(condition)
             url = url + "?" + params
-        resp = getattr(requests, method)(url, headers=self.headers, data=json.dumps(body))
+        if paging:
+            url = url + ("&" if "?" in url else "?") + "&".join(
+                "{}={}".format(k, v) for k, v in sorted(paging.items()))
+        resp = transport.request(method, url, headers=headers or self.headers, data=json.dumps(body))
         self.check_response_code(resp)
         return resp
 
     def common_polling(self, location, times=1800):
-        resp = requests.get(location, headers=self.headers)
+        resp = transport.get(location, headers=self.headers)
         if int(resp.status_code) == 202 or times <= 0:
             time.sleep(2)
             times -= 1
@@ -69,16 +84,47 @@ class ZStackConnection(object):
         self.headers['Authorization'] = 'OAuth ' + self.session_id
 
     def close_session(self):
-        url = self.url + '/accounts/sessions/' + self.session_id
-        resp = requests.delete(url)
+        self.logout(self.session_id)
+
+    def logout(self, session_id):
+        url = self.url + '/accounts/sessions/' + session_id
+        resp = transport.delete(url)
         self.check_response_code(resp)
 
-    def call(self, method, endpoint, body=None, condition=None):
-        self.open_session()
-        resp = self.common_request(method, endpoint, body, condition)
+    def _call(self, session_id, method, endpoint, body=None, condition=None, paging=None):
+        self.session_id = session_id
+        self.headers['Authorization'] = 'OAuth ' + session_id
+        # the pages of a query are requested concurrently, each request carries its own headers
+        headers = dict(self.headers, Authorization='OAuth ' + session_id)
+        resp = self.common_request(method, endpoint, body, condition, paging, headers)
         if method in ('post', 'put'):
             location = resp.json()['location']
             resp = self.common_polling(location)
+            if int(resp.status_code) == 401:  # the job was accepted already, it must not be sent again
+                raise Exception("polling {0} failed, the session is expired: {1}".format(location, resp.text))
             self.check_response_code(resp)
-        self.close_session()
         return resp
+
+    def call(self, method, endpoint, body=None, condition=None, paging=None):
+        """
+        The session is shared with the other calls of this account, and logged out at shutdown
+        """
+        return token_broker.call(
+            token_key(self.url, self.username, self.password),
+            self.get_session_id,
+            # `common_request` consumes `condition`, each attempt gets its own copy
+            lambda session_id: self._call(session_id, method, endpoint, body, dict(condition) if condition else None,
+                                          paging),
+            ttl=SESSION_TTL,
+            release=self.logout)
+
+    def query(self, endpoint, condition=None, limit=PAGE_SIZE):
+        """
+        Every inventory of a query API, requested by pages of `limit` (`start`/`limit` with `replyWithCount`)
+        """
+        def fetch(start, page_limit):
+            resp = self.call('get', endpoint, condition=condition,
+                             paging={"start": start, "limit": page_limit, "replyWithCount": "true"}).json()
+            return resp.get('inventories', []), resp.get('total')
+
+        return {"inventories": OffsetPaginator(fetch, limit=limit).all()}
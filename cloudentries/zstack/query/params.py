@@ -1,9 +1,20 @@
 from cloudchef_integration.tasks.cloud_resources.commoncloud.utils import BasicSchema, ParamType
+from cloudchef_integration.tasks.cloud_resources.commoncloud.pushdown import FilterPlanner, Pushdown, split_values
+
+
+class QueryDesc(object):
+    """
+    `q`: conditions of the query API, e.g. ["uuid?=a,b", "name~=%centos%"]
+    """
+    Schema = {
+        "q": BasicSchema.schema(raw_key="q", required=False, param_type=ParamType.List)
+    }
 
 
 class ImageDesc(object):
     Schema = {
-        "platform": BasicSchema.schema(raw_key="osType", required=False, param_type=ParamType.String)
+        "platform": BasicSchema.schema(raw_key="osType", required=False, param_type=ParamType.String),
+        "q": BasicSchema.schema(raw_key="q", required=False, param_type=ParamType.List)
     }
 
 
@@ -11,3 +22,33 @@ class SubnetDesc(object):
     Schema = {
         "l2NetworkUuid": BasicSchema.schema(raw_key="NetworkId", required=False, param_type=ParamType.String)
     }
+
+
+def in_condition(field, value):
+    values = split_values(value)
+    if not values:
+        return None
+    return {"q": ["{}?={}".format(field, ",".join(values))]}
+
+
+def name_condition(params):
+    if not params.get('patternImageName'):
+        return None
+    # `~=` is a SQL LIKE, `_` and `%` of the pattern are wildcards: the result is narrowed, not exact
+    return {"q": ["name~=%{}%".format(params['patternImageName'])]}
+
+
+def flavor_condition(params):
+    is_filter = params.get('matchCpuAndMemory')
+    if (not is_filter) or str(is_filter).lower() != "true" or not str(params.get('cpu') or '').isdigit():
+        return None
+    return {"q": ["cpuNum={}".format(params['cpu'])]}
+
+
+# filters of `ZstackFilterResponse` sent as `q` conditions, see `ZstackResource`
+filter_planner = FilterPlanner({
+    "filter_resource": Pushdown(lambda params: in_condition("uuid", params.get('resource_id'))),
+    "filter_instance": Pushdown(lambda params: in_condition("vmInstanceUuid", params.get('InstanceId'))),
+    "filter_image_name": Pushdown(name_condition, exact=False),
+    "filter_flavor": Pushdown(flavor_condition, exact=False)
+})
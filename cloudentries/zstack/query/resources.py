@@ -5,7 +5,10 @@ from cloudchef_integration.tasks.cloud_resources.commoncloud.params import commo
 from cloudchef_integration.tasks.cloud_resources.commoncloud.response import common_response, filter_output
 from cloudchef_integration.tasks.cloud_resources.commoncloud import params as Params
 from cloudchef_integration.tasks.cloud_resources.commoncloud import response as Response
+from cloudchef_integration.tasks.cloud_resources.commoncloud.pushdown import MAX_PUSHED_VALUES
+from cloudchef_integration.tasks.cloud_resources.commoncloud.index import resource_index, index_scope
 from .client import ZstackClient
+from .params import filter_planner
 from .response import ZstackFilterResponse
 
 
@@ -23,21 +26,37 @@ class ZstackResource(object):
     @common_response(Response.Instance.Schema)
     @filter_output(ZstackFilterResponse.filter_resource)
     def instance(self):
-        instance_list = ZstackClient(self.conection_params).describe_vm(self.query_params)
-        image_list = ZstackClient(self.conection_params).describe_image(self.query_params)
-        image_os_mapper = {}
-        for image in image_list:
-            image_os_mapper[image['Id']] = image['Name']
+        params = filter_planner.plan(self, 'instance', ZstackFilterResponse.filter_resource)
+        instance_list = ZstackClient(self.conection_params).describe_vm(params)
+        image_os_mapper = resource_index.lookup(self.image_index_scope,
+                                                [instance['ImageId'] for instance in instance_list],
+                                                self.image_names)
         for instance in instance_list:
-            instance["OperatingSystem"] = image_os_mapper[instance['ImageId']]
+            instance["OperatingSystem"] = image_os_mapper.get(instance["ImageId"])
         return instance_list
 
+    @property
+    def image_index_scope(self):
+        return index_scope("zstack-image-os", self.conection_params)
+
+    def image_names(self, image_ids):
+        """
+        Only the missing images, by `uuid?=` conditions of `MAX_PUSHED_VALUES` ids
+        """
+        names = {}
+        client = ZstackClient(self.conection_params)
+        for start in range(0, len(image_ids), MAX_PUSHED_VALUES):
+            condition = "uuid?={}".format(",".join(image_ids[start:start + MAX_PUSHED_VALUES]))
+            names.update((image['Id'], image['Name']) for image in client.describe_image({"q": [condition]}))
+        return names
+
     @common_params(EmptyDesc.Schema)
     @common_response(Response.Volume.Schema)
     @filter_output(ZstackFilterResponse.filter_instance)
     @filter_output(ZstackFilterResponse.filter_volume_type)
     def volume(self):
-        return ZstackClient(self.conection_params).describe_volume(self.query_params)
+        params = filter_planner.plan(self, 'volume', ZstackFilterResponse.filter_instance)
+        return ZstackClient(self.conection_params).describe_volume(params)
 
     @common_params(EmptyDesc.Schema)
     @common_response(Response.Snapshot.Schema)
@@ -58,13 +77,18 @@ class ZstackResource(object):
     @filter_output(ZstackFilterResponse.filter_resource)
     @filter_output(ZstackFilterResponse.filter_image_name)
     def image(self):
-        return ZstackClient(self.conection_params).describe_image(self.query_params)
+        params = filter_planner.plan(self, 'image', ZstackFilterResponse.filter_resource,
+                                     ZstackFilterResponse.filter_image_name)
+        image_list = ZstackClient(self.conection_params).describe_image(params)
+        resource_index.update(self.image_index_scope, dict((image['Id'], image['Name']) for image in image_list))
+        return image_list
 
     @common_params(EmptyDesc.Schema)
     @common_response(Response.Flavor.Schema)
     @filter_output(ZstackFilterResponse.filter_flavor)
     def flavor(self):
-        return ZstackClient(self.conection_params).describe_flavor(self.query_params)
+        params = filter_planner.plan(self, 'flavor', ZstackFilterResponse.filter_flavor)
+        return ZstackClient(self.conection_params).describe_flavor(params)
 
     @common_params(EmptyDesc.Schema)
     @common_response(Response.Vlan.Schema)
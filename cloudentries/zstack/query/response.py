@@ -232,12 +232,8 @@ class ZstackFilterResponse(FilterResponse):
         """
         if not params.get('InstanceId'):
             return resp
-        aim = []
         instance_ids = params.get('InstanceId').split(',')
-        for dct in resp:
-            if dct['HostId'] in instance_ids:
-                aim.append(dct)
-        return aim
+        return cls.select(resp, lambda dct: dct['HostId'] in instance_ids)
 
     @classmethod
     def filter_volume_type(cls, params, resp):
@@ -247,15 +243,8 @@ class ZstackFilterResponse(FilterResponse):
         if not resp:
             return resp
         category = params.get('category', "")
-        aim = []
         if category == "systemDisk":
-            for volume in resp:
-                if volume.get("DiskType") == "Root":
-                    aim.append(volume)
+            return cls.select(resp, lambda volume: volume.get("DiskType") == "Root")
         elif category == "dataDisk":
-            for volume in resp:
-                if volume.get("DiskType") == "Data":
-                    aim.append(volume)
-        else:
-            return resp
-        return aim
+            return cls.select(resp, lambda volume: volume.get("DiskType") == "Data")
+        return resp
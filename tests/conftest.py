@@ -0,0 +1,16 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+"""
+The modules are imported under their deployed package names (see benchmarks/loader.py):
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+
+import loader  # noqa: E402
+
+loader.install()
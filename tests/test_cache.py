@@ -0,0 +1,125 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import time
+
+import pytest
+
+from cloudchef_integration.tasks.cloud_resources.commoncloud import cache
+from cloudchef_integration.tasks.cloud_resources.commoncloud.cache import (
+    DiskBackend, MemoryBackend, QueryCache, hash_params)
+
+CONNECT = {"access_key_id": "ak", "secret_access_key": "secret"}
+
+
+@pytest.fixture(params=["memory", "disk"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_size=10)
+    return DiskBackend(str(tmp_path / "cache"), max_size=10)
+
+
+def counting(value):
+    calls = []
+
+    def func():
+        calls.append(1)
+        return value
+
+    return func, calls
+
+
+def test_credential_checks_and_lifecycle_resources_are_not_cached():
+    assert "validation" not in cache.DEFAULT_TTLS
+    assert "instance" not in cache.DEFAULT_TTLS
+    assert QueryCache().ttl("validation") == 0
+
+
+def test_key_hides_the_secrets():
+    key = QueryCache.make_key("cloudentry", CONNECT, "image", {"b": 1, "a": 2})
+    assert "secret" not in repr(key)
+    assert key == QueryCache.make_key("cloudentry", dict(CONNECT), "image", {"a": 2, "b": 1})
+    assert key != QueryCache.make_key("cloudentry", dict(CONNECT, secret_access_key="rotated"), "image",
+                                      {"a": 2, "b": 1})
+    assert hash_params(None) == hash_params(None)
+
+
+def test_get_or_call_within_ttl(backend):
+    query_cache = QueryCache(backend=backend)
+    key = QueryCache.make_key("cloudentry", CONNECT, "image", {})
+    func, calls = counting([{"id": 1}])
+    assert query_cache.get_or_call(key, func, 60) == [{"id": 1}]
+    assert query_cache.get_or_call(key, func, 60) == [{"id": 1}]
+    assert len(calls) == 1
+    assert query_cache.stats()["hits"] == 1
+
+
+def test_expired_entries_are_called_again(backend):
+    query_cache = QueryCache(backend=backend)
+    key = QueryCache.make_key("cloudentry", CONNECT, "image", {})
+    func, calls = counting([{"id": 1}])
+    query_cache.get_or_call(key, func, 0.01)
+    time.sleep(0.02)
+    query_cache.get_or_call(key, func, 0.01)
+    assert len(calls) == 2
+
+
+def test_disabled_or_uncached_methods_are_called(backend):
+    key = QueryCache.make_key("cloudentry", CONNECT, "image", {})
+    func, calls = counting([])
+    QueryCache(backend=backend, enabled=False).get_or_call(key, func, 60)
+    QueryCache(backend=backend, enabled=False).get_or_call(key, func, 60)
+    QueryCache(backend=backend).get_or_call(key, func, 0)
+    assert len(calls) == 3
+
+
+def test_invalidate(backend):
+    query_cache = QueryCache(backend=backend)
+    other = dict(CONNECT, access_key_id="other")
+    for connect in (CONNECT, other):
+        for method in ("image", "flavor"):
+            query_cache.get_or_call(QueryCache.make_key("cloudentry", connect, method, {}), lambda: [method], 60)
+    assert query_cache.invalidate("cloudentry", CONNECT, "image") == 1
+    assert query_cache.invalidate(connect_params=other) == 2
+    assert len(backend) == 1
+
+
+def test_eviction_bounds_the_size(backend):
+    query_cache = QueryCache(backend=backend)
+    for index in range(25):
+        query_cache.get_or_call(QueryCache.make_key("cloudentry", CONNECT, "image", {"i": index}), lambda: [index],
+                                60)
+    assert len(backend) <= 10
+    assert query_cache.stats()["evictions"] >= 15
+
+
+def test_memory_backend_returns_copies():
+    backend = MemoryBackend()
+    value = [{"id": 1}]
+    backend.set("key", value, 60)
+    backend.get("key")[0]["id"] = 2
+    assert backend.get("key") == value
+
+
+def test_wrapper_key_ignores_later_changes_of_the_params(monkeypatch):
+    from cloudchef_integration.tasks.cloud_resources.commoncloud import utils
+
+    class Resource(object):
+        cloudentry_id = "tests:resource"
+
+        def __init__(self, connect_params, query_params):
+            self.connect_params = connect_params
+
+        def image(self):
+            # e.g. a default region filled in by the query method
+            self.connect_params['region'] = "default"
+            return [self.connect_params['region']]
+
+    monkeypatch.setattr(utils, "query_cache", QueryCache(backend=MemoryBackend()))
+    connect = {"access_key_id": "ak"}
+    resource = utils.support_getattr(Resource)(connect, {})
+    key = resource._cache_key("image")
+    assert resource.image == ["default"]
+    assert connect == {"access_key_id": "ak", "region": "default"}
+    assert resource._cache_key("image") == key
+    assert resource.image == ["default"]
+    assert utils.query_cache.stats()["hits"] == 1
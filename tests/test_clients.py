@@ -0,0 +1,47 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import threading
+import time
+
+from cloudchef_integration.tasks.cloud_resources.commoncloud.clients import ClientCache, client_key
+
+
+def test_key_hides_and_tracks_the_secret():
+    key = client_key("ecs", "cn-1", None, "ak", "secret")
+    assert "secret" not in key
+    assert key == client_key("ecs", "cn-1", None, "ak", "secret")
+    assert key != client_key("ecs", "cn-1", None, "ak", "rotated")
+
+
+def test_get_builds_once_and_evicts_the_least_recent():
+    cache = ClientCache(max_size=2)
+    assert cache.get("a", lambda: "client-a") == "client-a"
+    assert cache.get("a", lambda: "other") == "client-a"
+    cache.get("b", lambda: "client-b")
+    cache.get("a", lambda: "other")
+    cache.get("c", lambda: "client-c")
+    assert cache.get("b", lambda: "rebuilt-b") == "rebuilt-b"
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 2, "misses": 4, "evictions": 2}
+    cache.discard("b")
+    assert len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_concurrent_callers_share_one_build():
+    cache = ClientCache()
+    builds = []
+
+    def factory():
+        builds.append(1)
+        time.sleep(0.05)
+        return object()
+
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(cache.get("a", factory))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    assert len(set(id(client) for client in clients)) == 1
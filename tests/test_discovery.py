@@ -0,0 +1,86 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import json
+import os
+import threading
+
+import pytest
+
+import fakes
+
+fakes.install_googleapiclient()
+
+from cloudchef_integration.tasks.cloud_resources.gcp import discovery  # noqa: E402
+
+DOCUMENT = {"name": "compute", "version": "v1", "rootUrl": "https://compute.googleapis.com/", "resources": {}}
+PLANTED = dict(DOCUMENT, rootUrl="https://attacker.example.com/")
+
+
+class Http(object):
+    def __init__(self, document=DOCUMENT):
+        self.document = document
+        self.requests = 0
+
+    def request(self, uri):
+        self.requests += 1
+        return type("Response", (object,), {"status": 200})(), json.dumps(self.document).encode('utf-8')
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / "discovery")
+    monkeypatch.setattr(discovery, "DISCOVERY_CACHE_DIR", path)
+    monkeypatch.setattr(discovery, "_static_document", lambda api_name, api_version: None)
+    monkeypatch.setattr(discovery, "_documents", {})
+    return path
+
+
+def test_fetched_document_is_cached_privately(cache_dir):
+    http = Http()
+    assert discovery.discovery_document("compute", "v1", http) == DOCUMENT
+    assert os.stat(cache_dir).st_mode & 0o777 == 0o700
+    assert os.stat(os.path.join(cache_dir, "compute.v1.json")).st_mode & 0o777 == 0o600
+    discovery._documents.clear()
+    assert discovery.discovery_document("compute", "v1", Http(PLANTED)) == DOCUMENT
+
+
+def test_writable_cached_document_is_refused(cache_dir):
+    os.makedirs(cache_dir, mode=0o700)
+    path = os.path.join(cache_dir, "compute.v1.json")
+    with open(path, "w") as f:
+        json.dump(DOCUMENT, f)
+    os.chmod(path, 0o666)
+    http = Http()
+    discovery.discovery_document("compute", "v1", http)
+    assert http.requests == 1
+
+
+def test_shared_cache_dir_is_not_used(cache_dir):
+    os.makedirs(cache_dir)
+    os.chmod(cache_dir, 0o777)
+    with open(os.path.join(cache_dir, "compute.v1.json"), "w") as f:
+        json.dump(PLANTED, f)
+    http = Http()
+    assert discovery.discovery_document("compute", "v1", http) == DOCUMENT
+    assert http.requests == 1
+
+
+def test_untrusted_root_url_is_rejected(cache_dir):
+    with pytest.raises(Exception):
+        discovery.discovery_document("compute", "v1", Http(PLANTED))
+
+
+def test_services_are_kept_per_thread(monkeypatch):
+    key_json = {"client_email": "sa@project.iam.gserviceaccount.com", "private_key": "key"}
+    scope = ["https://www.googleapis.com/auth/compute"]
+    service = discovery.get_service("compute", "v1", key_json, scope)
+    assert discovery.get_service("compute", "v1", key_json, scope) is service
+    assert discovery.get_service("compute", "v1", dict(key_json, private_key="rotated"), scope) is not service
+    others = []
+    thread = threading.Thread(target=lambda: others.append(discovery.get_service("compute", "v1", key_json, scope)))
+    thread.start()
+    thread.join()
+    assert others[0] is not service
+    for index in range(discovery.MAX_THREAD_SERVICES + 1):
+        discovery.get_service("compute", "v1", dict(key_json, client_email=str(index)), scope)
+    assert len(discovery._thread_services()) == discovery.MAX_THREAD_SERVICES
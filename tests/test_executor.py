@@ -0,0 +1,96 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import asyncio
+import threading
+
+from cloudchef_integration.tasks.cloud_resources.commoncloud.executor import (
+    QueryExecutor, SubQueryMemo, fan_out, memoize_call)
+
+
+class Client(object):
+    calls = []
+    lock = threading.Lock()
+
+    def __init__(self, region, access_key_id):
+        self.memo_key = ("tests", region, None, access_key_id, "digest")
+
+    def describe_zones(self):
+        with self.lock:
+            self.calls.append(self.memo_key[1])
+        return [{"zone": self.memo_key[1] + "a"}]
+
+
+class Resource(object):
+    def __init__(self, connect_params, query_params):
+        self.connect_params = connect_params
+        self.query_params = query_params
+
+    def _client(self):
+        return Client(self.query_params.get("region", "region-1"), self.connect_params["access_key_id"])
+
+    @property
+    def zone(self):
+        client = self._client()
+        return memoize_call(client, "describe_zones", {}, client.describe_zones)
+
+    @property
+    def flavor(self):
+        client = self._client()
+        zones = memoize_call(client, "describe_zones", {}, client.describe_zones)
+        return [{"flavor": "small", "zone": zone["zone"]} for zone in zones]
+
+    @property
+    def image(self):
+        return (image for image in [{"id": 1}, {"id": 2}])
+
+    @property
+    def volume(self):
+        return None
+
+    @property
+    def snapshot(self):
+        raise ValueError("denied")
+
+
+def test_run_shares_the_client_calls_of_a_region():
+    Client.calls = []
+    results = QueryExecutor(Resource, {"access_key_id": "ak"}).run({
+        "zone": ("zone", {"region": "region-1"}),
+        "flavor": ("flavor", {"region": "region-1"}),
+        "other": ("zone", {"region": "region-2"})})
+    assert results["zone"]["result"] == [{"zone": "region-1a"}]
+    assert results["flavor"]["result"] == [{"flavor": "small", "zone": "region-1a"}]
+    assert results["other"]["result"] == [{"zone": "region-2a"}]
+    assert sorted(Client.calls) == ["region-1", "region-2"]
+
+
+def test_run_results_and_errors():
+    results = QueryExecutor(Resource, {"access_key_id": "ak"}).run([("image", {}), ("volume", {}),
+                                                                    ("snapshot", {})])
+    assert results["image"] == {"result": [{"id": 1}, {"id": 2}], "error": None}
+    assert results["volume"] == {"result": [], "error": None}
+    assert isinstance(results["snapshot"]["error"], ValueError)
+
+
+def test_arun():
+    results = asyncio.run(QueryExecutor(Resource, {"access_key_id": "ak"}).arun([("image", {})]))
+    assert results["image"]["result"] == [{"id": 1}, {"id": 2}]
+
+
+def test_memo_outside_of_a_batch_calls_through():
+    Client.calls = []
+    client = Client("region-1", "ak")
+    memoize_call(client, "describe_zones", {}, client.describe_zones)
+    memoize_call(client, "describe_zones", {}, client.describe_zones)
+    assert Client.calls == ["region-1", "region-1"]
+
+
+def test_memo_does_not_share_generators():
+    memo = SubQueryMemo()
+    first = memo.get_or_call("key", lambda: iter([1, 2]))
+    assert list(first) == [1, 2]
+    assert list(memo.get_or_call("key", lambda: iter([1, 2]))) == [1, 2]
+
+
+def test_fan_out_keeps_the_order():
+    assert fan_out(lambda item: item * 2, range(20), max_workers=4) == [item * 2 for item in range(20)]
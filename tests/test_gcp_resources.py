@@ -0,0 +1,35 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import fakes
+
+fakes.install_googleapiclient()
+
+from cloudchef_integration.tasks.cloud_resources.gcp.resources import GCPClient  # noqa: E402
+
+CONNECTION = {"private_key_id": "id", "private_key": "key", "client_email": "sa@bench.iam.gserviceaccount.com",
+              "client_id": "1", "project_id": "bench", "region": "region-0"}
+
+
+class Collection(object):
+    def __init__(self, collection):
+        self.collection = collection
+        self.filters = []
+
+    def __call__(self):
+        return self
+
+    def aggregatedList(self, **kwargs):
+        self.filters.append(kwargs.get("filter"))
+        return self.collection.aggregatedList(**kwargs)
+
+
+def test_aggregated_items_are_filtered_by_the_api():
+    client = GCPClient(CONNECTION, {})
+    instances = Collection(fakes.GCPFakeCollection("instances"))
+    items = client.aggregated_items(instances, "instances")
+    assert instances.filters == ['(zone eq ".*/zones/region-0-[^/]+")']
+    assert items and all("/zones/region-0-" in item["zone"] for item in items)
+
+    items = client.aggregated_items(instances, "instances", name="vm-1")
+    assert instances.filters[-1] == '(name eq "vm-1") (zone eq ".*/zones/region-0-[^/]+")'
+    assert [item["name"] for item in items] == ["vm-1"]
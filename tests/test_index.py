@@ -0,0 +1,62 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import time
+
+from cloudchef_integration.tasks.cloud_resources.commoncloud.index import ResourceIndex, index_scope
+
+IMAGES = {"img-1": "centos", "img-2": "ubuntu"}
+
+
+class Fetch(object):
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ids):
+        self.calls.append(list(ids))
+        return dict((image_id, IMAGES[image_id]) for image_id in ids if image_id in IMAGES)
+
+
+def test_lookup_fetches_the_missing_ids_once():
+    index = ResourceIndex()
+    fetch = Fetch()
+    scope = index_scope("tests-image-os", {"access_key_id": "ak"})
+    assert index.lookup(scope, ["img-1", "img-1", None, "img-9"], fetch) == {"img-1": "centos", "img-9": None}
+    assert index.lookup(scope, ["img-1", "img-2", "img-9"], fetch) == \
+        {"img-1": "centos", "img-2": "ubuntu", "img-9": None}
+    assert fetch.calls == [["img-1", "img-9"], ["img-2"]]
+
+
+def test_entries_expire_and_scopes_are_separate():
+    index = ResourceIndex(ttl=0.01)
+    fetch = Fetch()
+    index.lookup("a", ["img-1"], fetch)
+    index.lookup("b", ["img-1"], fetch)
+    time.sleep(0.02)
+    index.lookup("a", ["img-1"], fetch)
+    assert len(fetch.calls) == 3
+
+
+def test_update_invalidate_and_bound():
+    index = ResourceIndex(max_scopes=2)
+    fetch = Fetch()
+    index.update("a", {"img-1": "listed"})
+    assert index.lookup("a", ["img-1"], fetch) == {"img-1": "listed"}
+    index.invalidate("a")
+    assert index.lookup("a", ["img-1"], fetch) == {"img-1": "centos"}
+    index.update("b", {"img-1": "b"})
+    index.update("c", {"img-1": "c"})
+    assert index.lookup("a", ["img-1"], fetch) == {"img-1": "centos"}
+    assert len(fetch.calls) == 2
+
+
+def test_disabled_index_always_fetches():
+    index = ResourceIndex(enabled=False)
+    fetch = Fetch()
+    index.lookup("a", ["img-1"], fetch)
+    index.lookup("a", ["img-1"], fetch)
+    assert index.lookup("a", [], fetch) == {}
+    assert len(fetch.calls) == 2
+
+
+def test_scope_hides_the_credentials():
+    assert "secret" not in repr(index_scope("tests", {"secret_access_key": "secret"}))
@@ -0,0 +1,113 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import threading
+import types
+
+import pytest
+
+import fakes
+
+fakes.install_pyvmomi()
+
+from cloudchef_integration.tasks.cloud_resources.vsphere import inventory  # noqa: E402
+from cloudchef_integration.tasks.cloud_resources.vsphere.inventory import InventoryCache  # noqa: E402
+
+CONFIG = {"host": "vcenter", "port": 443, "user": "admin", "password": "password"}
+
+
+@pytest.fixture
+def vcenter():
+    vcenter = fakes.VSphereFakeVCenter()
+    fakes.VSPHERE["vcenter"] = vcenter
+    return vcenter
+
+
+def update_set(*object_updates):
+    return types.SimpleNamespace(filterSet=[types.SimpleNamespace(objectSet=[
+        types.SimpleNamespace(obj=types.SimpleNamespace(_moId=mo_id), kind=kind,
+                              changeSet=[types.SimpleNamespace(name=name, op=op, val=value)
+                                         for name, op, value in changes])
+        for kind, mo_id, changes in object_updates])])
+
+
+def test_apply_enter_modify_leave():
+    cache = InventoryCache(CONFIG)
+    cache._apply(update_set(("enter", "vm-1", [("name", "assign", "web"), ("guest.guestState", "assign", "running")]),
+                            ("enter", "vm-2", [("name", "assign", "db")])))
+    assert cache.vms == {"vm-1": {"name": "web", "guest.guestState": "running"}, "vm-2": {"name": "db"}}
+    cache._apply(update_set(("modify", "vm-1", [("guest.guestState", "assign", "notRunning")]),
+                            ("modify", "vm-2", [("name", "remove", None)]),
+                            ("leave", "vm-3", [])))
+    assert cache.vms == {"vm-1": {"name": "web", "guest.guestState": "notRunning"}, "vm-2": {}}
+    cache._apply(update_set(("leave", "vm-2", []), ("enter", "vm-1", [("name", "assign", "web-2")])))
+    assert cache.vms == {"vm-1": {"name": "web-2"}}
+    # the enters and modifications
+    assert cache.updates == 5
+
+
+def test_refresh_reads_the_changes_only(vcenter, monkeypatch):
+    monkeypatch.setattr(inventory, "PAGE_SIZE", 2)
+    for index in range(3):
+        vcenter.enter("vm-{}".format(index), name="vm-{}".format(index))
+    cache = InventoryCache(CONFIG, refresh_seconds=0)
+    assert cache.vm_properties() == dict(("vm-{}".format(index), {"name": "vm-{}".format(index)})
+                                         for index in range(3))
+    vcenter.modify("vm-0", name="renamed")
+    vcenter.leave("vm-1")
+    vcenter.enter("vm-3", name="vm-3")
+    assert cache.vm_properties() == {"vm-0": {"name": "renamed"}, "vm-2": {"name": "vm-2"},
+                                     "vm-3": {"name": "vm-3"}}
+    stats = cache.stats()
+    assert (stats["snapshots"], stats["syncs"], stats["version"]) == (1, 2, "6")
+    assert vcenter.sessions == 1
+
+
+def test_refresh_is_skipped_within_refresh_seconds(vcenter):
+    vcenter.enter("vm-1", name="web")
+    cache = InventoryCache(CONFIG, refresh_seconds=60)
+    cache.vm_properties()
+    vcenter.modify("vm-1", name="renamed")
+    assert cache.vm_properties() == {"vm-1": {"name": "web"}}
+    cache.refresh(force=True)
+    assert cache.vm_properties() == {"vm-1": {"name": "renamed"}}
+
+
+def test_failed_read_reconnects(vcenter):
+    vcenter.enter("vm-1", name="web")
+    cache = InventoryCache(CONFIG, refresh_seconds=0)
+    cache.vm_properties()
+    vcenter.fail = 1
+    vcenter.modify("vm-1", name="renamed")
+    assert cache.vm_properties() == {"vm-1": {"name": "renamed"}}
+    assert (cache.reconnects, cache.snapshots, vcenter.sessions, vcenter.disconnects) == (1, 2, 2, 1)
+
+
+def test_closed_cache_does_not_reconnect(vcenter):
+    vcenter.enter("vm-1", name="web")
+    cache = InventoryCache(CONFIG, refresh_seconds=0)
+    cache.vm_properties()
+    cache.close()
+    assert cache.vm_properties() is None
+    assert (vcenter.sessions, vcenter.disconnects) == (1, 1)
+
+
+def test_stats_do_not_wait_for_a_read(vcenter):
+    cache = InventoryCache(CONFIG)
+    with cache._lock:
+        stats = []
+        thread = threading.Thread(target=lambda: stats.append(cache.stats()))
+        thread.start()
+        thread.join(1)
+        assert stats and stats[0]["syncs"] == 0
+
+
+def test_registry_evicts_and_closes(vcenter, monkeypatch):
+    monkeypatch.setattr(inventory, "INVENTORY_CACHE_ENABLED", True)
+    monkeypatch.setattr(inventory, "INVENTORY_MAX_CACHES", 2)
+    monkeypatch.setattr(inventory, "_caches", inventory.OrderedDict())
+    caches = [inventory.inventory_cache(dict(CONFIG, host="vcenter-{}".format(index))) for index in range(3)]
+    assert inventory.inventory_cache(dict(CONFIG, host="vcenter-2")) is caches[2]
+    assert caches[0].closed and not caches[1].closed
+    assert sorted(inventory.inventory_stats()) == ["admin@vcenter-1:443", "admin@vcenter-2:443"]
+    monkeypatch.setattr(inventory, "INVENTORY_CACHE_ENABLED", False)
+    assert inventory.inventory_cache(CONFIG) is None
@@ -0,0 +1,76 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import io
+import json
+
+import pytest
+
+from cloudchef_integration.tasks.cloud_resources.commoncloud import metrics
+from cloudchef_integration.tasks.cloud_resources.commoncloud.metrics import (
+    JsonLinesRecorder, NullRecorder, PrometheusRecorder, Span, count_rows, payload_size)
+
+
+class Resource(object):
+    cloudentry_id = "tests:resource"
+
+
+def test_nested_spans_exclude_the_children():
+    recorder = PrometheusRecorder()
+    observations = []
+    recorder.record = observations.append
+    with Span(recorder, "validation", Resource(), "instance") as outer:
+        with Span(recorder, "request", Resource(), "instance") as inner:
+            inner.payload = {"InstanceSet": [1, 2]}
+            inner.rows_out = 2
+        outer.rows_in = 2
+    request, validation = observations
+    assert (request["stage"], request["rows_out"], request["bytes"]) == ("request", 2, len('{"InstanceSet": [1, 2]}'))
+    assert validation["self_seconds"] <= validation["seconds"] - request["seconds"] + 1e-3
+    assert validation["cloudentry_id"] == "tests:resource"
+
+
+def test_span_records_the_error():
+    recorder = PrometheusRecorder()
+    with pytest.raises(ValueError):
+        with Span(recorder, "request", Resource(), "instance"):
+            raise ValueError()
+    text = recorder.render()
+    assert 'cloudentries_query_stage_errors_total{cloudentry_id="tests:resource",method="instance",' \
+           'stage="request"} 1' in text
+    assert "# TYPE cloudentries_query_stage_calls_total counter" in text
+
+
+def test_prometheus_flush(tmp_path):
+    path = str(tmp_path / "query.prom")
+    recorder = PrometheusRecorder(path=path)
+    with Span(recorder, "filter", Resource(), 'say "hi"'):
+        pass
+    recorder.flush()
+    with open(path) as f:
+        assert 'method="say \\"hi\\""' in f.read()
+    recorder.reset()
+    assert "stage=" not in recorder.render()
+
+
+def test_json_lines():
+    stream = io.StringIO()
+    with Span(JsonLinesRecorder(stream=stream), "params", Resource(), "zone"):
+        pass
+    observation = json.loads(stream.getvalue())
+    assert (observation["stage"], observation["method"], observation["error"]) == ("params", "zone", None)
+
+
+def test_sizes():
+    assert count_rows([1, 2]) == 2
+    assert count_rows(iter([1])) is None
+    assert payload_size(None) == 0
+    assert payload_size(b"abc") == 3
+    assert payload_size(object()) is None
+
+
+def test_configure_metrics():
+    recorder = PrometheusRecorder()
+    try:
+        assert metrics.configure_metrics(recorder) is metrics.recorder is recorder
+    finally:
+        assert isinstance(metrics.configure_metrics(), NullRecorder)
@@ -0,0 +1,42 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import json
+
+import fakes
+
+fakes.install_tencentcloud()
+
+from tencentcloud.common.abstract_model import AbstractModel  # noqa: E402
+
+from cloudchef_integration.tasks.cloud_resources.tencentcloud.models import model_to_dict  # noqa: E402
+
+
+class Placement(AbstractModel):
+    def __init__(self):
+        self.Zone = None
+        self.ProjectId = None
+
+
+class Instance(AbstractModel):
+    def __init__(self):
+        self._InstanceId = None
+        self._Placement = None
+        self._Tags = None
+
+
+def test_declared_fields_nested_models_and_none():
+    placement = Placement()
+    placement.Zone = "ap-guangzhou-3"
+    instance = Instance()
+    instance._InstanceId = "ins-1"
+    instance._Placement = placement
+    instance._Tags = [placement, "raw"]
+    assert model_to_dict([instance, None]) == [
+        {"InstanceId": "ins-1", "Placement": {"Zone": "ap-guangzhou-3"},
+         "Tags": [{"Zone": "ap-guangzhou-3"}, "raw"]}, None]
+
+
+def test_same_as_the_json_round_trip():
+    model = AbstractModel.from_json({"InstanceSet": [{"InstanceId": "ins-1", "Placement": {"Zone": "z"}}],
+                                     "TotalCount": 1})
+    assert model_to_dict(model) == json.loads(model.to_json_string())
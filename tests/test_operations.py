@@ -0,0 +1,83 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+from abstract_plugin.platforms.gcp.operations import wait_for_operation
+
+
+class Request(object):
+    def __init__(self, respond):
+        self.respond = respond
+
+    def execute(self):
+        return self.respond()
+
+
+class Batch(object):
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            self.callback(request_id, request.execute(), None)
+
+
+class Operations(object):
+    def __init__(self, states):
+        self.states = list(states)
+        self.calls = []
+
+    def get(self, project, zone, operation):
+        self.calls.append(("get", zone, operation))
+        return Request(lambda: {"name": operation, "status": self.states.pop(0)})
+
+
+class LongPollOperations(Operations):
+    def wait(self, project, zone, operation):
+        self.calls.append(("wait", zone, operation))
+        return Request(lambda: {"name": operation, "status": self.states.pop(0)})
+
+
+class Service(object):
+    def __init__(self, operations):
+        self.operations = operations
+
+    def zoneOperations(self):
+        return self.operations
+
+    def new_batch_http_request(self, callback):
+        return Batch(callback)
+
+
+class Connect(object):
+    client_email = "tests@project.iam.gserviceaccount.com"
+    private_key = "key"
+
+    def __init__(self, service):
+        self.service = service
+
+    def connection(self):
+        return self.service
+
+
+def test_long_poll_until_done():
+    service = Service(LongPollOperations(["RUNNING", "DONE"]))
+    result = wait_for_operation(service, Connect(service), "project", "zone-a", "op-1")
+    assert result == {"name": "op-1", "status": "DONE"}
+    assert service.operations.calls == [("wait", "zone-a", "op-1")] * 2
+
+
+def test_polls_without_the_wait_method():
+    service = Service(Operations(["RUNNING", "DONE"]))
+    result = wait_for_operation(service, Connect(service), "project", "zone-a", "op-1", max_interval=0.01)
+    assert result["status"] == "DONE"
+    assert service.operations.calls == [("get", "zone-a", "op-1")] * 2
+
+
+def test_returns_the_last_state_at_the_deadline():
+    service = Service(Operations(["RUNNING"] * 100))
+    result = wait_for_operation(service, Connect(service), "project", "zone-a", "op-1", timeout=0.5,
+                                max_interval=0.1)
+    assert result["status"] == "RUNNING"
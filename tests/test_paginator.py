@@ -0,0 +1,74 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import pytest
+
+from cloudchef_integration.tasks.cloud_resources.commoncloud.paginator import (
+    OffsetPaginator, Paginator, TokenPaginator, paginate)
+
+
+def offset_server(count, page_cap, counted=True):
+    """
+    fetch of an API with `count` rows which returns `page_cap` rows per page at most, and its requested offsets
+    """
+    offsets = []
+
+    def fetch(offset, limit):
+        offsets.append(offset)
+        return list(range(count))[offset:offset + min(limit, page_cap)], count if counted else None
+
+    return fetch, offsets
+
+
+@pytest.mark.parametrize("prefetch", [1, 4])
+@pytest.mark.parametrize("counted", [True, False])
+def test_offset_full_pages(prefetch, counted):
+    fetch, offsets = offset_server(250, 100, counted)
+    assert OffsetPaginator(fetch, limit=100, prefetch=prefetch).all() == list(range(250))
+    assert offsets[:3] == [0, 100, 200]
+
+
+@pytest.mark.parametrize("prefetch", [1, 4])
+@pytest.mark.parametrize("counted", [True, False])
+def test_offset_short_pages(prefetch, counted):
+    # the server caps its pages below the requested limit: no range is skipped
+    fetch, offsets = offset_server(300, 50, counted)
+    assert OffsetPaginator(fetch, limit=100, prefetch=prefetch).all() == list(range(300))
+    assert offsets[:6] == [0, 50, 100, 150, 200, 250]
+
+
+def test_offset_uncounted_stops_on_empty_page():
+    fetch, offsets = offset_server(120, 50, counted=False)
+    assert OffsetPaginator(fetch, limit=50).all() == list(range(120))
+    assert offsets == [0, 50, 100, 120]
+
+
+def test_offset_short_prefetched_page():
+    # a prefetched page shorter than the first one: the rest is read from where it ended
+    rows = list(range(400))
+
+    def fetch(offset, limit):
+        cap = 30 if offset == 100 else 100
+        return rows[offset:offset + min(limit, cap)], len(rows)
+
+    assert OffsetPaginator(fetch, limit=100, prefetch=4).all() == rows
+
+
+def test_offset_start_and_empty():
+    fetch, offsets = offset_server(0, 100)
+    assert OffsetPaginator(fetch).all() == []
+    assert offsets == [0]
+    fetch, _ = offset_server(10, 100)
+    assert OffsetPaginator(fetch, start=4).all() == list(range(4, 10))
+
+
+def test_token_pages_stop_on_echoed_token():
+    pages = {None: ([1, 2], "a"), "a": ([3], "b"), "b": ([4], "b")}
+    for prefetch in (False, True):
+        assert TokenPaginator(lambda token: pages[token], prefetch=prefetch).all() == [1, 2, 3, 4]
+
+
+def test_paginator_is_abstract():
+    with pytest.raises(TypeError):
+        Paginator()
+    with pytest.raises(Exception):
+        paginate("cursor", lambda token: ([], None))
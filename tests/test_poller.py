@@ -0,0 +1,95 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import itertools
+import threading
+import time
+
+import pytest
+
+from abstract_plugin.platforms.common import poller
+from abstract_plugin.platforms.common.poller import BatchPoller, Poller, PollTimeout, backoff_intervals, batch_poller
+
+
+class Describe(object):
+    def __init__(self, missing=(), release=None):
+        self.calls = []
+        self.missing = missing
+        self.release = release
+
+    def __call__(self, resource_ids):
+        if self.release is not None:
+            self.release.wait()
+        self.calls.append(list(resource_ids))
+        return dict((resource_id, {"id": resource_id}) for resource_id in resource_ids
+                    if resource_id not in self.missing)
+
+
+def test_backoff_intervals():
+    assert list(itertools.islice(backoff_intervals(10), 6)) == [2, 3, 4.5, 6.75, 10, 10]
+    assert list(itertools.islice(backoff_intervals(1), 2)) == [1, 1]
+    for interval in itertools.islice(backoff_intervals(10, first=4, jitter=0.5), 20):
+        assert 2 <= interval <= 15
+
+
+def test_batch_poller_merges_concurrent_waits():
+    describe = Describe(missing=("vm-3",))
+    batch = BatchPoller(describe, max_batch=4)
+    results = {}
+
+    def wait(resource_id):
+        results[resource_id] = batch.poll(resource_id, delay=1)
+
+    threads = [threading.Thread(target=wait, args=("vm-{}".format(index),)) for index in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results["vm-3"] is None
+    assert results["vm-1"] == {"id": "vm-1"}
+    assert sorted(len(ids) for ids in describe.calls) == [2, 4, 4]
+
+
+def test_batch_poller_raises_the_describe_error():
+    def describe(resource_ids):
+        raise ValueError("throttled")
+
+    with pytest.raises(ValueError):
+        BatchPoller(describe).poll("vm-1")
+
+
+def test_batch_poller_timeout():
+    release = threading.Event()
+    describe = Describe(release=release)
+    batch = BatchPoller(describe)
+    started = time.time()
+    with pytest.raises(PollTimeout):
+        batch.poll("vm-1", timeout=0.1)
+    assert time.time() - started < 1
+    with pytest.raises(PollTimeout):
+        batch.poll("vm-2", delay=5, timeout=0.1)
+    assert batch._pending == []
+    release.set()
+    assert batch.poll("vm-3", timeout=5) == {"id": "vm-3"}
+
+
+def test_poller_describes_in_the_wait():
+    describe = Describe(missing=("vm-2",))
+    single = Poller(describe)
+    assert single.poll("vm-1") == {"id": "vm-1"}
+    assert single.poll("vm-2", delay=0.01) is None
+    with pytest.raises(PollTimeout):
+        single.poll("vm-1", delay=5, timeout=0.01)
+    assert describe.calls == [["vm-1"], ["vm-2"]]
+
+
+def test_batch_poller_is_opt_in(monkeypatch):
+    describe = Describe()
+    monkeypatch.setattr(poller, "BATCH_POLLING_ENABLED", False)
+    assert isinstance(batch_poller("tests-vm", "region", None, "ak", "secret", describe), Poller)
+    monkeypatch.setattr(poller, "BATCH_POLLING_ENABLED", True)
+    monkeypatch.setattr(poller, "_pollers", {})
+    shared = batch_poller("tests-vm", "region", None, "ak", "secret", describe)
+    assert isinstance(shared, BatchPoller)
+    assert batch_poller("tests-vm", "region", None, "ak", "secret", Describe()) is shared
+    assert batch_poller("tests-vm", "region", None, "ak", "rotated", Describe()) is not shared
+    assert batch_poller("tests-vm", "other", None, "ak", "secret", Describe()) is not shared
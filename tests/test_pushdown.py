@@ -0,0 +1,52 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+from cloudchef_integration.tasks.cloud_resources.commoncloud.pushdown import FilterPlanner, Pushdown, split_values
+
+
+def filter_resource(rows):
+    return rows
+
+
+def filter_os_type(rows):
+    return rows
+
+
+def filter_name(rows):
+    return rows
+
+
+class Resource(object):
+    def __init__(self, query_params):
+        self.query_params = query_params
+
+
+PLANNER = FilterPlanner({
+    "filter_resource": Pushdown(lambda params: {"Ids": split_values(params.get("resource_id"))}
+                                if split_values(params.get("resource_id")) else None),
+    "filter_os_type": Pushdown(lambda params: {"Filters": [{"Name": "platform", "Values": [params["os_type"]]}]}
+                               if params.get("os_type") else None, exact=False),
+})
+
+
+def test_plan_pushes_the_exact_filters():
+    resource = Resource({"resource_id": "i-1,i-2", "os_type": "linux",
+                         "Filters": [{"Name": "zone", "Values": ["z1"]}]})
+    params = PLANNER.plan(resource, "instance", filter_resource, filter_os_type, filter_name)
+    assert params["Ids"] == ["i-1", "i-2"]
+    assert params["Filters"] == [{"Name": "zone", "Values": ["z1"]}, {"Name": "platform", "Values": ["linux"]}]
+    # the inexact and unknown filters still run client-side
+    assert resource.pushed_filters == {"instance": {"filter_resource"}}
+    assert resource.query_params["Filters"] == [{"Name": "zone", "Values": ["z1"]}]
+
+
+def test_plan_without_values_pushes_nothing():
+    resource = Resource(None)
+    assert PLANNER.plan(resource, "instance", filter_resource) == {}
+    assert resource.pushed_filters == {"instance": set()}
+
+
+def test_split_values():
+    assert split_values("a,,b") == ["a", "b"]
+    assert split_values("") is None
+    assert split_values(None) is None
+    assert split_values(",".join(str(index) for index in range(3)), limit=2) is None
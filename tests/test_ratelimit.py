@@ -0,0 +1,30 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import time
+
+from cloudchef_integration.tasks.cloud_resources.commoncloud.ratelimit import RateLimiter, rate_limiter
+
+
+def test_burst_then_rate():
+    limiter = RateLimiter(rate=50, burst=5)
+    started = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.05
+    for _ in range(5):
+        limiter.acquire()
+    # 5 tokens beyond the burst at 50 per second
+    assert time.monotonic() - started >= 0.09
+
+
+def test_zero_rate_is_unlimited():
+    limiter = RateLimiter(rate=0)
+    started = time.monotonic()
+    for _ in range(1000):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.5
+
+
+def test_limiters_are_shared_per_key():
+    assert rate_limiter(("tests", "ak", "r1"), 10) is rate_limiter(("tests", "ak", "r1"), 20)
+    assert rate_limiter(("tests", "ak", "r1"), 10) is not rate_limiter(("tests", "ak", "r2"), 10)
@@ -0,0 +1,65 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import pytest
+
+from cloudchef_integration.tasks.cloud_resources.commoncloud.schema import CompiledSchema, compile_schema
+from cloudchef_integration.tasks.cloud_resources.commoncloud.utils import BasicSchema, ParamType, ValidatException
+
+PARAMS = {
+    "region": BasicSchema.schema(required=True, param_type=ParamType.String),
+    "limit": BasicSchema.schema(param_type=ParamType.Int),
+    "state": BasicSchema.schema(allow_values=["running", "stopped"]),
+}
+CONVERT = {
+    "Region": BasicSchema.schema(raw_key="region", required=True, param_type=ParamType.String),
+    "Version": BasicSchema.schema(value="2016-03-04"),
+    "Name": BasicSchema.schema(raw_key="name"),
+    "InstanceId": BasicSchema.schema(raw_key="instance_id", filter_key="InstanceId"),
+}
+RESPONSE = [{
+    "id": BasicSchema.schema(required=True),
+    "name": BasicSchema.schema(param_type=ParamType.String),
+    "cpu": BasicSchema.schema(param_type=ParamType.Int),
+}]
+
+
+def test_validate_params():
+    assert CompiledSchema(PARAMS).validate_params({"region": "r1", "limit": 10, "other": 1}) == \
+        {"region": "r1", "limit": 10, "state": ""}
+    with pytest.raises(ValidatException, match="required"):
+        CompiledSchema(PARAMS).validate_params({})
+    with pytest.raises(ValidatException, match="the type of: limit"):
+        CompiledSchema(PARAMS).validate_params({"region": "r1", "limit": "10"})
+    with pytest.raises(ValidatException, match="allow values"):
+        CompiledSchema(PARAMS).validate_params({"region": "r1", "state": "deleted"})
+    assert CompiledSchema({}).validate_params({"region": "r1"}) == {}
+
+
+def test_convert_params():
+    converted = CompiledSchema(CONVERT).convert_params({"region": "r1", "name": "", "instance_id": "i-1,i-2"})
+    assert converted == {"Region": "r1", "Version": "2016-03-04", "InstanceId.0": "i-1", "InstanceId.1": "i-2"}
+    # the filter falls back to the resource id
+    assert CompiledSchema(CONVERT).convert_params({"region": "r1", "resource_id": "i-3"})["InstanceId.0"] == "i-3"
+    with pytest.raises(ValidatException) as error:
+        CompiledSchema(CONVERT).convert_params({})
+    assert error.value.param_name == "region"
+    assert error.value.handle_type == "Convert Param"
+
+
+def test_project():
+    rows = [{"id": "vm-1", "name": "web", "cpu": 2, "extra": True}, {"id": "vm-2", "name": "", "cpu": 0}]
+    assert CompiledSchema(RESPONSE).project(rows) == [{"id": "vm-1", "name": "web", "cpu": 2}, {"id": "vm-2"}]
+    with pytest.raises(ValidatException, match="required"):
+        CompiledSchema(RESPONSE).project([{"name": "web"}])
+    with pytest.raises(ValidatException, match="the type of: cpu"):
+        CompiledSchema(RESPONSE).project([{"id": "vm-1", "cpu": "2"}])
+
+
+def test_bool_is_not_an_int():
+    with pytest.raises(ValidatException):
+        CompiledSchema(RESPONSE).project([{"id": "vm-1", "cpu": True}])
+
+
+def test_compiled_once_per_schema():
+    assert compile_schema(PARAMS) is compile_schema(PARAMS)
+    assert compile_schema(PARAMS) is not compile_schema(dict(PARAMS))
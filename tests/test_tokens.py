@@ -0,0 +1,108 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import threading
+import time
+
+import pytest
+
+from cloudchef_integration.tasks.cloud_resources.commoncloud.tokens import TokenBroker, TokenExpired, token_key
+
+
+class Platform(object):
+    """
+    Logins numbered from 1, the released tokens
+    """
+
+    def __init__(self, delay=0):
+        self.logins = 0
+        self.released = []
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def login(self):
+        time.sleep(self.delay)
+        with self._lock:
+            self.logins += 1
+            return "token-{}".format(self.logins)
+
+    def release(self, token):
+        self.released.append(token)
+
+
+def test_token_key_hides_the_password():
+    key = token_key("https://zstack:8080", "admin", "password")
+    assert "password" not in repr(key)
+    assert key != token_key("https://zstack:8080", "admin", "changed")
+
+
+def test_token_is_reused_until_it_expires():
+    platform = Platform()
+    broker = TokenBroker(margin=0)
+    assert broker.get("key", platform.login, ttl=0.05, release=platform.release) == "token-1"
+    assert broker.get("key", platform.login, ttl=0.05, release=platform.release) == "token-1"
+    time.sleep(0.06)
+    assert broker.get("key", platform.login, ttl=0.05, release=platform.release) == "token-2"
+    assert platform.released == ["token-1"]
+
+
+def test_margin_renews_before_the_platform_expiry():
+    platform = Platform()
+    broker = TokenBroker(margin=10)
+    broker.get("key", platform.login, ttl=5)
+    broker.get("key", platform.login, ttl=5)
+    assert platform.logins == 2
+
+
+def test_concurrent_callers_wait_for_one_login():
+    platform = Platform(delay=0.05)
+    broker = TokenBroker()
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(broker.get("key", platform.login)))
+               for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert platform.logins == 1
+    assert set(tokens) == {"token-1"}
+
+
+def test_call_retries_once_with_a_new_token():
+    platform = Platform()
+    broker = TokenBroker()
+    sent = []
+
+    def request(token):
+        sent.append(token)
+        if token == "token-1":
+            raise TokenExpired()
+        return "ok"
+
+    assert broker.call("key", platform.login, request) == "ok"
+    assert sent == ["token-1", "token-2"]
+
+    def rejected(token):
+        raise TokenExpired()
+
+    with pytest.raises(TokenExpired):
+        broker.call("key", platform.login, rejected)
+
+
+def test_invalidate_keeps_a_newer_token():
+    platform = Platform()
+    broker = TokenBroker()
+    broker.get("key", platform.login)
+    broker.invalidate("key", "token-0")
+    assert broker.get("key", platform.login) == "token-1"
+    broker.invalidate("key")
+    assert broker.get("key", platform.login) == "token-2"
+
+
+def test_release_all():
+    platform = Platform()
+    broker = TokenBroker()
+    broker.get("a", platform.login, release=platform.release)
+    broker.get("b", platform.login, release=lambda token: 1 / 0)
+    broker.release_all()
+    assert platform.released == ["token-1"]
+    assert broker.get("a", platform.login) == "token-3"
@@ -0,0 +1,45 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+import email
+
+import requests
+from requests.cookies import extract_cookies_to_jar
+
+from cloudchef_integration.tasks.cloud_resources.commoncloud.transport import RETRY_METHODS, HttpTransport
+
+
+def test_one_session_per_host():
+    transport = HttpTransport()
+    try:
+        session = transport.session("https://10.0.0.1:8080/zstack/v1/vm-instances")
+        assert transport.session("https://10.0.0.1:8080/zstack/v1/zones") is session
+        assert transport.session("https://10.0.0.1:8443/zstack/v1/zones") is not session
+        assert transport.session("http://10.0.0.1:8080/zstack/v1/zones") is not session
+    finally:
+        transport.close()
+
+
+def test_sessions_store_no_cookies():
+    transport = HttpTransport()
+    try:
+        session = transport.session("https://appliance.example.com/api")
+        response = requests.Response()
+        response._original_response = type("Response", (object,), {
+            "msg": email.message_from_string("Set-Cookie: JSESSIONID=tenant-a; Path=/\n\n")})()
+        extract_cookies_to_jar(session.cookies, requests.Request("GET", "https://appliance.example.com/api"),
+                               response)
+        assert len(session.cookies) == 0
+    finally:
+        transport.close()
+
+
+def test_only_read_methods_are_retried():
+    transport = HttpTransport(max_retries=5)
+    try:
+        retry = transport.session("https://appliance.example.com/api").get_adapter("https://").max_retries
+        assert retry.total == 5
+        assert "PUT" not in RETRY_METHODS and "DELETE" not in RETRY_METHODS and "POST" not in RETRY_METHODS
+        assert not retry.is_retry("PUT", 503)
+        assert retry.is_retry("GET", 503)
+    finally:
+        transport.close()
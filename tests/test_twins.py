@@ -0,0 +1,27 @@
+# Copyright (c) 2021 Qianyun, Inc. All rights reserved.
+
+"""
+The query and lifecycle packages ship separately (SmartCMP and the abstract plugin): the modules both of them
+need are copied into each tree and must stay byte-identical
+"""
+
+import os
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cloudentries")
+
+TWINS = [
+    ("commoncloud/query/clients.py", "common/lifecycles/clients.py"),
+    ("commoncloud/query/tokens.py", "common/lifecycles/tokens.py"),
+    ("commoncloud/query/transport.py", "common/lifecycles/transport.py"),
+    ("gcp/query/discovery.py", "gcp/lifecycles/discovery.py"),
+    ("tencentcloud/query/models.py", "tencentcloud/lifecycles/models.py"),
+]
+
+
+@pytest.mark.parametrize("query_path, lifecycle_path", TWINS)
+def test_twins_are_identical(query_path, lifecycle_path):
+    with open(os.path.join(ROOT, query_path), 'rb') as query_file, \
+            open(os.path.join(ROOT, lifecycle_path), 'rb') as lifecycle_file:
+        assert query_file.read() == lifecycle_file.read()